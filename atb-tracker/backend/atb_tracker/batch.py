@@ -0,0 +1,105 @@
+"""
+/api/batch/: resolve several internal GET paths in one round trip.
+
+POST {"requests": ["/api/projects/", "/api/projects/tags/"]} (keyed by path) or
+{"requests": {"projects": "/api/projects/", "tags": "/api/projects/tags/"}} returns
+{"responses": {key: {"status": 200, "body": ...}}}. Each path is dispatched in-process
+through the URL resolver, skipping middleware and the HTTP stack, and the bearer token is
+resolved once for the whole batch. Sub-requests run with the caller's headers, so every
+view still applies its own permissions.
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from user_settings.views import get_user_from_token
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUESTS = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+# Per-request state set by middleware that sub-requests share with the batch request
+SHARED_ATTRIBUTES = ('user', 'session', '_messages', '_token_user')
+
+
+def _sub_request(request, path):
+    parts = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = parts.path
+    sub.GET = QueryDict(parts.query)
+    sub.META = {k: v for k, v in request.META.items() if k not in ('CONTENT_TYPE', 'CONTENT_LENGTH')}
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=parts.path, QUERY_STRING=parts.query)
+    sub.COOKIES = request.COOKIES
+    sub._body = b''
+    for attr in SHARED_ATTRIBUTES:
+        if hasattr(request, attr):
+            setattr(sub, attr, getattr(request, attr))
+    return sub
+
+
+def _dispatch(request, path):
+    parts = urlsplit(path)
+    if parts.scheme or parts.netloc or not parts.path.startswith('/api/'):
+        return status.HTTP_400_BAD_REQUEST, {'error': 'Only internal /api/ paths can be batched'}
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, {'error': 'Not found'}
+    if match.func is batch or asyncio.iscoroutinefunction(match.func):
+        return status.HTTP_400_BAD_REQUEST, {'error': 'This path cannot be batched'}
+    try:
+        response = match.func(_sub_request(request, path), *match.args, **match.kwargs)
+    except Http404:
+        return status.HTTP_404_NOT_FOUND, {'error': 'Not found'}
+    except PermissionDenied:
+        return status.HTTP_403_FORBIDDEN, {'error': 'Forbidden'}
+    except Exception:
+        logger.exception("Batched request for %s failed", path)
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, {'error': 'Internal server error'}
+    if response.streaming:
+        response.close()
+        return status.HTTP_400_BAD_REQUEST, {'error': 'Streaming responses cannot be batched'}
+    if hasattr(response, 'data'):
+        # DRF response: use the data directly instead of rendering and re-parsing it
+        return response.status_code, response.data
+    if hasattr(response, 'render'):
+        response.render()
+    try:
+        return response.status_code, json.loads(response.content)
+    except ValueError:
+        return response.status_code, response.content.decode(response.charset, 'replace')
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def batch(request):
+    requests = request.data.get('requests') if isinstance(request.data, dict) else None
+    if isinstance(requests, list):
+        requests = {path: path for path in requests}
+    if not isinstance(requests, dict) or not all(isinstance(p, str) for p in requests.values()):
+        return Response(
+            {'error': 'requests must be a list of paths or an object mapping keys to paths'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(requests) > MAX_REQUESTS:
+        return Response(
+            {'error': f'At most {MAX_REQUESTS} requests per batch'}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    outer = request._request
+    get_user_from_token(request)  # authenticate once; sub-requests inherit outer._token_user
+    responses = {}
+    for key, path in requests.items():
+        code, body = _dispatch(outer, path)
+        responses[key] = {'status': code, 'body': body}
+    return Response({'responses': responses})
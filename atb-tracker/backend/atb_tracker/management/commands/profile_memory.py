@@ -0,0 +1,66 @@
+import json
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils import timezone
+
+from atb_tracker import memory
+from auth_app.models import AuthToken
+from users.models import Member
+
+class Command(BaseCommand):
+    help = (
+        'Replay a request in process under tracemalloc and print its peak allocation and top '
+        'allocating lines per phase (setup, queryset, serialize, render).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Request path with query string, e.g. /api/projects/time-entries/')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--data', help='JSON request body')
+        parser.add_argument('--user', help='Member id or email; a token valid for 10 minutes is created and removed')
+        parser.add_argument('--token', help='Existing bearer token to send instead of --user')
+        parser.add_argument('--repeat', type=int, default=1, help='Replays; the report of each is printed')
+        parser.add_argument('--json', action='store_true', help='Print the raw reports as JSON lines')
+
+    def handle(self, *args, **options):
+        token, created = options['token'], None
+        if options['user'] and not token:
+            lookup = {'pk': options['user']} if options['user'].isascii() and options['user'].isdecimal() else {'email': options['user']}
+            try:
+                member = Member.objects.get(**lookup)
+            except Member.DoesNotExist:
+                raise CommandError(f"No member {options['user']}")
+            token = secrets.token_urlsafe(32)
+            created = AuthToken.objects.create(user=member, token=token, expires_at=timezone.now() + timedelta(minutes=10))
+
+        hosts = [h for h in settings.ALLOWED_HOSTS if h != '*']
+        client = Client(**{memory.FORCE_META_KEY: True}, HTTP_HOST=hosts[0].lstrip('.') if hosts else 'localhost')
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        try:
+            for _ in range(options['repeat']):
+                response = client.generic(
+                    options['method'].upper(), options['path'], options['data'] or '', 'application/json', **headers
+                )
+                self.print_report(response.memory_profile, options['json'])
+        finally:
+            if created:
+                created.delete()
+
+    def print_report(self, report, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(report))
+            return
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{report['method']} {report['path']} ({report['route']}) -> {report['status']}: "
+            f"peak {report['peak_kib']:,.1f} KiB"
+        ))
+        for phase in report['phases']:
+            self.stdout.write(
+                f"  {phase['phase']:<10} peak {phase['peak_kib']:>10,.1f} KiB  retained {phase['retained_kib']:>10,.1f} KiB"
+            )
+            for line in phase['top']:
+                self.stdout.write(f"      {line['size_kib']:>10,.1f} KiB {line['count']:>8,} blocks  {line['line']}")
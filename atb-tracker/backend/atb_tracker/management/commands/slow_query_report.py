@@ -0,0 +1,76 @@
+import statistics
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from atb_tracker.slow_queries import LOG_FILE, read_log
+
+SORT_KEYS = {
+    'total': lambda s: s['total_ms'],
+    'count': lambda s: s['count'],
+    'max': lambda s: s['max_ms'],
+    'mean': lambda s: s['mean_ms'],
+}
+
+class Command(BaseCommand):
+    help = 'Summarize the slow-query log by SQL fingerprint: how often, how slow, how many rows, and from where.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, help='Only queries logged in the last N hours')
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total', help='Order of the fingerprints')
+        parser.add_argument('--limit', type=int, default=20, help='Fingerprints to show')
+        parser.add_argument('--file', default=str(LOG_FILE), help='Log file (rotated backups are read too)')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours']) if options['hours'] else None
+        groups = {}
+        for entry in read_log(options['file']):
+            logged = parse_datetime(entry.get('time') or '')
+            if since and (logged is None or logged < since):
+                continue
+            group = groups.setdefault(entry['fingerprint'], {'sql': entry['sql'], 'durations': [], 'rows': [],
+                                                              'sites': Counter(), 'paths': Counter()})
+            group['durations'].append(entry['duration_ms'])
+            if entry.get('rows') is not None:
+                group['rows'].append(entry['rows'])
+            group['sites'][entry.get('site') or '?'] += 1
+            if entry.get('path'):
+                group['paths'][f"{entry['method']} {entry['path']}"] += 1
+        if not groups:
+            self.stdout.write('No slow queries logged.')
+            return
+
+        summaries = []
+        for key, group in groups.items():
+            durations = sorted(group['durations'])
+            summaries.append({
+                'fingerprint': key,
+                'sql': group['sql'],
+                'count': len(durations),
+                'total_ms': sum(durations),
+                'mean_ms': statistics.fmean(durations),
+                'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                'max_ms': durations[-1],
+                'mean_rows': statistics.fmean(group['rows']) if group['rows'] else None,
+                'sites': group['sites'].most_common(3),
+                'paths': group['paths'].most_common(3),
+            })
+        summaries.sort(key=SORT_KEYS[options['sort']], reverse=True)
+
+        for s in summaries[:options['limit']]:
+            rows = f"{s['mean_rows']:.0f}" if s['mean_rows'] is not None else '-'
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{s['fingerprint']}  {s['count']}x  total {s['total_ms']:.0f} ms  mean {s['mean_ms']:.1f} ms  "
+                f"p95 {s['p95_ms']:.1f} ms  max {s['max_ms']:.1f} ms  rows {rows}"
+            ))
+            self.stdout.write(f"  {s['sql'][:300]}")
+            for site, count in s['sites']:
+                self.stdout.write(f'  from {site} ({count})')
+            for path, count in s['paths']:
+                self.stdout.write(f'  during {path} ({count})')
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(s['count'] for s in summaries)} slow queries in {len(summaries)} fingerprints."
+        ))
@@ -0,0 +1,154 @@
+"""
+Opt-in tracemalloc memory profiling of single requests.
+
+With MEMORY_PROFILING on, a request sending ``X-Memory-Profile: 1`` is traced from start
+to finish. Views using MemoryProfiledMixin split it into phases: ``setup`` (auth, query
+building, pagination counts), ``queryset`` (evaluating the rows), ``serialize`` and
+``render``. Each phase reports what it left allocated, its peak, and the source lines
+that allocated most. The report is appended to MEMORY_PROFILE_LOG (JSONL) and the peak is
+returned in the X-Memory-Peak-KiB header; ``profile_memory`` replays a request in
+process and prints it.
+
+tracemalloc sees every thread: profile with one request at a time. Only one profiled
+request runs per process; others are served unprofiled while one is in progress.
+"""
+import json
+import threading
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+ENABLED = getattr(settings, 'MEMORY_PROFILING', False)
+LOG_FILE = Path(getattr(settings, 'MEMORY_PROFILE_LOG', Path(settings.BASE_DIR) / 'logs' / 'memory_profiles.jsonl'))
+TOP_LINES = 10
+# Set by profile_memory on its replayed request; clients cannot put it in the WSGI environ
+FORCE_META_KEY = 'atb.memory_profile'
+
+# Allocations made by the profiler and by tracemalloc itself are noise
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+]
+
+APP_ROOT = str(Path(settings.BASE_DIR).resolve())
+
+_busy = threading.Lock()
+_log_lock = threading.Lock()
+
+
+def _kib(size):
+    return round(size / 1024, 1)
+
+
+def _where(frame):
+    filename = frame.filename
+    if filename.startswith(APP_ROOT):
+        filename = Path(filename).relative_to(APP_ROOT).as_posix()
+    return f'{filename}:{frame.lineno}'
+
+
+class MemoryProfile:
+    """Snapshots between the phases of one request; tracemalloc must be tracing."""
+
+    def __init__(self):
+        self.phases = []
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        self._base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def mark(self, phase):
+        """Close ``phase``: its growth, its peak and the lines that allocated the most in it."""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        top = [
+            {'line': _where(stat.traceback[0]),
+             'size_kib': _kib(stat.size_diff), 'count': stat.count_diff}
+            for stat in snapshot.compare_to(self._snapshot, 'lineno')[:TOP_LINES]
+            if stat.size_diff > 0
+        ]
+        self.phases.append({
+            'phase': phase,
+            'retained_kib': _kib(current - self._base),
+            'peak_kib': _kib(peak - self._base),
+            'top': top,
+        })
+        self._snapshot = snapshot
+        # take_snapshot() itself allocates; measure the next phase from here
+        self._base = tracemalloc.get_traced_memory()[0] - (current - self._base)
+        tracemalloc.reset_peak()
+
+    def report(self, request, response, route):
+        return {
+            'time': timezone.now().isoformat(),
+            'route': route,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'peak_kib': max((phase['peak_kib'] for phase in self.phases), default=0),
+            'phases': self.phases,
+        }
+
+
+def mark(request, phase):
+    """Close a phase of ``request``'s profile, if it is being profiled."""
+    profile = getattr(request, 'memory_profile', None)
+    if profile is not None:
+        profile.mark(phase)
+
+
+def _write(report):
+    with _log_lock:
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(LOG_FILE, 'a', encoding='utf-8') as log:
+            log.write(json.dumps(report) + '\n')
+
+
+class MemoryProfileMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wanted = request.META.get(FORCE_META_KEY) or (ENABLED and request.headers.get('X-Memory-Profile') == '1')
+        if not wanted or not _busy.acquire(blocking=False):
+            return self.get_response(request)
+        started_tracing = not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start()
+            request.memory_profile = MemoryProfile()
+            response = self.get_response(request)
+            request.memory_profile.mark('render')
+            match = getattr(request, 'resolver_match', None)
+            report = request.memory_profile.report(request, response, match.url_name if match else None)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            _busy.release()
+        response['X-Memory-Peak-KiB'] = str(report['peak_kib'])
+        response.memory_profile = report
+        _write(report)
+        return response
+
+
+class MemoryProfiledMixin:
+    """
+    For list views: while profiled, evaluates the queryset before serializing it, so that
+    loading rows and serializing them are separate phases. No effect otherwise.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args and getattr(self.request, 'memory_profile', None) is not None:
+            mark(self.request, 'setup')
+            instance = list(args[0]) if isinstance(args[0], QuerySet) else args[0]
+            mark(self.request, 'queryset')
+            args = (instance, *args[1:])
+        return super().get_serializer(*args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(request, 'memory_profile', None) is not None and request.memory_profile.phases:
+            mark(request, 'serialize')
+        return super().finalize_response(request, response, *args, **kwargs)
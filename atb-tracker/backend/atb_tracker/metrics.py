@@ -0,0 +1,330 @@
+"""
+Prometheus metrics in the text exposition format, served at /metrics.
+
+Every counter, histogram bucket, sum and count is a float slot keyed by its sample name
+and labels. Without METRICS_MULTIPROC_DIR a process keeps its slots in a dict. With it,
+each process owns a memory-mapped file of slots in that directory: it is the only writer,
+so an update is an uncontended per-process lock and a write to shared memory, and
+/metrics sums the files of every worker. Files are named after the process id and the
+time the store was opened, so a worker reusing a dead one's pid starts a file of its own.
+Files of exited workers keep counting, since counters must never go backwards; empty the
+directory when the server starts.
+
+/metrics answers only requests carrying 'Authorization: Bearer <METRICS_TOKEN>', and is
+closed while METRICS_TOKEN is unset.
+
+MetricsMiddleware records request counts, latency, response sizes and database queries
+per URL route name. Cache and authentication code report through the counters below.
+"""
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+MULTIPROC_DIR = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+TOKEN = getattr(settings, 'METRICS_TOKEN', None)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+# --- Storage ---
+
+class _DictStore:
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class _FileStore:
+    """
+    One process's slots in ``metrics_<pid>_<start ns>.db``: a uint64 count of bytes in use, then
+    records of [uint32 key length][key][padding to 8 bytes][float64 value]. The byte count
+    is updated after a record is complete, so readers never see a partial one.
+    """
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, directory):
+        self.path = Path(directory) / f'metrics_{os.getpid()}_{time.time_ns()}.db'
+        self._lock = threading.Lock()
+        self._offsets = {}
+        # 'x': never reopen (and reset) another process's file
+        self._file = open(self.path, 'x+b')
+        self._file.truncate(self.INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), self.INITIAL_SIZE)
+        self._used = 8
+        struct.pack_into('<Q', self._map, 0, self._used)
+
+    def _add_slot(self, key):
+        encoded = key.encode()
+        value_at = self._used + 4 + len(encoded)
+        value_at += -value_at % 8
+        end = value_at + 8
+        if end > len(self._map):
+            size = max(end, len(self._map) * 2)
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        struct.pack_into(f'<I{len(encoded)}s', self._map, self._used, len(encoded), encoded)
+        struct.pack_into('<d', self._map, value_at, 0.0)
+        self._used = end
+        struct.pack_into('<Q', self._map, 0, self._used)
+        self._offsets[key] = value_at
+        return value_at
+
+    def inc(self, key, amount):
+        with self._lock:
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._add_slot(key)
+            struct.pack_into('<d', self._map, offset, struct.unpack_from('<d', self._map, offset)[0] + amount)
+
+    def items(self):
+        return list(read_file(self.path))
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < 8:
+        return
+    used, position = struct.unpack_from('<Q', data, 0)[0], 8
+    while position < used:
+        length = struct.unpack_from('<I', data, position)[0]
+        key = data[position + 4:position + 4 + length].decode()
+        position += 4 + length
+        position += -position % 8
+        yield key, struct.unpack_from('<d', data, position)[0]
+        position += 8
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """This process's store; a forked worker gets its own file instead of its parent's."""
+    global _store, _store_pid
+    if _store_pid != os.getpid():
+        with _store_lock:
+            if _store_pid != os.getpid():
+                if MULTIPROC_DIR:
+                    Path(MULTIPROC_DIR).mkdir(parents=True, exist_ok=True)
+                    _store = _FileStore(MULTIPROC_DIR)
+                else:
+                    _store = _DictStore()
+                _store_pid = os.getpid()
+    return _store
+
+
+def collect():
+    """{key: value} summed over all worker processes (or this process without a directory)."""
+    if not MULTIPROC_DIR:
+        return dict(store().items())
+    totals = {}
+    for path in Path(MULTIPROC_DIR).glob('metrics_*.db'):
+        for key, value in read_file(path):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+# --- Metric types ---
+
+REGISTRY = []
+
+
+def _key(sample, labels):
+    return json.dumps([sample, sorted(labels.items())])
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        store().inc(_key(self.name, labels), amount)
+
+
+class Histogram:
+    """Bucket counts are stored per bucket and made cumulative when exposed."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        le = next((str(bound) for bound in self.buckets if value <= bound), '+Inf')
+        values = store()
+        values.inc(_key(f'{self.name}_bucket', {**labels, 'le': le}), 1)
+        values.inc(_key(f'{self.name}_sum', labels), value)
+        values.inc(_key(f'{self.name}_count', labels), 1)
+
+
+REQUESTS = Counter(
+    'atb_http_requests_total', 'HTTP requests by URL route name, method and status.', ('route', 'method', 'status')
+)
+REQUEST_DURATION = Histogram(
+    'atb_http_request_duration_seconds', 'Time to produce a response.', ('route', 'method')
+)
+RESPONSE_SIZE = Histogram(
+    'atb_http_response_size_bytes', 'Response body sizes (streaming responses excluded).', ('route',), SIZE_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'atb_db_queries_per_request', 'Database queries run by one request.', ('route',), QUERY_BUCKETS
+)
+DB_DURATION = Histogram(
+    'atb_db_query_seconds_per_request', 'Time one request spent executing database queries.', ('route',)
+)
+CACHE_REQUESTS = Counter(
+    'atb_response_cache_requests_total', 'Cached list lookups by view and result (hit or miss).', ('cache', 'result')
+)
+CACHE_BYTES = Counter(
+    'atb_response_cache_bytes_total', 'Bytes served from or stored into the response cache.', ('cache', 'direction')
+)
+TOKEN_AUTH = Counter(
+    'atb_token_auth_total', 'Bearer token checks by outcome (valid, invalid or missing).', ('outcome',)
+)
+AUTH_REQUESTS = Counter(
+    'atb_auth_requests_total', 'Login, registration and token endpoints by outcome.', ('action', 'outcome')
+)
+
+# Route names of the auth endpoints -> action label
+AUTH_ACTIONS = {
+    'login': 'login', 'register': 'register', 'google_auth': 'google', 'verify_token': 'verify', 'logout': 'logout',
+}
+
+
+# --- Exposition ---
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _sample(name, labels, value):
+    text = ','.join(f'{label}="{_escape(v)}"' for label, v in labels)
+    return f'{name}{{{text}}} {value!r}' if text else f'{name} {value!r}'
+
+
+def _bound(le):
+    return float('inf') if le == '+Inf' else float(le)
+
+
+def render():
+    """All metrics in the Prometheus text format."""
+    samples = {}
+    for key, value in collect().items():
+        name, labels = json.loads(key)
+        samples.setdefault(name, []).append(([tuple(label) for label in labels], value))
+
+    lines = []
+    for metric in REGISTRY:
+        lines += [f'# HELP {metric.name} {metric.documentation}', f'# TYPE {metric.name} {metric.type}']
+        if metric.type == 'counter':
+            lines += [_sample(metric.name, labels, value) for labels, value in sorted(samples.get(metric.name, []))]
+            continue
+        buckets = {}
+        for labels, value in samples.get(f'{metric.name}_bucket', []):
+            le = dict(labels)['le']
+            buckets.setdefault(tuple(l for l in labels if l[0] != 'le'), {})[le] = value
+        for labels in sorted(buckets):
+            cumulative = 0.0
+            for bound in [*map(str, metric.buckets), '+Inf']:
+                cumulative += buckets[labels].get(bound, 0.0)
+                lines.append(_sample(f'{metric.name}_bucket', sorted([*labels, ('le', bound)]), cumulative))
+        for suffix in ('_sum', '_count'):
+            lines += [_sample(metric.name + suffix, labels, value)
+                      for labels, value in sorted(samples.get(metric.name + suffix, []))]
+
+    # Ratios for dashboards; Prometheus can also derive them from the counters
+    lookups = {}
+    for labels, value in samples.get(CACHE_REQUESTS.name, []):
+        labels = dict(labels)
+        lookups.setdefault(labels['cache'], {})[labels['result']] = value
+    lines += ['# HELP atb_response_cache_hit_ratio Share of cached list lookups served from the cache.',
+              '# TYPE atb_response_cache_hit_ratio gauge']
+    for cache_name, counts in sorted(lookups.items()):
+        total = counts.get('hit', 0.0) + counts.get('miss', 0.0)
+        lines.append(_sample('atb_response_cache_hit_ratio', [('cache', cache_name)],
+                             counts.get('hit', 0.0) / total if total else 0.0))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    # Closed unless a token is configured: route names and traffic are not public
+    expected = f'Bearer {TOKEN}'.encode()
+    if not TOKEN or not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+# --- Request instrumentation ---
+
+class _QueryCounter:
+    """execute_wrapper adding up the queries of one request and the time spent executing them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = _QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        # Route names (or patterns) rather than paths keep the label set small
+        route = (match.url_name or match.route or 'unnamed') if match else 'unmatched'
+        method = request.method if request.method in METHODS else 'other'
+        REQUESTS.inc(route=route, method=method, status=str(response.status_code))
+        REQUEST_DURATION.observe(elapsed, route=route, method=method)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(len(response.content), route=route)
+        DB_QUERIES.observe(queries.count, route=route)
+        DB_DURATION.observe(queries.seconds, route=route)
+        if route in AUTH_ACTIONS:
+            outcome = 'success' if response.status_code < 400 else 'rejected' if response.status_code < 500 else 'error'
+            AUTH_REQUESTS.inc(action=AUTH_ACTIONS[route], outcome=outcome)
+        return response
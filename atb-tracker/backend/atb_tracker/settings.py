@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,9 +47,14 @@ INSTALLED_APPS = [
     'users',
     'user_settings',
     'auth_app',
+    'jobs',
+    'atb_tracker',
 ]
 
 MIDDLEWARE = [
+    'atb_tracker.metrics.MetricsMiddleware',
+    'atb_tracker.memory.MemoryProfileMiddleware',
+    'atb_tracker.slow_queries.SlowQueryMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -110,6 +116,31 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PBKDF2 work factor; existing hashes are upgraded transparently on the next login
+PASSWORD_PBKDF2_ITERATIONS = 1_000_000
+
+PASSWORD_HASHERS = [
+    'users.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Password hashing pool (see users/passwords.py); None means one thread per CPU
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_MAX_PENDING = 64
+
+# Token-bucket throttles on login/register/google (see auth_app/throttling.py).
+# Use AUTH_THROTTLE_STORE = 'sqlite' to share buckets between worker processes.
+AUTH_THROTTLE_ENABLED = True
+AUTH_THROTTLE_RATES = {'auth_ip': '30/min', 'auth_email': '10/min'}
+AUTH_THROTTLE_STORE = 'memory'
+AUTH_THROTTLE_SQLITE_PATH = BASE_DIR / 'throttle.sqlite3'
+# Per-IP buckets use REMOTE_ADDR. Behind reverse proxies that append to X-Forwarded-For,
+# set this to their number so the client address is taken from the header instead.
+AUTH_THROTTLE_NUM_PROXIES = 0
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -128,6 +159,92 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Media files (uploads)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Avatar thumbnails, rendered by a background job (see user_settings/avatars.py)
+AVATAR_VARIANT_SIZES = (32, 64, 128, 256)
+
+# Background jobs (see jobs/worker.py); run with `python manage.py run_workers`
+JOBS_LEASE_SECONDS = 300
+JOBS_HEARTBEAT_SECONDS = 60  # a running job's lease is renewed this often
+JOBS_RETRY_BACKOFF_SECONDS = 30
+
+# Recurring auth token purge, started with `python manage.py purge_auth_tokens --schedule`
+AUTH_TOKEN_PURGE_INTERVAL_HOURS = 24
+
+# Live pomodoro stream (see pomodoro/live.py); serve with an ASGI server, e.g. `uvicorn atb_tracker.asgi:application`
+POMODORO_STREAM_POLL_SECONDS = 1.0
+POMODORO_STREAM_KEEPALIVE_SECONDS = 15.0
+
+# Cached client/tag/project list responses, billing months and analytics versions (see
+# projects/caching.py, reports.py, analytics.py). Invalidation only works if every worker
+# process sees the same cache: the default is a directory shared by the workers of one
+# host; set CACHE_REDIS_URL (needs the redis package) when workers run on several hosts.
+# A per-process LocMemCache fails the projects.W001 check.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache',
+            'OPTIONS': {'MAX_ENTRIES': 10_000},
+        }
+    }
+RESPONSE_CACHE_TIMEOUT = 3600
+
+# Closed months of the billing report (see projects/reports.py)
+BILLING_REPORT_CACHE_TIMEOUT = 30 * 24 * 3600
+
+# Set Project.progress from the share of completed tasks (see projects/counters.py)
+PROJECT_PROGRESS_FROM_TASKS = False
+
+# Rows per query when loading entries into NumPy, and datasets kept per process
+# (see projects/analytics.py)
+ANALYTICS_CHUNK_SIZE = 100_000
+ANALYTICS_MAX_DATASETS = 8
+
+# Memory-mapped column files of entries and pomodoros, written by build_columnar_snapshot
+# (see projects/snapshot.py)
+COLUMNAR_SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+
+# Time entries dated before the month this many months back are moved into compressed
+# monthly partitions by archive_time_entries; decoded partitions cached per process
+# (see projects/archive.py)
+TIME_ENTRY_ARCHIVE_DIR = BASE_DIR / 'archive'
+TIME_ENTRY_ARCHIVE_AFTER_MONTHS = 18
+TIME_ENTRY_ARCHIVE_CACHE_SIZE = 64
+
+# Most GET paths accepted by one /api/batch/ call (see atb_tracker/batch.py)
+BATCH_MAX_REQUESTS = 20
+
+# Queries taking at least this many milliseconds are logged with their call site to a
+# rotating JSONL file; None turns the log off (see atb_tracker/slow_queries.py)
+SLOW_QUERY_LOG_MS = 200
+SLOW_QUERY_LOG_FILE = BASE_DIR / 'logs' / 'slow_queries.jsonl'
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+
+# /metrics (see atb_tracker/metrics.py). With several worker processes, set
+# METRICS_MULTIPROC_DIR to a directory emptied on server start so the counters of all
+# workers are added up. /metrics requires 'Authorization: Bearer <METRICS_TOKEN>' and
+# answers 403 while METRICS_TOKEN is unset.
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Trace requests sending 'X-Memory-Profile: 1' with tracemalloc and log per-phase peaks
+# and top allocating lines (see atb_tracker/memory.py and the profile_memory command)
+MEMORY_PROFILING = False
+MEMORY_PROFILE_LOG = BASE_DIR / 'logs' / 'memory_profiles.jsonl'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
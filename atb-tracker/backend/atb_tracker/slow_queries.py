@@ -0,0 +1,224 @@
+"""
+Slow-query log: every query taking SLOW_QUERY_LOG_MS or longer is appended to a rotating
+JSONL file (SLOW_QUERY_LOG_FILE) with its duration, row count, a normalized fingerprint of
+its SQL, the application frame that issued it and the request it belonged to.
+
+SlowQueryMiddleware installs the recorder as an execute_wrapper on every database
+connection while a request is handled. SQLite does most of a SELECT's work while rows are
+fetched rather than in execute(), so SELECTs are timed and their rows counted until the
+cursor is closed. ``slow_query_report`` aggregates the files by fingerprint.
+
+Parameters are never logged, only the SQL with its placeholders.
+"""
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.models import Manager, Model, QuerySet
+from django.utils import timezone
+
+THRESHOLD_MS = getattr(settings, 'SLOW_QUERY_LOG_MS', 200)
+LOG_FILE = Path(getattr(settings, 'SLOW_QUERY_LOG_FILE', Path(settings.BASE_DIR) / 'logs' / 'slow_queries.jsonl'))
+MAX_BYTES = getattr(settings, 'SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024)
+BACKUP_COUNT = getattr(settings, 'SLOW_QUERY_LOG_BACKUPS', 5)
+MAX_SQL_LENGTH = 2000
+
+APP_ROOT = str(Path(settings.BASE_DIR).resolve())
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),  # string literals
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),  # numbers
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),  # IN lists of any length
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def fingerprint(sql):
+    """SQL with literals, placeholders and IN-list lengths folded, so equivalent queries match."""
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint_id(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def _is_app_file(filename):
+    return filename.startswith(APP_ROOT) and 'site-packages' not in filename and filename != __file__
+
+
+def _relative(filename):
+    return Path(filename).resolve().relative_to(APP_ROOT).as_posix()
+
+
+def call_site():
+    """
+    The innermost application frame on the stack, e.g. 'projects/views.py:SearchView.get'.
+    Querysets are often evaluated inside DRF or Django with no application frame left on
+    the stack; then it is the innermost method running on an application view, serializer
+    or similar object, like 'projects/views.py:TimeEntryListCreateView.list'.
+    """
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if _is_app_file(filename):
+            return f'{_relative(filename)}:{frame.f_code.co_qualname}'
+        owner = frame.f_locals.get('self')
+        if fallback is None and owner is not None and not isinstance(owner, (Model, QuerySet, Manager)):
+            module = getattr(sys.modules.get(type(owner).__module__), '__file__', None) or ''
+            if _is_app_file(module):
+                fallback = f'{_relative(module)}:{type(owner).__qualname__}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return fallback
+
+
+_logger = logging.getLogger('atb_tracker.slow_queries')
+_logger_lock = threading.Lock()
+
+
+def _write(entry):
+    if not _logger.handlers:
+        with _logger_lock:
+            if not _logger.handlers:
+                LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(LOG_FILE, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                _logger.addHandler(handler)
+                _logger.setLevel(logging.INFO)
+                _logger.propagate = False
+    _logger.info(json.dumps(entry))
+
+
+class _TimedCursor:
+    """Wraps a database cursor to add fetch time and rows to a query until it is closed."""
+
+    def __init__(self, cursor, finish, elapsed):
+        self.wrapped = cursor
+        self.elapsed = elapsed
+        self.rows = 0
+        self._finish = finish
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def _timed(self, fetch, *args):
+        started = time.perf_counter()
+        result = fetch(*args)
+        self.elapsed += time.perf_counter() - started
+        return result
+
+    def fetchone(self):
+        row = self._timed(self.wrapped.fetchone)
+        self.rows += row is not None
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._timed(self.wrapped.fetchmany, *args)
+        self.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self.wrapped.fetchall)
+        self.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        while (row := self.fetchone()) is not None:
+            yield row
+
+    def finish(self):
+        if self._finish is not None:
+            finish, self._finish = self._finish, None
+            finish(self.elapsed, self.rows)
+
+    def close(self):
+        self.finish()
+        return self.wrapped.close()
+
+
+class SlowQueryRecorder:
+    """execute_wrapper logging queries slower than ``threshold_ms``."""
+
+    def __init__(self, threshold_ms=THRESHOLD_MS, request=None):
+        self.threshold = threshold_ms / 1000
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        cursor = context['cursor']
+        if isinstance(cursor.cursor, _TimedCursor):
+            # The cursor is reused for another query; the previous one is complete
+            cursor.cursor.finish()
+            cursor.cursor = cursor.cursor.wrapped
+        alias = context['connection'].alias
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed = time.perf_counter() - started
+        if cursor.description is None:
+            # No result set: the work is done and rowcount is final
+            self.finish(sql, alias, elapsed, cursor.rowcount)
+        else:
+            cursor.cursor = _TimedCursor(
+                cursor.cursor, lambda total, rows: self.finish(sql, alias, total, rows), elapsed
+            )
+        return result
+
+    def finish(self, sql, alias, elapsed, rows):
+        if elapsed < self.threshold:
+            return
+        normalized = fingerprint(sql)
+        entry = {
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(elapsed * 1000, 2),
+            'rows': rows if rows >= 0 else None,
+            'fingerprint': fingerprint_id(normalized),
+            'sql': normalized[:MAX_SQL_LENGTH],
+            'site': call_site(),
+            'database': alias,
+        }
+        if self.request is not None:
+            entry.update(method=self.request.method, path=self.request.path)
+        _write(entry)
+
+
+class SlowQueryMiddleware:
+    """Records slow queries of every request; unused when SLOW_QUERY_LOG_MS is None."""
+
+    def __init__(self, get_response):
+        if THRESHOLD_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = SlowQueryRecorder(request=request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
+
+
+def read_log(path=LOG_FILE):
+    """Entries of the log and its rotated backups, oldest file first."""
+    backups = [p for p in Path(path).parent.glob(Path(path).name + '.*') if p.suffix[1:].isascii() and p.suffix[1:].isdecimal()]
+    files = sorted(backups, key=lambda p: -int(p.suffix[1:]))
+    for file in [*files, Path(path)]:
+        if not file.exists():
+            continue
+        with open(file, encoding='utf-8') as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # partially written line
@@ -0,0 +1,132 @@
+"""
+Query plan assertions for the test suite.
+
+``capture_queries()`` records the SQL and parameters a block of code runs;
+``QueryPlanAssertions.assertQueryPlan`` runs SQLite's EXPLAIN QUERY PLAN on the captured
+queries that read a table and fails when they do not search it through the expected
+index, or when any of them scans one of the large tables in full. Plans depend on table
+statistics, so tests run against ``seed_dataset()`` followed by ANALYZE.
+"""
+import re
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+# Tables that grow with usage; reading any of them without an index is a regression
+LARGE_TABLES = (
+    'projects_timeentry',
+    'projects_task',
+    'projects_project',
+    'projects_project_tags',
+    'pomodoro_pomodorosession',
+    'auth_app_authtoken',
+)
+
+
+@contextmanager
+def capture_queries():
+    """Yields a list that fills with the (sql, params) of every query run inside the block."""
+    captured = []
+
+    def record(execute, sql, params, many, context):
+        captured.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        yield captured
+
+
+def query_plan(sql, params=()):
+    """Detail lines of EXPLAIN QUERY PLAN, e.g. 'SEARCH t USING INDEX i (a=?)'."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def _reads(sql, table):
+    return sql.lstrip().upper().startswith('SELECT') and re.search(rf'\b(FROM|JOIN) "{table}"', sql)
+
+
+class QueryPlanAssertions:
+    """Mixin for TestCase."""
+    large_tables = LARGE_TABLES
+
+    def assertQueryPlan(self, captured, table, index=None):
+        """
+        The captured SELECTs reading ``table`` (at least one must) search it using ``index``
+        (any index when None), and none of them scans a large table.
+        """
+        queries = [(sql, params) for sql, params in captured if _reads(sql, table)]
+        self.assertTrue(queries, f'No captured query reads {table}')
+        for sql, params in queries:
+            plan = query_plan(sql, params)
+            details = '\n'.join(plan)
+            for large in self.large_tables:
+                scans = [line for line in plan if re.match(rf'SCAN {large}\b', line)]
+                self.assertFalse(scans, f'Full scan of {large}:\n{details}\n\n{sql}')
+            if index is None:
+                pattern = rf'SEARCH {table} USING (COVERING INDEX|INDEX|INTEGER PRIMARY KEY)\b'
+            else:
+                pattern = rf'SEARCH {table} USING (COVERING )?INDEX {index}\b'
+            self.assertTrue(
+                any(re.match(pattern, line) for line in plan),
+                f'{table} not searched using {index or "an index"}:\n{details}\n\n{sql}',
+            )
+
+
+def seed_dataset(members=12, projects_per_member=25, entries_per_project=60, tokens_per_member=200,
+                 sessions_per_member=500):
+    """
+    A few members with enough projects, tags, tasks, time entries, pomodoro sessions and
+    (mostly expired) auth tokens that the planner has a real choice, then ANALYZE.
+    Returns the members; each has one active token, 'token-<member id>'.
+    """
+    from auth_app.models import AuthToken
+    from pomodoro.models import PomodoroSession
+    from projects.models import Client, Project, Tag, Task, TimeEntry
+    from users.models import Member
+
+    now = timezone.now()
+    first_day = date(2024, 1, 1)
+    result = []
+    for m in range(members):
+        member = Member.objects.create(name=f'Member {m}', email=f'member{m}@example.com')
+        result.append(member)
+        client = Client.objects.create(name=f'Client {m}', owner=member)
+        tags = Tag.objects.bulk_create([Tag(name=f'tag-{m}-{i}', owner=member) for i in range(5)])
+        projects = Project.objects.bulk_create([
+            Project(name=f'Project {m}-{i}', client=client, owner=member, status='Active')
+            for i in range(projects_per_member)
+        ])
+        Project.tags.through.objects.bulk_create([
+            Project.tags.through(project_id=project.id, tag_id=tags[i % len(tags)].id)
+            for i, project in enumerate(projects)
+        ])
+        Task.objects.bulk_create([
+            Task(project=project, title=f'Task {i}', owner=member) for project in projects for i in range(5)
+        ])
+        TimeEntry.objects.bulk_create([
+            TimeEntry(
+                project=project, owner=member, description=f'Work {i}', start_time=time(9), end_time=time(10),
+                duration=30 + i % 90, date=first_day + timedelta(days=(i * 7 + project.id) % 700),
+                billable=i % 3 == 0,
+            )
+            for project in projects for i in range(entries_per_project)
+        ])
+        PomodoroSession.objects.bulk_create([
+            PomodoroSession(
+                owner=member, start_time=timezone.make_aware(datetime.combine(first_day, time(9))) + timedelta(hours=i * 13),
+                end_time=timezone.make_aware(datetime.combine(first_day, time(9, 25))) + timedelta(hours=i * 13),
+                duration=25,
+            )
+            for i in range(sessions_per_member)
+        ])
+        AuthToken.objects.bulk_create([
+            AuthToken(user=member, token=f'expired-{member.id}-{i}', expires_at=now - timedelta(days=1), is_active=False)
+            for i in range(tokens_per_member)
+        ] + [AuthToken(user=member, token=f'token-{member.id}', expires_at=now + timedelta(days=1))])
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return result
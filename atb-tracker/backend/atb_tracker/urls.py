@@ -16,6 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from django.conf import settings
+from django.conf.urls.static import static
+from .batch import batch
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -24,4 +28,11 @@ urlpatterns = [
     path('api/', include('pomodoro.urls')),
     path('api/user-settings/', include('user_settings.urls')),
     path('api/auth/', include('auth_app.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/batch/', batch, name='batch'),
+    path('metrics', metrics_view, name='metrics'),
 ]
+
+# Serve media files in development
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
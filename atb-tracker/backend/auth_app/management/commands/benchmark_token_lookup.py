@@ -0,0 +1,106 @@
+import os
+import secrets
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from auth_app.models import AuthToken
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the active-token lookup against a scratch SQLite database filled with '
+        'historical tokens. Uses the real table schema and the SQL Django generates.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000, help='Historical tokens to generate')
+        parser.add_argument('--active', type=int, default=10_000, help='How many of them are active')
+        parser.add_argument('--lookups', type=int, default=20_000, help='Timed lookups per run')
+        parser.add_argument('--db', help='Scratch database path (default: a file in a temp directory, deleted afterwards)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stderr.write('This benchmark needs the sqlite3 backend to generate the schema.')
+            return
+        # A private directory rather than a bare temp name, which another process could claim
+        # first; it also takes SQLite's journal files with it
+        scratch = None if options['db'] else tempfile.TemporaryDirectory()
+        path = options['db'] or os.path.join(scratch.name, 'benchmark.sqlite3')
+        rows, active, lookups = options['rows'], min(options['active'], options['rows']), options['lookups']
+        db = sqlite3.connect(path)
+        try:
+            self._create_schema(db)
+            active_tokens = self._fill(db, rows, active)
+            sql, params = self._lookup_sql()
+            self.stdout.write(f'Query plan: {db.execute("EXPLAIN QUERY PLAN " + sql, params(active_tokens[0])).fetchall()}')
+            self._run(db, 'active hit', sql, params, active_tokens, lookups)
+            misses = [secrets.token_urlsafe(32) for _ in range(1000)]
+            self._run(db, 'miss', sql, params, misses, lookups)
+        finally:
+            db.close()
+            if scratch:
+                scratch.cleanup()
+
+    def _create_schema(self, db):
+        with connection.schema_editor(collect_sql=True) as editor:
+            editor.create_model(AuthToken)
+        for statement in editor.collected_sql:
+            db.execute(statement.rstrip(';'))
+
+    def _fill(self, db, rows, active):
+        """Insert ``rows`` tokens, the last ``active`` of which are still valid."""
+        self.stdout.write(f'Generating {rows:,} tokens ({active:,} active)...')
+        now = timezone.now()
+        expired = (now - timedelta(days=60)).isoformat(sep=' ')
+        valid = (now + timedelta(days=30)).isoformat(sep=' ')
+        created = (now - timedelta(days=90)).isoformat(sep=' ')
+        active_tokens = []
+        chunk = 50_000
+        started = time.perf_counter()
+        for start in range(0, rows, chunk):
+            batch = []
+            for i in range(start, min(start + chunk, rows)):
+                token = secrets.token_urlsafe(32)
+                is_active = i >= rows - active
+                if is_active:
+                    active_tokens.append(token)
+                # Historical rows are a mix of logged-out and expired tokens
+                batch.append((i + 1, token, created, valid if is_active else expired, is_active or i % 2 == 0))
+            db.executemany(
+                'INSERT INTO auth_app_authtoken (user_id, token, created_at, expires_at, is_active) VALUES (?, ?, ?, ?, ?)',
+                batch,
+            )
+            db.commit()
+        db.execute('ANALYZE')
+        self.stdout.write(f'Generated in {time.perf_counter() - started:.1f}s')
+        return active_tokens
+
+    def _lookup_sql(self):
+        queryset = AuthToken.objects.active().filter(token='__token__')
+        sql, params = queryset.query.sql_with_params()
+        sql = sql.replace('%s', '?')
+        token_index = params.index('__token__')
+
+        def bind(token):
+            bound = list(params)
+            bound[token_index] = token
+            return [p.isoformat(sep=' ') if hasattr(p, 'isoformat') else p for p in bound]
+        return sql, bind
+
+    def _run(self, db, label, sql, params, tokens, lookups):
+        timings = []
+        for i in range(lookups):
+            bound = params(tokens[i % len(tokens)])
+            started = time.perf_counter()
+            db.execute(sql, bound).fetchall()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        p50 = statistics.median(timings) * 1e6
+        p99 = timings[int(len(timings) * 0.99) - 1] * 1e6
+        self.stdout.write(f'{label}: p50 {p50:.1f} us, p99 {p99:.1f} us over {lookups:,} lookups')
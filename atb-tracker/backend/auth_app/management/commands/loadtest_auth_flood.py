@@ -0,0 +1,92 @@
+import secrets
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from auth_app import throttling
+from auth_app.models import AuthToken
+from users.models import Member
+
+class Command(BaseCommand):
+    help = (
+        'Flood /api/auth/login/ with wrong-password attempts while timing core GET endpoints, '
+        'once with the auth throttles disabled and once enabled, and compare latencies. '
+        'Runs in-process against the configured database; creates and removes one throwaway member, '
+        'whose token authenticates the probes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=10.0, help='Duration of each run')
+        parser.add_argument('--flooders', type=int, default=16, help='Concurrent login flood threads')
+        parser.add_argument('--ips', type=int, default=4, help='Distinct client IPs used by the flood')
+        parser.add_argument('--rate', type=float, default=100.0, help='Total login attempts per second sent by the flood')
+        parser.add_argument('--probe-path', action='append', help='Core endpoint to time (repeatable)')
+
+    def handle(self, *args, **options):
+        paths = options['probe_path'] or ['/api/projects/', '/api/projects/clients/']
+        email = f'loadtest-{secrets.token_hex(4)}@example.invalid'
+        member = Member(name='Load Test', email=email, provider='email')
+        member.set_password(secrets.token_urlsafe(16))
+        member.save()
+        token = secrets.token_urlsafe(32)
+        AuthToken.objects.create(user=member, token=token, expires_at=timezone.now() + timedelta(hours=1))
+        try:
+            for enabled in (False, True):
+                with override_settings(AUTH_THROTTLE_ENABLED=enabled):
+                    throttling._store = None
+                    self._run(email, token, paths, options, 'throttled' if enabled else 'unthrottled')
+        finally:
+            Member.all_objects.filter(pk=member.pk).delete()
+
+    def _run(self, email, token, paths, options, label):
+        stop = threading.Event()
+        statuses = Counter()
+        probe_statuses = Counter()
+        ips = [f'10.99.0.{i + 1}' for i in range(options['ips'])]
+
+        interval = options['flooders'] / options['rate']
+
+        def flood(index):
+            # Open loop: each flooder sends at a fixed pace whether or not the server keeps up
+            client = Client(HTTP_HOST='localhost', REMOTE_ADDR=ips[index % len(ips)])
+            next_send = time.perf_counter()
+            while not stop.is_set():
+                response = client.post(
+                    '/api/auth/login/', {'email': email, 'password': 'wrong'}, content_type='application/json'
+                )
+                statuses[response.status_code] += 1
+                next_send += interval
+                stop.wait(max(0.0, next_send - time.perf_counter()))
+
+        threads = [threading.Thread(target=flood, args=(i,), daemon=True) for i in range(options['flooders'])]
+        for thread in threads:
+            thread.start()
+
+        probe = Client(HTTP_HOST='localhost', REMOTE_ADDR='10.99.1.1', HTTP_AUTHORIZATION=f'Bearer {token}')
+        timings = []
+        deadline = time.perf_counter() + options['seconds']
+        while time.perf_counter() < deadline:
+            for path in paths:
+                started = time.perf_counter()
+                probe_statuses[probe.get(path).status_code] += 1
+                timings.append(time.perf_counter() - started)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        timings.sort()
+        ms = lambda q: timings[min(len(timings) - 1, int(len(timings) * q))] * 1000
+        self.stdout.write(
+            f'{label:>11}: core p50 {statistics.median(timings) * 1000:7.1f} ms, p95 {ms(0.95):7.1f} ms, '
+            f'p99 {ms(0.99):7.1f} ms ({len(timings)} requests {dict(probe_statuses)}); '
+            f'flood responses {dict(statuses)}'
+        )
+        if set(probe_statuses) != {200}:
+            self.stderr.write(self.style.WARNING(f'{label}: some probes were not answered with 200'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from auth_app.tasks import purge_tokens, schedule_token_purge
+
+class Command(BaseCommand):
+    help = 'Delete logged-out and expired auth tokens in batches, or schedule the recurring purge job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Primary key range deleted per transaction')
+        parser.add_argument('--schedule', action='store_true', help='Queue the recurring purge job instead of purging now')
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            job = schedule_token_purge()
+            self.stdout.write(self.style.SUCCESS(f'Token purge job #{job.id} queued for {job.run_at:%Y-%m-%d %H:%M}.'))
+            return
+        result = purge_tokens(batch_size=options['batch_size'], reschedule=False)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {result['deleted']} auth tokens."))
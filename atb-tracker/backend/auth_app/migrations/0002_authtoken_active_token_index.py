@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0001_initial'),
+        ('users', '0004_member_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authtoken',
+            name='token',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='authtoken',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('token',), name='authtoken_active_token_uniq'),
+        ),
+    ]
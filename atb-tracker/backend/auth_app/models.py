@@ -1,17 +1,35 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from users.models import Member
 
 # Create your models here.
 
+class AuthTokenQuerySet(models.QuerySet):
+    def active(self):
+        """Tokens that can authenticate a request right now."""
+        return self.filter(is_active=True, expires_at__gt=timezone.now())
+
+    def purgeable(self):
+        """Logged-out or expired tokens, removed by the purge_auth_tokens command/job."""
+        return self.filter(Q(is_active=False) | Q(expires_at__lte=timezone.now()))
+
 class AuthToken(models.Model):
     user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='auth_tokens')
-    token = models.CharField(max_length=255, unique=True)
+    token = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_active = models.BooleanField(default=True)
 
+    objects = AuthTokenQuerySet.as_manager()
+
     def __str__(self):
         return f"Token for {self.user.email}"
 
     class Meta:
         db_table = 'auth_app_authtoken'
+        constraints = [
+            # Only active tokens are looked up, so only they need to be indexed. This keeps
+            # the index probed on every authenticated request small as history grows.
+            models.UniqueConstraint(fields=['token'], condition=Q(is_active=True), name='authtoken_active_token_uniq'),
+        ]
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.deletion import delete_in_id_ranges
+from jobs.models import Job
+from jobs.registry import enqueue, task
+from .models import AuthToken
+
+PURGE_TASK = 'auth_app.purge_tokens'
+PURGE_INTERVAL = timedelta(hours=getattr(settings, 'AUTH_TOKEN_PURGE_INTERVAL_HOURS', 24))
+
+
+def schedule_token_purge(run_at=None):
+    """Queue the next purge unless one is already waiting. Returns the queued Job."""
+    pending = Job.objects.filter(name=PURGE_TASK, state=Job.QUEUED).first()
+    if pending:
+        return pending
+    return enqueue(PURGE_TASK, priority=-10, run_at=run_at)
+
+
+@task(PURGE_TASK)
+def purge_tokens(batch_size=None, reschedule=True):
+    """Delete logged-out and expired tokens, then schedule the next run."""
+    deleted = delete_in_id_ranges(AuthToken.objects.purgeable(), batch_size=batch_size)
+    if reschedule:
+        schedule_token_purge(run_at=timezone.now() + PURGE_INTERVAL)
+    return {'deleted': deleted}
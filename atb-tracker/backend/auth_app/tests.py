@@ -1,3 +1,55 @@
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, override_settings
 
-# Create your tests here.
+from atb_tracker.testing import QueryPlanAssertions, capture_queries, seed_dataset
+from user_settings.views import get_user_from_token
+
+from . import throttling
+
+
+class TokenLookupQueryPlanTests(QueryPlanAssertions, TestCase):
+    """Every authenticated request looks its token up; it must stay an index probe."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = seed_dataset()[0]
+
+    def test_active_token_lookup(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer token-{self.member.id}')
+        with capture_queries() as captured:
+            self.assertEqual(get_user_from_token(request), self.member)
+        self.assertQueryPlan(captured, 'auth_app_authtoken', 'authtoken_active_token_uniq')
+
+
+@override_settings(AUTH_THROTTLE_STORE='memory', AUTH_THROTTLE_RATES={'auth_ip': '3/min', 'auth_email': '100/min'})
+class AuthIPThrottleTests(TestCase):
+    def setUp(self):
+        throttling._store = None
+        self.addCleanup(setattr, throttling, '_store', None)
+
+    def login(self, n, **headers):
+        return self.client.post(
+            '/api/auth/login/', {'email': f'nobody{n}@example.com', 'password': 'wrong'},
+            content_type='application/json', **headers,
+        ).status_code
+
+    def test_rotating_forwarded_for_shares_the_connection_bucket(self):
+        statuses = [self.login(n, HTTP_X_FORWARDED_FOR=f'10.0.0.{n}') for n in range(5)]
+        self.assertNotIn(429, statuses[:3])
+        self.assertEqual(statuses[3:], [429, 429])
+
+    @override_settings(AUTH_THROTTLE_NUM_PROXIES=1)
+    def test_trusted_proxy_address_is_taken_from_the_end_of_the_header(self):
+        factory = RequestFactory()
+        request = factory.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.9', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(throttling.client_ip(request), '203.0.113.9')
+        self.assertEqual(throttling.client_ip(factory.get('/', REMOTE_ADDR='10.0.0.1')), '10.0.0.1')
+
+    def test_memory_store_drops_least_recently_used_buckets(self):
+        store = throttling.MemoryBucketStore()
+        store.max_keys = 3
+        for key in 'abcd':
+            store.take(key, 1, 1 / 60, now=0)
+        store.take('b', 1, 1 / 60, now=1)
+        store.take('e', 1, 1 / 60, now=2)
+        self.assertEqual(list(store._buckets), ['d', 'b', 'e'])
+        self.assertGreater(store.take('b', 1, 1 / 60, now=3), 0)
@@ -0,0 +1,168 @@
+"""
+Token-bucket throttles for the CPU-expensive auth endpoints (login, register, google).
+
+Each client key (IP address or email) owns a bucket of ``capacity`` tokens that refills
+continuously at ``capacity / period``; a request takes one token or is rejected with 429.
+Buckets live in an in-process dict by default. With AUTH_THROTTLE_STORE = 'sqlite' they live
+in a small SQLite file shared by all worker processes on the host, updated with one UPSERT.
+
+Settings:
+    AUTH_THROTTLE_ENABLED   - turn throttling off entirely (default True)
+    AUTH_THROTTLE_RATES     - {'auth_ip': '30/min', 'auth_email': '10/min'}
+    AUTH_THROTTLE_STORE     - 'memory' (default) or 'sqlite'
+    AUTH_THROTTLE_SQLITE_PATH - bucket file for the sqlite store
+    AUTH_THROTTLE_NUM_PROXIES - trusted reverse proxies in front of the app (default 0: key
+                                on REMOTE_ADDR; see client_ip())
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_RATES = {'auth_ip': '30/min', 'auth_email': '10/min'}
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'30/min' -> (capacity 30, refill 0.5 tokens per second)."""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period]
+
+
+class MemoryBucketStore:
+    """
+    Buckets in an LRU-ordered dict guarded by one lock; a take is a few dict operations.
+    Past ``max_keys`` the least recently used buckets are dropped, one per new key: they
+    are the ones most likely to have refilled, and a full bucket is the same as none.
+    """
+    max_keys = 100_000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now=None):
+        """Take one token. Returns 0 if allowed, else the seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0 if allowed else (1 - tokens) / rate
+
+
+class SQLiteBucketStore:
+    """Buckets in a shared SQLite file, so limits hold across worker processes."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        conn = self._connection()
+        cursor = conn.execute(
+            """
+            INSERT INTO buckets (key, tokens, updated) VALUES (:key, :capacity - 1, :now)
+            ON CONFLICT(key) DO UPDATE SET
+                tokens = min(:capacity, tokens + (:now - updated) * :rate) - 1,
+                updated = :now
+            WHERE min(:capacity, tokens + (:now - updated) * :rate) >= 1
+            """,
+            {'key': key, 'capacity': capacity, 'rate': rate, 'now': now},
+        )
+        if cursor.rowcount:
+            return 0
+        row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+        tokens = min(capacity, row[0] + (now - row[1]) * rate) if row else 0
+        return max(0.0, (1 - tokens) / rate)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            if getattr(settings, 'AUTH_THROTTLE_STORE', 'memory') == 'sqlite':
+                path = getattr(settings, 'AUTH_THROTTLE_SQLITE_PATH', settings.BASE_DIR / 'throttle.sqlite3')
+                _store = SQLiteBucketStore(path)
+            else:
+                _store = MemoryBucketStore()
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if not getattr(settings, 'AUTH_THROTTLE_ENABLED', True):
+            return True
+        key = self.get_key(request)
+        if key is None:
+            return True
+        rates = {**DEFAULT_RATES, **getattr(settings, 'AUTH_THROTTLE_RATES', {})}
+        capacity, rate = parse_rate(rates[self.scope])
+        self._wait = get_store().take(f'{self.scope}:{key}', capacity, rate)
+        return self._wait == 0
+
+    def wait(self):
+        return self._wait
+
+
+def client_ip(request):
+    """
+    The connecting address, or with AUTH_THROTTLE_NUM_PROXIES = n the address the n-th
+    trusted proxy from the server saw, taken from the end of X-Forwarded-For. Earlier
+    entries are whatever the client sent, so they never choose the bucket.
+    """
+    num_proxies = getattr(settings, 'AUTH_THROTTLE_NUM_PROXIES', 0)
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if num_proxies and len(forwarded) >= num_proxies:
+        return forwarded[-num_proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    scope = 'auth_ip'
+
+    def get_key(self, request):
+        return client_ip(request)
+
+
+class AuthEmailThrottle(TokenBucketThrottle):
+    """Limits attempts per target account, however many IPs they come from."""
+    scope = 'auth_email'
+
+    def get_key(self, request):
+        try:
+            email = json.loads(request.body).get('email')
+        except (ValueError, AttributeError):
+            return None
+        return email.strip().lower() if isinstance(email, str) and email else None
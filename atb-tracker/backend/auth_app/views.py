@@ -1,6 +1,6 @@
 from django.shortcuts import render
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.utils import timezone
@@ -9,10 +9,13 @@ import secrets
 import json
 
 from users.models import Member
+from users.passwords import HashingBusy
 from .models import AuthToken
+from .throttling import AuthEmailThrottle, AuthIPThrottle
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthEmailThrottle])
 def google_auth(request):
     """
     Handle Google authentication for both signup and login
@@ -136,11 +139,7 @@ def verify_token(request):
             )
 
         try:
-            auth_token = AuthToken.objects.get(
-                token=token,
-                is_active=True,
-                expires_at__gt=timezone.now()
-            )
+            auth_token = AuthToken.objects.active().select_related('user').get(token=token)
             
             user_data = {
                 'id': auth_token.user.id,
@@ -191,9 +190,9 @@ def logout(request):
             )
 
         try:
-            auth_token = AuthToken.objects.get(token=token)
+            auth_token = AuthToken.objects.get(token=token, is_active=True)
             auth_token.is_active = False
-            auth_token.save()
+            auth_token.save(update_fields=['is_active'])
 
             return Response({
                 'message': 'Logged out successfully'
@@ -218,6 +217,7 @@ def logout(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthEmailThrottle])
 def register(request):
     """
     Register a new user with email and password
@@ -252,11 +252,14 @@ def register(request):
         }
 
         return Response({'user': user_data, 'token': token, 'message': 'Registration successful.'}, status=status.HTTP_201_CREATED)
+    except HashingBusy:
+        return Response({'error': 'Server busy, please retry.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthEmailThrottle])
 def login(request):
     """
     Login user with email and password
@@ -291,5 +294,7 @@ def login(request):
         }
 
         return Response({'user': user_data, 'token': token, 'message': 'Login successful.'}, status=status.HTTP_200_OK)
+    except HashingBusy:
+        return Response({'error': 'Server busy, please retry.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,64 @@
+"""
+Helpers for deleting large object graphs without holding the SQLite write lock.
+
+The parent row is first marked pending-delete (``deleted_at``), which hides it through
+``PendingDeleteManager``; a background job then removes its children in small batches,
+each in its own short transaction, and finally deletes the parent.
+"""
+import time
+
+from django.conf import settings
+from django.db import models, transaction
+
+BATCH_SIZE = getattr(settings, 'DELETION_BATCH_SIZE', 500)
+BATCH_PAUSE_SECONDS = getattr(settings, 'DELETION_BATCH_PAUSE_SECONDS', 0.01)
+
+
+class PendingDeleteManager(models.Manager):
+    """Default manager that hides rows waiting for background deletion."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+def delete_in_batches(queryset, batch_size=None, pause=None):
+    """
+    Delete every row of ``queryset`` in batches of ``batch_size`` primary keys, one short
+    transaction per batch, sleeping ``pause`` seconds in between so other writers can take
+    the lock. Returns the number of rows deleted.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    pause = BATCH_PAUSE_SECONDS if pause is None else pause
+    model = queryset.model
+    total = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            deleted, _ = model._base_manager.filter(pk__in=ids).delete()
+        total += deleted
+        if pause:
+            time.sleep(pause)
+
+
+def delete_in_id_ranges(queryset, batch_size=None, pause=None):
+    """
+    Delete the rows of ``queryset`` by walking the primary key in ranges of ``batch_size``.
+    Each range is one short transaction that touches at most ``batch_size`` rows, so purges
+    with a non-indexed condition cost one pass over the table instead of a scan per batch.
+    Returns the number of rows deleted.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    pause = BATCH_PAUSE_SECONDS if pause is None else pause
+    bounds = queryset.model._base_manager.aggregate(low=models.Min('pk'), high=models.Max('pk'))
+    if bounds['low'] is None:
+        return 0
+    total = 0
+    for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+        with transaction.atomic():
+            deleted, _ = queryset.filter(pk__gte=start, pk__lt=start + batch_size).delete()
+        total += deleted
+        if deleted and pause:
+            time.sleep(pause)
+    return total
@@ -0,0 +1,45 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from jobs.worker import run_next
+
+class Command(BaseCommand):
+    help = 'Run background job workers that claim and execute queued jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+
+        def loop(index):
+            worker_id = f'{prefix}:{index}'
+            processed = 0
+            while not stop.is_set():
+                if run_next(worker_id):
+                    processed += 1
+                elif options['once']:
+                    break
+                else:
+                    stop.wait(options['poll_interval'])
+            return processed
+
+        threads = options['threads']
+        self.stdout.write(f'Starting {threads} worker thread(s) as {prefix}')
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='job-worker') as pool:
+            futures = [pool.submit(loop, i) for i in range(threads)]
+            try:
+                while not all(f.done() for f in futures):
+                    time.sleep(0.5)
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping workers after their current job...')
+                stop.set()
+        total = sum(f.result() for f in futures)
+        self.stdout.write(self.style.SUCCESS(f'Processed {total} job(s).'))
@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)  # registered task name, see jobs.registry
+    payload = models.JSONField(default=dict, blank=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=QUEUED)
+    priority = models.IntegerField(default=0)  # higher runs first
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    # The member whose request enqueued the job; only they can see it through the API
+    owner = models.ForeignKey('users.Member', on_delete=models.SET_NULL, blank=True, null=True, related_name='jobs')
+    lease_token = models.CharField(max_length=64, blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.state})"
+
+    class Meta:
+        indexes = [
+            # Claim order: queued jobs that are due, highest priority first
+            models.Index(fields=['state', '-priority', 'run_at'], name='job_claim_idx'),
+            # Expired leases of crashed workers
+            models.Index(fields=['state', 'locked_until'], name='job_lease_idx'),
+        ]
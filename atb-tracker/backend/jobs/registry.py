@@ -0,0 +1,39 @@
+"""
+Task registry and enqueue helper.
+
+Register a function with ``@task('app.name')`` in an app's ``tasks.py``; it is called with
+the job's payload as keyword arguments and may return a JSON-serializable result.
+"""
+from django.utils import timezone
+
+_tasks = {}
+
+
+def task(name):
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _tasks.get(name)
+
+
+def enqueue(name, payload=None, priority=0, run_at=None, max_attempts=3, owner=None):
+    """
+    Create a queued job. Runs in the caller's transaction, so it is atomic with the caller's
+    writes. ``owner`` is the member who may poll the job at /api/jobs/<id>/.
+    """
+    from .models import Job
+
+    if name not in _tasks:
+        raise KeyError(f"Unknown task: {name}")
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+        owner=owner,
+    )
@@ -0,0 +1,7 @@
+from rest_framework import serializers
+from .models import Job
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'state', 'attempts', 'max_attempts', 'result', 'last_error', 'created_at', 'finished_at']
@@ -0,0 +1,148 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from auth_app.models import AuthToken
+from users.models import Member
+
+from . import worker
+from .models import Job
+from .registry import enqueue, task
+
+calls = []
+
+
+@task('jobs.test_record')
+def record(value=None):
+    calls.append(value)
+    return {'value': value}
+
+
+renewed = threading.Event()
+
+
+@task('jobs.test_wait_for_renewal')
+def wait_for_renewal():
+    return renewed.wait(5)
+
+
+@task('jobs.test_fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+class LeaseTests(TestCase):
+    def test_a_claimed_job_is_not_claimed_again_until_its_lease_expires(self):
+        job = enqueue('jobs.test_record')
+        claimed = worker.claim_job('w1')
+        self.assertEqual((claimed.pk, claimed.state, claimed.attempts, claimed.locked_by), (job.pk, Job.RUNNING, 1, 'w1'))
+        self.assertIsNone(worker.claim_job('w2'))
+
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = worker.claim_job('w2')
+        self.assertEqual((reclaimed.pk, reclaimed.attempts, reclaimed.locked_by), (job.pk, 2, 'w2'))
+
+        # The first worker lost the lease: it can neither renew it nor write an outcome
+        self.assertFalse(worker.renew_lease(claimed))
+        worker.run_job(claimed)
+        self.assertEqual(Job.objects.get(pk=job.pk).state, Job.RUNNING)
+
+    def test_an_expired_lease_on_the_last_attempt_fails_the_job(self):
+        job = enqueue('jobs.test_record', max_attempts=2)
+        for _ in range(2):
+            self.assertEqual(worker.claim_job('w1').pk, job.pk)
+            # The worker dies without writing an outcome
+            Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(worker.claim_job('w2'))
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts, job.lease_token), (Job.FAILED, 2, None))
+        self.assertIn('Lease expired', job.last_error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_renewing_keeps_a_long_job_from_being_reclaimed(self):
+        enqueue('jobs.test_record')
+        job = worker.claim_job('w1')
+        later = timezone.now() + timedelta(seconds=worker.LEASE_SECONDS - 1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertTrue(worker.renew_lease(job))
+        with mock.patch('django.utils.timezone.now', return_value=later + timedelta(seconds=2)):
+            self.assertIsNone(worker.claim_job('w2'))
+
+    def test_heartbeat_renews_while_the_task_runs(self):
+        renewed.clear()
+        enqueue('jobs.test_wait_for_renewal')
+        job = worker.claim_job('w1')
+        # The heartbeat thread cannot write to the test transaction, so renewal is stubbed
+        with mock.patch.object(worker, 'HEARTBEAT_SECONDS', 0), \
+                mock.patch.object(worker, 'renew_lease', side_effect=lambda job: renewed.set() or True) as renew:
+            worker.run_job(job)
+        renew.assert_called_with(job)
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.result), (Job.SUCCEEDED, True))
+
+
+class RunJobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_success_stores_the_result_and_releases_the_lease(self):
+        job = enqueue('jobs.test_record', {'value': 7})
+        self.assertTrue(worker.run_next('w1'))
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.result, job.lease_token, job.locked_until), (Job.SUCCEEDED, {'value': 7}, None, None))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(calls, [7])
+        self.assertFalse(worker.run_next('w1'))
+
+    def test_failures_are_retried_with_backoff_then_marked_failed(self):
+        job = enqueue('jobs.test_fail', max_attempts=2)
+        before = timezone.now()
+        worker.run_next('w1')
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=worker.RETRY_BACKOFF_SECONDS))
+        self.assertFalse(worker.run_next('w1'))  # not due yet
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        worker.run_next('w1')
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts, job.lease_token), (Job.FAILED, 2, None))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task_fails_without_retrying(self):
+        job = Job.objects.create(name='jobs.missing')
+        worker.run_next('w1')
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.last_error), (Job.FAILED, 'Unknown task: jobs.missing'))
+
+    def test_higher_priority_runs_first(self):
+        enqueue('jobs.test_record', {'value': 'low'}, priority=-1)
+        enqueue('jobs.test_record', {'value': 'high'}, priority=5)
+        while worker.run_next('w1'):
+            pass
+        self.assertEqual(calls, ['high', 'low'])
+
+
+class JobDetailViewTests(TestCase):
+    def setUp(self):
+        self.ada = Member.objects.create(name='Ada', email='ada@example.com')
+        self.bob = Member.objects.create(name='Bob', email='bob@example.com')
+        AuthToken.objects.create(user=self.ada, token='ada-token', expires_at=timezone.now() + timedelta(days=1))
+        self.client = APIClient()
+
+    def test_only_the_owner_can_poll_a_job(self):
+        own = enqueue('jobs.test_record', owner=self.ada)
+        other = enqueue('jobs.test_record', owner=self.bob)
+        system = enqueue('jobs.test_record')
+        self.assertEqual(self.client.get(f'/api/jobs/{own.pk}/').status_code, 403)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ada-token')
+        response = self.client.get(f'/api/jobs/{own.pk}/')
+        self.assertEqual((response.status_code, response.data['state']), (200, Job.QUEUED))
+        self.assertEqual(self.client.get(f'/api/jobs/{other.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/jobs/{system.pk}/').status_code, 404)
@@ -0,0 +1,9 @@
+from rest_framework import generics
+from users.ownership import OwnedQuerysetMixin
+from .models import Job
+from .serializers import JobSerializer
+
+class JobDetailView(OwnedQuerysetMixin, generics.RetrieveAPIView):
+    """Status of a background job, polled by the member who received a 202 with its id."""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
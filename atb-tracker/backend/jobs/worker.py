@@ -0,0 +1,151 @@
+"""
+Claiming and running jobs.
+
+A job is claimed with a single UPDATE that picks the best due candidate and stamps it
+with a random lease token, so two workers can never claim the same job. While the task
+runs, a heartbeat thread extends the lease every JOBS_HEARTBEAT_SECONDS, so a job that
+outlives JOBS_LEASE_SECONDS is not claimed a second time. A worker that dies stops
+renewing; once its lease expires the job can be claimed again, unless that was its last
+attempt: then it is marked failed, so a task that kills its worker is not retried forever.
+"""
+import logging
+import secrets
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = getattr(settings, 'JOBS_LEASE_SECONDS', 300)
+HEARTBEAT_SECONDS = getattr(settings, 'JOBS_HEARTBEAT_SECONDS', LEASE_SECONDS / 5)
+RETRY_BACKOFF_SECONDS = getattr(settings, 'JOBS_RETRY_BACKOFF_SECONDS', 30)
+
+
+def fail_abandoned(now=None):
+    """Mark jobs whose lease expired on their last attempt as failed. Returns how many."""
+    now = now or timezone.now()
+    return Job.objects.filter(state=Job.RUNNING, locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+        state=Job.FAILED,
+        last_error='Lease expired on the last attempt; the worker running it died or hung',
+        lease_token=None,
+        locked_by=None,
+        locked_until=None,
+        finished_at=now,
+        updated_at=now,
+    )
+
+
+def claim_job(worker_id):
+    """Claim the next due job for ``worker_id``. Returns the Job or None."""
+    now = timezone.now()
+    fail_abandoned(now)
+    due = (
+        Q(state=Job.QUEUED, run_at__lte=now)
+        | Q(state=Job.RUNNING, locked_until__lt=now, attempts__lt=F('max_attempts'))
+    )
+    candidate = Job.objects.filter(due).order_by('-priority', 'run_at', 'id').values('id')[:1]
+    token = secrets.token_hex(16)
+    claimed = Job.objects.filter(due, id__in=candidate).update(
+        state=Job.RUNNING,
+        lease_token=token,
+        locked_by=worker_id,
+        locked_until=now + timedelta(seconds=LEASE_SECONDS),
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    if not claimed:
+        return None
+    return Job.objects.get(lease_token=token)
+
+
+def renew_lease(job):
+    """Push ``job``'s lease LEASE_SECONDS into the future. False if another worker holds it now."""
+    now = timezone.now()
+    return bool(Job.objects.filter(pk=job.pk, lease_token=job.lease_token).update(
+        locked_until=now + timedelta(seconds=LEASE_SECONDS), updated_at=now,
+    ))
+
+
+class _Heartbeat(threading.Thread):
+    """Renews a job's lease until stopped; runs beside the task on its own connection."""
+
+    def __init__(self, job):
+        super().__init__(name=f'job-{job.pk}-heartbeat', daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(HEARTBEAT_SECONDS):
+                try:
+                    if not renew_lease(self.job):
+                        logger.warning("Job %s (%s) lost its lease", self.job.pk, self.job.name)
+                        return
+                except DatabaseError:
+                    # e.g. the task holds SQLite's write lock; the next beat retries
+                    logger.warning("Could not renew the lease of job %s", self.job.pk, exc_info=True)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _call(job, func):
+    heartbeat = _Heartbeat(job)
+    heartbeat.start()
+    try:
+        return func(**job.payload)
+    finally:
+        # Before the outcome is written, so no beat can find the lease already released
+        heartbeat.stop()
+
+
+def _finish(job, **fields):
+    """Write the outcome, unless the lease was lost to another worker meanwhile."""
+    fields['updated_at'] = timezone.now()
+    fields.setdefault('lease_token', None)
+    fields.setdefault('locked_by', None)
+    fields.setdefault('locked_until', None)
+    return Job.objects.filter(pk=job.pk, lease_token=job.lease_token).update(**fields)
+
+
+def run_job(job):
+    func = get_task(job.name)
+    if func is None:
+        _finish(job, state=Job.FAILED, last_error=f"Unknown task: {job.name}", finished_at=timezone.now())
+        return
+    try:
+        result = _call(job, func)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s", job.pk, job.name, job.attempts)
+        if job.attempts < job.max_attempts:
+            delay = RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+            _finish(job, state=Job.QUEUED, last_error=error, run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            _finish(job, state=Job.FAILED, last_error=error, finished_at=timezone.now())
+    else:
+        _finish(job, state=Job.SUCCEEDED, result=result, last_error=None, finished_at=timezone.now())
+
+
+def run_next(worker_id):
+    """Claim and run one job. Returns True if a job was run."""
+    close_old_connections()
+    try:
+        job = claim_job(worker_id)
+        if job is None:
+            return False
+        run_job(job)
+        return True
+    finally:
+        close_old_connections()
@@ -0,0 +1,145 @@
+"""
+Live pomodoro timer state for the Server-Sent Events stream.
+
+One TimerHub per process holds the latest snapshot of running/paused sessions. A single
+asyncio task refreshes it from the database every POMODORO_STREAM_POLL_SECONDS (so changes
+made by other worker processes arrive too), or immediately when a timer action in this
+process calls notify(). Every SSE connection is just a coroutine waiting on the hub's
+condition: no thread and no query per connection.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = getattr(settings, 'POMODORO_STREAM_POLL_SECONDS', 1.0)
+KEEPALIVE_SECONDS = getattr(settings, 'POMODORO_STREAM_KEEPALIVE_SECONDS', 15.0)
+
+
+def load_snapshot():
+    from .models import PomodoroSession
+
+    now = timezone.now()
+    sessions = PomodoroSession.objects.filter(
+        state__in=[PomodoroSession.RUNNING, PomodoroSession.PAUSED]
+    ).order_by('start_time')
+    return [
+        {
+            'id': s.id,
+            'owner': s.owner_id,
+            'state': s.state,
+            'start_time': s.start_time.isoformat(),
+            'end_time': s.end_time.isoformat(),
+            'remaining_seconds': s.remaining(now),
+            'duration': s.duration,
+            'break_duration': s.break_duration,
+            'cycles': s.cycles,
+            'notes': s.notes,
+        }
+        for s in sessions
+    ]
+
+
+def _fingerprint(snapshot):
+    # remaining_seconds of running timers changes every second without any state change
+    return [{k: v for k, v in s.items() if k != 'remaining_seconds' or s['state'] != 'running'} for s in snapshot]
+
+
+class TimerHub:
+    def __init__(self):
+        self.loop = None
+        self.version = 0
+        self.snapshot = []
+        self.by_owner = {}
+        self._fingerprint = None
+        self._changed = None
+        self._wake = None
+        self._poller = None
+        self.subscribers = 0
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self._changed = asyncio.Condition()
+            self._wake = asyncio.Event()
+            self._poller = loop.create_task(self._poll())
+
+    async def _poll(self):
+        while True:
+            snapshot = None
+            if self.subscribers:
+                try:
+                    snapshot = await sync_to_async(load_snapshot)()
+                except Exception:
+                    # Subscribers keep the last snapshot; the next poll tries again
+                    logger.exception("Could not load the pomodoro timer snapshot")
+            if snapshot is not None:
+                fingerprint = _fingerprint(snapshot)
+                if fingerprint != self._fingerprint:
+                    self._fingerprint = fingerprint
+                    self._set_snapshot(snapshot)
+                    async with self._changed:
+                        self._changed.notify_all()
+            try:
+                await asyncio.wait_for(self._wake.wait(), POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _set_snapshot(self, snapshot):
+        by_owner = {}
+        for session in snapshot:
+            by_owner.setdefault(session['owner'], []).append(session)
+        self.snapshot = snapshot
+        self.by_owner = by_owner
+        self.version += 1
+
+    def notify(self):
+        """Refresh now. Safe to call from sync code in any thread of this process."""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._wake.set)
+
+    async def _wait_for_change(self, seen):
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self.version != seen), KEEPALIVE_SECONDS)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    async def events(self, owner_id):
+        """Async iterator of SSE frames for one member: their current state, then every change."""
+        self._start()
+        stale = not self.subscribers
+        self.subscribers += 1
+        seen = None
+        sent = None
+        try:
+            if stale:
+                # Nobody was watching, so the poller has not refreshed the snapshot
+                snapshot = await sync_to_async(load_snapshot)()
+                self._fingerprint = _fingerprint(snapshot)
+                self._set_snapshot(snapshot)
+            yield 'retry: 3000\n\n'
+            while True:
+                if seen != self.version:
+                    seen = self.version
+                    sessions = self.by_owner.get(owner_id, [])
+                    # Other members' changes bump the version too; only send when ours differ
+                    if sessions != sent:
+                        sent = sessions
+                        data = json.dumps({'server_time': timezone.now().isoformat(), 'sessions': sessions})
+                        yield f'id: {seen}\nevent: state\ndata: {data}\n\n'
+                if not await self._wait_for_change(seen):
+                    yield ': keep-alive\n\n'
+        finally:
+            self.subscribers -= 1
+
+
+hub = TimerHub()
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pomodoro', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pomodorosession',
+            name='remaining_seconds',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pomodorosession',
+            name='state',
+            field=models.CharField(choices=[('running', 'Running'), ('paused', 'Paused'), ('completed', 'Completed')], default='completed', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='pomodorosession',
+            index=models.Index(fields=['state'], name='pomodoro_state_idx'),
+        ),
+    ]
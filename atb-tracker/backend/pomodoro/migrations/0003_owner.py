@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pomodoro', '0002_pomodorosession_state'),
+        ('users', '0004_member_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pomodorosession',
+            name='owner',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pomodoro_sessions', to='users.member'),
+        ),
+        migrations.AddIndex(
+            model_name='pomodorosession',
+            index=models.Index(fields=['owner', 'start_time'], name='pomodoro_owner_start_idx'),
+        ),
+    ]
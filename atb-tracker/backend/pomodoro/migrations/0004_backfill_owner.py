@@ -0,0 +1,31 @@
+from django.db import migrations, transaction
+from django.db.models import Max
+
+BATCH_SIZE = 1000
+
+
+def forwards(apps, schema_editor):
+    Member = apps.get_model('users', 'Member')
+    PomodoroSession = apps.get_model('pomodoro', 'PomodoroSession')
+    # Sessions recorded before ownership existed belong to the first account, as in projects 0013
+    first = Member.objects.filter(deleted_at__isnull=True).order_by('pk').values_list('pk', flat=True).first()
+    if first is None:
+        return
+    high = PomodoroSession.objects.aggregate(high=Max('pk'))['high'] or 0
+    for start in range(0, high + 1, BATCH_SIZE):
+        with transaction.atomic():
+            PomodoroSession.objects.filter(
+                pk__gte=start, pk__lt=start + BATCH_SIZE, owner__isnull=True
+            ).update(owner_id=first)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('pomodoro', '0003_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
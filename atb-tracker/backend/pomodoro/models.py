@@ -1,14 +1,63 @@
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
 
 class PomodoroSession(models.Model):
+    RUNNING = 'running'
+    PAUSED = 'paused'
+    COMPLETED = 'completed'
+    STATE_CHOICES = [
+        (RUNNING, 'Running'),
+        (PAUSED, 'Paused'),
+        (COMPLETED, 'Completed'),
+    ]
+
     start_time = models.DateTimeField()
-    end_time = models.DateTimeField()
+    end_time = models.DateTimeField()  # planned end while running
     duration = models.IntegerField()  # in minutes
     break_duration = models.IntegerField(default=0)  # in minutes
     cycles = models.IntegerField(default=1)
     notes = models.TextField(blank=True, null=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=COMPLETED)
+    remaining_seconds = models.IntegerField(blank=True, null=True)  # frozen countdown while paused
+    # Indexed by pomodoro_owner_start_idx below
+    owner = models.ForeignKey(
+        'users.Member', on_delete=models.CASCADE, blank=True, null=True, related_name='pomodoro_sessions', db_index=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Pomodoro: {self.start_time} - {self.end_time} ({self.duration} min, {self.cycles} cycles)" 
\ No newline at end of file
+        return f"Pomodoro: {self.start_time} - {self.end_time} ({self.duration} min, {self.cycles} cycles)"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state'], name='pomodoro_state_idx'),
+            models.Index(fields=['owner', 'start_time'], name='pomodoro_owner_start_idx'),
+        ]
+
+    def remaining(self, now=None):
+        """Seconds left on the countdown."""
+        if self.state == self.PAUSED:
+            return self.remaining_seconds or 0
+        if self.state == self.COMPLETED:
+            return 0
+        now = now or timezone.now()
+        return max(0, int((self.end_time - now).total_seconds()))
+
+    def pause(self):
+        self.remaining_seconds = self.remaining()
+        self.state = self.PAUSED
+
+    def resume(self):
+        self.end_time = timezone.now() + timedelta(seconds=self.remaining_seconds or 0)
+        self.remaining_seconds = None
+        self.state = self.RUNNING
+
+    def complete(self):
+        now = timezone.now()
+        if self.end_time > now:
+            self.end_time = now
+        self.remaining_seconds = None
+        self.state = self.COMPLETED
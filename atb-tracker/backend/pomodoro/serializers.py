@@ -4,4 +4,9 @@ from .models import PomodoroSession
 class PomodoroSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = PomodoroSession
-        fields = '__all__' 
\ No newline at end of file
+        fields = [
+            'id', 'start_time', 'end_time', 'duration', 'break_duration', 'cycles', 'notes',
+            'state', 'remaining_seconds', 'owner', 'created_at', 'updated_at',
+        ]
+        # The owner comes from the token; the timer state only changes through start/pause/resume/complete
+        read_only_fields = ['state', 'remaining_seconds', 'owner']
@@ -1,3 +1,100 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here. 
\ No newline at end of file
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from atb_tracker.testing import QueryPlanAssertions, capture_queries, seed_dataset
+from auth_app.models import AuthToken
+from users.models import Member
+
+from . import live
+from .models import PomodoroSession
+
+
+class PomodoroQueryPlanTests(QueryPlanAssertions, TestCase):
+    """Pomodoro lists and date-range charts stay on the owner/start index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = seed_dataset()[2]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer token-{self.member.id}')
+
+    def get(self, path):
+        with capture_queries() as captured:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return captured
+
+    def test_session_list(self):
+        captured = self.get('/api/pomodoros/')
+        self.assertQueryPlan(captured, 'pomodoro_pomodorosession', 'pomodoro_owner_start_idx')
+
+    def test_session_time_series(self):
+        captured = self.get('/api/projects/reports/timeseries/?source=pomodoros&bucket=day&start=2024-02-01&end=2024-02-29')
+        self.assertQueryPlan(captured, 'pomodoro_pomodorosession', 'pomodoro_owner_start_idx')
+
+
+class PomodoroSessionWriteTests(TestCase):
+    """Session edits cannot change the owner or step around the timer actions."""
+
+    def setUp(self):
+        self.ada = Member.objects.create(name='Ada', email='ada@example.com')
+        self.bob = Member.objects.create(name='Bob', email='bob@example.com')
+        AuthToken.objects.create(user=self.ada, token='ada-token', expires_at=timezone.now() + timedelta(days=1))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ada-token')
+
+    def test_owner_state_and_remaining_seconds_are_read_only(self):
+        response = self.client.post('/api/pomodoros/start/', {'duration': 25}, format='json')
+        self.assertEqual(response.status_code, 201)
+        pk = response.data['id']
+        response = self.client.patch(
+            f'/api/pomodoros/{pk}/',
+            {'owner': self.bob.pk, 'state': 'paused', 'remaining_seconds': 5, 'notes': 'focus'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        session = PomodoroSession.objects.get(pk=pk)
+        self.assertEqual(
+            (session.owner, session.state, session.remaining_seconds, session.notes),
+            (self.ada, PomodoroSession.RUNNING, None, 'focus'),
+        )
+        self.assertEqual(self.client.post(f'/api/pomodoros/{pk}/resume/').status_code, 409)
+
+    def test_created_sessions_belong_to_the_caller(self):
+        now = timezone.now()
+        response = self.client.post('/api/pomodoros/', {
+            'start_time': now, 'end_time': now + timedelta(minutes=25), 'duration': 25, 'owner': self.bob.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['owner'], self.ada.pk)
+
+
+class TimerHubPollTests(SimpleTestCase):
+    def test_snapshot_failures_are_logged_and_polling_continues(self):
+        calls = []
+
+        def load_snapshot():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('database is locked')
+            return []
+
+        async def run():
+            hub = live.TimerHub()
+            hub.subscribers = 1
+            hub._start()
+            while len(calls) < 2:
+                await asyncio.sleep(0.01)
+            hub._poller.cancel()
+
+        with mock.patch.object(live, 'load_snapshot', load_snapshot), mock.patch.object(live, 'POLL_SECONDS', 0.01), \
+                self.assertLogs('pomodoro.live', 'ERROR') as logs:
+            asyncio.run(asyncio.wait_for(run(), 5))
+        self.assertIn('database is locked', logs.output[0])
@@ -1,7 +1,15 @@
 from django.urls import path
-from .views import PomodoroSessionListCreateView, PomodoroSessionRetrieveUpdateDestroyView
+from .views import (
+    PomodoroSessionListCreateView, PomodoroSessionRetrieveUpdateDestroyView,
+    start_pomodoro, pause_pomodoro, resume_pomodoro, complete_pomodoro, pomodoro_stream,
+)
 
 urlpatterns = [
     path('pomodoros/', PomodoroSessionListCreateView.as_view(), name='pomodoro-list-create'),
+    path('pomodoros/start/', start_pomodoro, name='pomodoro-start'),
+    path('pomodoros/stream/', pomodoro_stream, name='pomodoro-stream'),
     path('pomodoros/<int:pk>/', PomodoroSessionRetrieveUpdateDestroyView.as_view(), name='pomodoro-detail'),
-] 
\ No newline at end of file
+    path('pomodoros/<int:pk>/pause/', pause_pomodoro, name='pomodoro-pause'),
+    path('pomodoros/<int:pk>/resume/', resume_pomodoro, name='pomodoro-resume'),
+    path('pomodoros/<int:pk>/complete/', complete_pomodoro, name='pomodoro-complete'),
+]
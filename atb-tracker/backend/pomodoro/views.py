@@ -1,11 +1,94 @@
-from rest_framework import generics
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from asgiref.sync import sync_to_async
+from user_settings.views import TokenAuthenticationPermission, get_user_from_token
+from users.ownership import OwnedQuerysetMixin
+from .live import hub
 from .models import PomodoroSession
 from .serializers import PomodoroSessionSerializer
 
-class PomodoroSessionListCreateView(generics.ListCreateAPIView):
+class PomodoroSessionListCreateView(OwnedQuerysetMixin, generics.ListCreateAPIView):
     queryset = PomodoroSession.objects.all()
     serializer_class = PomodoroSessionSerializer
 
-class PomodoroSessionRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        transaction.on_commit(hub.notify)
+
+class PomodoroSessionRetrieveUpdateDestroyView(OwnedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = PomodoroSession.objects.all()
-    serializer_class = PomodoroSessionSerializer 
\ No newline at end of file
+    serializer_class = PomodoroSessionSerializer
+
+    def perform_update(self, serializer):
+        serializer.save()
+        transaction.on_commit(hub.notify)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        transaction.on_commit(hub.notify)
+
+
+@api_view(['POST'])
+@permission_classes([TokenAuthenticationPermission])
+def start_pomodoro(request):
+    """Start a running session; the countdown is kept on the server from now on."""
+    now = timezone.now()
+    serializer = PomodoroSessionSerializer(data={**request.data, 'start_time': now, 'end_time': now})
+    serializer.is_valid(raise_exception=True)
+    session = serializer.save(
+        owner=get_user_from_token(request),
+        start_time=now,
+        end_time=now + timedelta(minutes=serializer.validated_data['duration']),
+        state=PomodoroSession.RUNNING,
+        remaining_seconds=None,
+    )
+    transaction.on_commit(hub.notify)
+    return Response(PomodoroSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+def _timer_action(action, allowed_states):
+    @api_view(['POST'])
+    @permission_classes([TokenAuthenticationPermission])
+    def view(request, pk):
+        with transaction.atomic():
+            sessions = PomodoroSession.objects.select_for_update().filter(owner=get_user_from_token(request))
+            session = get_object_or_404(sessions, pk=pk)
+            if session.state not in allowed_states:
+                return Response(
+                    {'error': f'Cannot {action} a {session.state} session'}, status=status.HTTP_409_CONFLICT
+                )
+            getattr(session, action)()
+            session.save()
+            transaction.on_commit(hub.notify)
+        return Response(PomodoroSessionSerializer(session).data)
+    view.__name__ = f'{action}_pomodoro'
+    return view
+
+
+pause_pomodoro = _timer_action('pause', [PomodoroSession.RUNNING])
+resume_pomodoro = _timer_action('resume', [PomodoroSession.PAUSED])
+complete_pomodoro = _timer_action('complete', [PomodoroSession.RUNNING, PomodoroSession.PAUSED])
+
+
+async def pomodoro_stream(request):
+    """
+    Server-Sent Events stream of the caller's running and paused sessions. Each ``state``
+    event carries the full list plus server_time, so clients can compute the countdown from
+    end_time without drifting. EventSource cannot send headers, so the bearer token may also
+    be given as ``?token=``. Serve under ASGI: under WSGI every open stream pins a worker thread.
+    """
+    if 'token' in request.GET and 'HTTP_AUTHORIZATION' not in request.META:
+        request.META['HTTP_AUTHORIZATION'] = f"Bearer {request.GET['token']}"
+    user = await sync_to_async(get_user_from_token)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+    response = StreamingHttpResponse(hub.events(user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,241 @@
+"""
+Vectorized report analytics over a member's time entries: duration percentiles, rolling
+7-day averages and per-weekday distributions.
+
+Each member's entries are loaded once into NumPy column arrays (day, project id,
+duration, billable, type), reading ANALYTICS_CHUNK_SIZE rows at a time, and kept in a
+small per-process LRU of datasets. A dataset is tied to its member's version counter,
+which entry updates and deletes bump (see signals.py). New entries only append: each
+request fetches rows with an id above the dataset's last id and extends the arrays.
+When a columnar snapshot is published (see snapshot.py), a dataset starts from the
+owner's mmapped columns instead of reading every row back from the database; otherwise it
+starts from the owner's archived entries (see archive.py). Entries of projects pending
+deletion are left out: deleting a project bumps the version, and a reloaded dataset drops
+the snapshot and archive rows of projects that are no longer live.
+
+NumPy is an optional dependency. Without it, ``available()`` is False and the analytics
+endpoint answers 503.
+"""
+import threading
+import time as time_module
+from collections import OrderedDict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see available()
+    np = None
+
+CHUNK_SIZE = getattr(settings, 'ANALYTICS_CHUNK_SIZE', 100_000)
+MAX_DATASETS = getattr(settings, 'ANALYTICS_MAX_DATASETS', 8)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+TYPES = {'regular': 0, 'pomodoro': 1}
+FIELDS = ('id', 'date', 'project_id', 'duration', 'billable', 'type')
+
+
+def available():
+    return np is not None
+
+
+def version_key(owner_id):
+    return f'projects:analytics:version:{owner_id}'
+
+
+def bump_version(owner_id):
+    """Entries were changed or removed, not just added: the next query reloads the dataset."""
+    try:
+        cache.incr(version_key(owner_id))
+    except ValueError:
+        cache.add(version_key(owner_id), time_module.time_ns())
+
+
+def current_version(owner_id):
+    key = version_key(owner_id)
+    cache.add(key, time_module.time_ns())
+    return cache.get(key)
+
+
+def _arrays(rows):
+    """Column arrays of (id, date, project_id, duration, billable, type) rows."""
+    ids, dates, projects, durations, billables, types = zip(*rows)
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(dates, dtype='datetime64[D]').astype(np.int32),
+        np.array(projects, dtype=np.int32),
+        np.array(durations, dtype=np.int32),
+        np.array(billables, dtype=bool),
+        np.array([TYPES.get(t, 0) for t in types], dtype=np.int8),
+    )
+
+
+class Dataset:
+    """Column arrays for one member's entries. ``day`` counts days since 1970-01-01."""
+
+    def __init__(self, owner_id, version):
+        self.owner_id = owner_id
+        self.version = version
+        self.last_id = 0
+        self.id = np.empty(0, dtype=np.int64)
+        self.day = np.empty(0, dtype=np.int32)
+        self.project = np.empty(0, dtype=np.int32)
+        self.duration = np.empty(0, dtype=np.int32)
+        self.billable = np.empty(0, dtype=bool)
+        self.type = np.empty(0, dtype=np.int8)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.id)
+
+    def append_new(self, using='default'):
+        """Load entries with an id above ``last_id``, CHUNK_SIZE rows per query. Returns the row count."""
+        from .models import TimeEntry
+
+        chunks = []
+        while True:
+            rows = list(
+                TimeEntry.objects.using(using).live()
+                .filter(owner_id=self.owner_id, id__gt=self.last_id)
+                .order_by('id')
+                .values_list(*FIELDS)[:CHUNK_SIZE]
+            )
+            if rows:
+                chunks.append(_arrays(rows))
+                self.last_id = int(rows[-1][0])
+            if len(rows) < CHUNK_SIZE:
+                break
+        self._extend(chunks)
+        return sum(len(chunk[0]) for chunk in chunks)
+
+    def _extend(self, chunks):
+        if chunks:
+            # One concatenation per column, however many chunks were read
+            columns = ('id', 'day', 'project', 'duration', 'billable', 'type')
+            for index, name in enumerate(columns):
+                setattr(self, name, np.concatenate([getattr(self, name)] + [chunk[index] for chunk in chunks]))
+
+    def load_archive(self):
+        """Add the member's archived entries (see archive.py), which append_new never reads."""
+        from . import archive
+
+        rows = [tuple(record[field] for field in FIELDS) for record in archive.records(self.owner_id)]
+        if rows:
+            self._extend([_arrays(rows)])
+
+    def drop_dead_projects(self, using='default'):
+        """Remove the rows of projects deleted or pending deletion since they were loaded."""
+        from .models import Project
+
+        if not len(self):
+            return
+        present = np.unique(self.project).tolist()
+        live = np.array(Project.objects.using(using).filter(pk__in=present).values_list('pk', flat=True), dtype=np.int32)
+        keep = np.isin(self.project, live)
+        if not keep.all():
+            for name in ('id', 'day', 'project', 'duration', 'billable', 'type'):
+                setattr(self, name, getattr(self, name)[keep])
+
+    def load_snapshot(self):
+        """Start from the published columnar snapshot, if any. Returns whether one was used."""
+        from . import snapshot
+
+        published = snapshot.open_snapshot()
+        if published is None:
+            return False
+        rows = published.rows('entries', self.owner_id)
+        max_id = published.max_id('entries')
+        newer = rows['id'] > max_id
+        if newer.any():
+            # Logged inserts; append_new reads those from the database like any new entry
+            rows = {name: column[~newer] for name, column in rows.items()}
+        self.id, self.day, self.project = rows['id'], rows['day'], rows['project']
+        self.duration, self.billable = rows['duration'], rows['billable']
+        self.type = rows['pomodoro'].view(np.int8)
+        self.last_id = max_id
+        return True
+
+    def mask(self, start=None, end=None, project=None, billable=None, entry_type=None):
+        """Boolean row filter; start and end are inclusive dates."""
+        selected = np.ones(len(self), dtype=bool)
+        if start is not None:
+            selected &= self.day >= start.toordinal() - EPOCH_ORDINAL
+        if end is not None:
+            selected &= self.day <= end.toordinal() - EPOCH_ORDINAL
+        if project is not None:
+            selected &= self.project == project
+        if billable is not None:
+            selected &= self.billable == billable
+        if entry_type is not None:
+            selected &= self.type == TYPES[entry_type]
+        return selected
+
+
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+
+
+def get_dataset(owner_id, using='default'):
+    """The member's dataset, reloaded if its version moved on and topped up with new entries."""
+    version = current_version(owner_id)
+    with _datasets_lock:
+        dataset = _datasets.get(owner_id)
+        if dataset is None or dataset.version != version:
+            dataset = Dataset(owner_id, version)
+            # Snapshots and archives belong to the default database; snapshots include the
+            # archived entries
+            if using == 'default' and not dataset.load_snapshot():
+                dataset.load_archive()
+            dataset.drop_dead_projects(using)
+            _datasets[owner_id] = dataset
+        _datasets.move_to_end(owner_id)
+        while len(_datasets) > MAX_DATASETS:
+            _datasets.popitem(last=False)
+    with dataset.lock:
+        dataset.append_new(using)
+    return dataset
+
+
+def duration_percentiles(dataset, selected, percentiles=(50, 75, 90, 95, 99)):
+    durations = dataset.duration[selected]
+    if not len(durations):
+        return {'count': 0, 'mean': None, 'percentiles': {str(p): None for p in percentiles}}
+    values = np.percentile(durations, percentiles)
+    return {
+        'count': int(len(durations)),
+        'mean': round(float(durations.mean()), 2),
+        'percentiles': {str(p): round(float(v), 2) for p, v in zip(percentiles, values)},
+    }
+
+
+def rolling_average(dataset, selected, start, end, window=7):
+    """Minutes per day from start to end with the trailing ``window``-day average of each day."""
+    first = start.toordinal() - EPOCH_ORDINAL
+    days = end.toordinal() - start.toordinal() + 1
+    # Include the window before start so the first averages are complete
+    lead = window - 1
+    in_range = selected & (dataset.day >= first - lead) & (dataset.day <= first + days - 1)
+    totals = np.bincount(
+        dataset.day[in_range] - (first - lead), weights=dataset.duration[in_range], minlength=days + lead
+    )
+    averages = np.convolve(totals, np.ones(window) / window, mode='valid')
+    return [
+        {'date': date.fromordinal(start.toordinal() + i).isoformat(),
+         'minutes': int(totals[lead + i]), 'average': round(float(averages[i]), 2)}
+        for i in range(days)
+    ]
+
+
+def weekday_distribution(dataset, selected):
+    """Entries, minutes and mean duration per weekday, Monday first."""
+    # 1970-01-01 was a Thursday
+    weekdays = (dataset.day[selected] + 3) % 7
+    counts = np.bincount(weekdays, minlength=7)
+    minutes = np.bincount(weekdays, weights=dataset.duration[selected], minlength=7)
+    names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    return [
+        {'weekday': names[i], 'count': int(counts[i]), 'minutes': int(minutes[i]),
+         'mean_duration': round(float(minutes[i] / counts[i]), 2) if counts[i] else None}
+        for i in range(7)
+    ]
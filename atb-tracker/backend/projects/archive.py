@@ -0,0 +1,339 @@
+"""
+Cold-data archival of old time entries.
+
+``archive_time_entries`` moves each member's entries of a month older than
+TIME_ENTRY_ARCHIVE_AFTER_MONTHS out of TimeEntry into one compressed NDJSON partition
+under TIME_ENTRY_ARCHIVE_DIR: zstd when the zstandard package is installed, gzip
+otherwise. An ArchivedMonth row names the partition, and its ArchivedMonthTotal rows hold
+the month's minutes and entry counts per project and billable flag, so rollups (project
+counters and their reconciliation, the billing report, tag totals, monthly time series)
+read those instead of the file. Entries dated in an archived month after it was archived
+are merged into its partition by the next run.
+
+Entries are moved without model signals: project counters, columnar snapshots and
+analytics already count them and keep doing so. Reads asking for archived dates (entry
+lists with a date range, the calendar, day and week time series) get the partition's rows
+merged with the hot ones; decoded partitions are kept in a small per-process LRU.
+Archived entries are read-only and not in the search index; they go with their project
+or member. ``archive_time_entries --restore`` moves a month back.
+"""
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.models import CharField, Count
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, partitions are gzipped without it
+    zstandard = None
+
+ARCHIVE_DIR = Path(getattr(settings, 'TIME_ENTRY_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive'))
+AFTER_MONTHS = getattr(settings, 'TIME_ENTRY_ARCHIVE_AFTER_MONTHS', 18)
+CACHE_SIZE = getattr(settings, 'TIME_ENTRY_ARCHIVE_CACHE_SIZE', 64)
+BATCH_SIZE = 500
+
+
+def _next_month(month):
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def cutoff(after_months=AFTER_MONTHS, today=None):
+    """First day of the oldest month kept in TimeEntry; entries dated before it are archived."""
+    today = today or timezone.localdate()
+    index = today.year * 12 + today.month - 1 - after_months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _fields():
+    from .models import TimeEntry
+
+    # attname -> field, in column order
+    return {field.attname: field for field in TimeEntry._meta.concrete_fields}
+
+
+def _order(record):
+    return record['date'], record['start_time'], record['id']
+
+
+# --- Partition files ---
+
+def _compress(data):
+    if zstandard is not None:
+        return '.zst', zstandard.ZstdCompressor(level=10, write_checksum=True).compress(data)
+    return '.gz', gzip.compress(data, compresslevel=9)
+
+
+def _decompress(name, data):
+    if name.endswith('.gz'):
+        return gzip.decompress(data)
+    if zstandard is None:
+        raise ImproperlyConfigured(f'{name} is zstd-compressed; reading it needs the zstandard package')
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _encode(records):
+    # isoformat() keeps microseconds and offsets, which DjangoJSONEncoder would cut
+    return ''.join(
+        json.dumps(record, default=lambda value: value.isoformat(), separators=(',', ':')) + '\n'
+        for record in records
+    ).encode()
+
+
+def _write_partition(owner_id, month, records):
+    """Write ``records`` to a new partition file and check it reads back. Returns (name, size)."""
+    body = _encode(records)
+    suffix, data = _compress(body)
+    # A new name for every write: readers of the partition being replaced keep their file
+    name = f"entries/{owner_id}/{month:%Y-%m}.{timezone.now():%Y%m%dT%H%M%S%f}.ndjson{suffix}"
+    path = ARCHIVE_DIR / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    # The entries are deleted from the database on the strength of this file
+    if _decompress(name, path.read_bytes()) != body:
+        path.unlink()
+        raise OSError(f'Archive partition {name} does not read back as written')
+    return name, len(data)
+
+
+def remove_partition(name):
+    (ARCHIVE_DIR / name).unlink(missing_ok=True)
+
+
+def _load(name):
+    fields = _fields()
+    text = _decompress(name, (ARCHIVE_DIR / name).read_bytes()).decode()
+    return [
+        {attname: fields[attname].to_python(value) for attname, value in json.loads(line).items()}
+        for line in text.splitlines() if line
+    ]
+
+
+_partitions = OrderedDict()
+_partitions_lock = threading.Lock()
+
+
+def read_partition(archive, cached=True):
+    """Every record of ``archive``'s partition: dicts keyed by TimeEntry attnames. Do not modify them."""
+    with _partitions_lock:
+        if archive.file in _partitions:
+            _partitions.move_to_end(archive.file)
+            return _partitions[archive.file]
+    try:
+        records = _load(archive.file)
+    except FileNotFoundError:
+        # Replaced by a later run since the row was read; the row now names its successor
+        archive.refresh_from_db(fields=['file'])
+        records = _load(archive.file)
+    if cached:
+        with _partitions_lock:
+            _partitions[archive.file] = records
+            while len(_partitions) > CACHE_SIZE:
+                _partitions.popitem(last=False)
+    return records
+
+
+# --- Reading ---
+
+def archived_months(owner_id, first=None, last=None):
+    """``owner_id``'s ArchivedMonth rows holding dates in first..last (inclusive, either may be None)."""
+    from .models import ArchivedMonth
+
+    months = ArchivedMonth.objects.filter(owner_id=owner_id)
+    if first is not None:
+        months = months.filter(month__gte=first.replace(day=1))
+    if last is not None:
+        months = months.filter(month__lte=last)
+    return months.order_by('month')
+
+
+def _live_projects(archives):
+    """{archive id: project ids}; records of projects deleted (or pending deletion) since archival are skipped."""
+    from .models import ArchivedMonthTotal
+
+    live = {}
+    rows = ArchivedMonthTotal.objects.filter(
+        archive__in=archives, project__deleted_at__isnull=True
+    ).values_list('archive_id', 'project_id')
+    for archive_id, project_id in rows:
+        live.setdefault(archive_id, set()).add(project_id)
+    return live
+
+
+def records(owner_id, first=None, last=None):
+    """Archived entry records of ``owner_id`` dated first..last, ordered by date and start time."""
+    if owner_id is None:
+        return []
+    archives = list(archived_months(owner_id, first, last))
+    live = _live_projects(archives)
+    result = []
+    for archive in archives:
+        projects = live.get(archive.id, set())
+        result += [
+            record for record in read_partition(archive)
+            if record['project_id'] in projects
+            and (first is None or record['date'] >= first) and (last is None or record['date'] <= last)
+        ]
+    return result
+
+
+def _instance(record):
+    from .models import TimeEntry
+
+    names = list(_fields())
+    return TimeEntry.from_db(TimeEntry.objects.db, names, [record[name] for name in names])
+
+
+def entries(owner_id, first=None, last=None):
+    """Like records(), as TimeEntry instances: read-only copies, never to be saved."""
+    return [_instance(record) for record in records(owner_id, first, last)]
+
+
+def _month_entries(archive):
+    projects = _live_projects([archive]).get(archive.id, set())
+    return [_instance(record) for record in read_partition(archive, cached=False) if record['project_id'] in projects]
+
+
+def iter_entries():
+    """Every archived entry as a TimeEntry instance, ordered by owner; for snapshot builds."""
+    from .models import ArchivedMonth
+
+    for archive in ArchivedMonth.objects.order_by('owner_id', 'month').iterator():
+        yield from _month_entries(archive)
+
+
+# --- Archiving ---
+
+def pending_months(before, owner_id=None):
+    """[(owner id, first day of month, entries)] for hot entries dated before ``before``."""
+    from .models import TimeEntry
+
+    entries = TimeEntry.objects.filter(date__lt=before, owner__isnull=False)
+    if owner_id is not None:
+        entries = entries.filter(owner_id=owner_id)
+    rows = (
+        entries.annotate(month=Substr(Cast('date', CharField()), 1, 7))
+        .values('owner_id', 'month')
+        .annotate(count=Count('id'))
+        .order_by('owner_id', 'month')
+    )
+    return [(row['owner_id'], date(int(row['month'][:4]), int(row['month'][5:7]), 1), row['count']) for row in rows]
+
+
+def _totals(archive, records):
+    from .models import ArchivedMonthTotal
+
+    totals = {}
+    for record in records:
+        key = (record['project_id'], record['billable'])
+        if key not in totals:
+            totals[key] = ArchivedMonthTotal(
+                archive=archive, project_id=key[0], billable=key[1], last_date=record['date']
+            )
+        total = totals[key]
+        total.entry_count += 1
+        total.minutes += record['duration']
+        total.last_date = max(total.last_date, record['date'])
+    return list(totals.values())
+
+
+def _changed(owner_id, replaced=None):
+    from . import analytics
+
+    if replaced:
+        remove_partition(replaced)
+    # Datasets loaded without a snapshot read hot and archived entries separately
+    analytics.bump_version(owner_id)
+
+
+def _delete_silently(model, ids):
+    """
+    DELETE the rows in plain SQL, without model signals. The entries are not gone, only
+    moved: their minutes stay in the project counters (recomputed from the monthly totals),
+    the billing report and tag totals read the same totals, snapshots and analytics keep
+    their rows, and the search index trigger drops them as SQL deletes do. Deleting through
+    the ORM would make the signal handlers undo all of that. TimeEntry has no dependent rows.
+    """
+    connection = connections[model.objects.db]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(batch))})", batch)
+
+
+def archive_month(owner_id, month):
+    """
+    Move ``owner_id``'s entries dated in ``month`` (its first day) into the month's partition,
+    merged with any entries archived before. Returns the number of entries moved.
+    """
+    from .models import ArchivedMonth, Project, TimeEntry
+
+    fields = list(_fields())
+    written = None
+    try:
+        with transaction.atomic():
+            # Writing first takes SQLite's write lock, so no entry of the month can change
+            # between being read here and being deleted below
+            ArchivedMonth.objects.filter(owner_id=owner_id, month=month).update(archived_at=timezone.now())
+            hot = list(
+                TimeEntry.objects.filter(owner_id=owner_id, date__gte=month, date__lt=_next_month(month))
+                .values(*fields)
+            )
+            if not hot:
+                return 0
+            archive = ArchivedMonth.objects.filter(owner_id=owner_id, month=month).first()
+            previous = read_partition(archive, cached=False) if archive else []
+            live = set(Project.all_objects.filter(
+                pk__in={record['project_id'] for record in previous}
+            ).values_list('pk', flat=True))
+            merged = sorted([*(r for r in previous if r['project_id'] in live), *hot], key=_order)
+
+            written, size = _write_partition(owner_id, month, merged)
+            replaced = archive.file if archive else None
+            archive, _ = ArchivedMonth.objects.update_or_create(
+                owner_id=owner_id, month=month, defaults={'file': written, 'entry_count': len(merged), 'size': size}
+            )
+            archive.totals.all().delete()
+            archive.totals.model.objects.bulk_create(_totals(archive, merged))
+            _delete_silently(TimeEntry, [record['id'] for record in hot])
+            transaction.on_commit(lambda: _changed(owner_id, replaced))
+    except BaseException:
+        if written:
+            remove_partition(written)
+        raise
+    return len(hot)
+
+
+def restore_month(archive):
+    """Move an archived month's entries back into TimeEntry, with their ids. Returns their number."""
+    from .models import TimeEntry
+
+    with transaction.atomic():
+        restored = _month_entries(archive)
+        originals = {entry.id: (entry.created_at, entry.updated_at) for entry in restored}
+        # bulk_create sends no signals (the entries are already counted) but stamps the
+        # auto_now fields; put the original timestamps back
+        TimeEntry.objects.bulk_create(restored, batch_size=BATCH_SIZE)
+        for entry in restored:
+            entry.created_at, entry.updated_at = originals[entry.id]
+        TimeEntry.objects.bulk_update(restored, ['created_at', 'updated_at'], batch_size=BATCH_SIZE)
+        archive.delete()
+        owner_id = archive.owner_id
+        transaction.on_commit(lambda: _changed(owner_id))
+    return len(restored)
@@ -0,0 +1,116 @@
+"""
+Response cache for read-mostly list endpoints (clients, tags, projects).
+
+Each model has a generation counter per owner in the cache. A cached response is stored
+under the owner's generations of every model it was built from, so bumping a counter (on
+save, delete or m2m change, see signals.py) makes all of that member's dependent entries
+unreachable at once; they simply expire. Other members' entries stay valid. Only
+get/set/add/incr are used, so any Django cache backend works, as long as it is shared by
+every worker process: with a per-process cache, a bump only reaches the worker that made
+it (see checks.py).
+
+Hit and byte counters are per process; see cache_stats(). /metrics has them for all workers.
+"""
+import threading
+import time
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from atb_tracker.metrics import CACHE_BYTES, CACHE_REQUESTS
+
+CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+
+
+def _generation_key(model, owner_id):
+    return f'projects:gen:{model._meta.label_lower}:{owner_id}'
+
+
+def bump_generation(model, owner_id):
+    """Invalidate the owner's cached responses built from ``model``, once the transaction commits."""
+    def bump():
+        key = _generation_key(model, owner_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Counter evicted: any fresh value differs from the one old entries were built with
+            cache.add(key, time.time_ns())
+    transaction.on_commit(bump)
+
+
+def _generations(models, owner_id):
+    keys = [_generation_key(m, owner_id) for m in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns())
+            found[key] = cache.get(key)
+    return [str(found[key]) for key in keys]
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, name, hit, size):
+        with self._lock:
+            stats = self._views.setdefault(name, {'hits': 0, 'misses': 0, 'bytes_served': 0, 'bytes_stored': 0})
+            stats['hits' if hit else 'misses'] += 1
+            stats['bytes_served'] += size
+            if not hit:
+                stats['bytes_stored'] += size
+        # Prometheus counters, summed over all workers (see atb_tracker/metrics.py)
+        CACHE_REQUESTS.inc(cache=name, result='hit' if hit else 'miss')
+        CACHE_BYTES.inc(size, cache=name, direction='served')
+        if not hit:
+            CACHE_BYTES.inc(size, cache=name, direction='stored')
+
+    def snapshot(self):
+        with self._lock:
+            views = {name: dict(stats) for name, stats in self._views.items()}
+        for stats in views.values():
+            total = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / total if total else 0.0
+        return views
+
+
+_stats = _Stats()
+
+
+def cache_stats():
+    """{view name: {hits, misses, hit_rate, bytes_served, bytes_stored}} for this process."""
+    return _stats.snapshot()
+
+
+class CachedListMixin:
+    """
+    Caches the rendered JSON of ``list()`` per owner and full request path, under the
+    generations of ``cache_models``. Set ``cache_name`` to label the view in cache_stats().
+    Put it after OwnedQuerysetMixin in the bases.
+    """
+    cache_name = None
+    cache_models = ()
+
+    def get_cache_key(self, request):
+        owner_id = self.get_owner().pk
+        generations = ':'.join(_generations(self.cache_models, owner_id))
+        path = sha1(request.get_full_path().encode()).hexdigest()
+        return f'projects:resp:{self.cache_name}:{owner_id}:{generations}:{path}'
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        content = cache.get(key)
+        if content is not None:
+            _stats.record(self.cache_name, True, len(content))
+            return HttpResponse(content, content_type='application/json')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            content = JSONRenderer().render(response.data)
+            cache.set(key, content, CACHE_TIMEOUT)
+            _stats.record(self.cache_name, False, len(content))
+        return response
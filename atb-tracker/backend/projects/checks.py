@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """Generation counters, analytics versions and billing months are invalidated through the default cache."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend != 'django.core.cache.backends.locmem.LocMemCache':
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint=(
+            'Cached list responses, billing months and analytics datasets are invalidated through '
+            'the cache; with more than one worker process, use a shared backend such as '
+            'FileBasedCache or RedisCache.'
+        ),
+        id='projects.W001',
+    )]
@@ -0,0 +1,175 @@
+"""
+Denormalized per-project counters: task_count, completed_task_count, total_minutes,
+billable_minutes and last_entry_date.
+
+Task and TimeEntry signals (see signals.py) apply each change as a delta in one UPDATE
+with F() expressions, so concurrent writers never overwrite each other's counts and the
+projects list reads the numbers straight from the project rows. With
+PROJECT_PROGRESS_FROM_TASKS, the same UPDATE also sets progress to the percentage of
+completed tasks.
+
+Anything that bypasses model signals (queryset.update, raw SQL) can leave counters stale;
+``python manage.py reconcile_project_counters`` recomputes them. Bulk deletions run inside
+``deferred()``, which reconciles each touched project once instead of updating it per row.
+Archived entries (see archive.py) stay counted: recomputing adds their monthly totals to
+the hot rows.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import Case, Count, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.lookups import GreaterThan
+
+COMPLETED = 'Completed'
+COUNTER_FIELDS = ['task_count', 'completed_task_count', 'total_minutes', 'billable_minutes', 'last_entry_date']
+
+
+def progress_from_tasks():
+    return getattr(settings, 'PROJECT_PROGRESS_FROM_TASKS', False)
+
+
+def _percentage(done, total):
+    return Case(When(GreaterThan(total, 0), then=done * 100 / total), default=Value(0))
+
+
+def _archived_totals(TimeEntry):
+    """ArchivedMonthTotal of the same app registry; None in migrations that predate it."""
+    try:
+        return TimeEntry._meta.apps.get_model('projects', 'ArchivedMonthTotal')
+    except LookupError:
+        return None
+
+
+def _last_entry_date(TimeEntry):
+    entries = TimeEntry.objects.filter(project=OuterRef('pk')).order_by().values('project')
+    last = Subquery(entries.annotate(last=Max('date')).values('last'))
+    ArchivedMonthTotal = _archived_totals(TimeEntry)
+    if ArchivedMonthTotal is None:
+        return last
+    archived = ArchivedMonthTotal.objects.filter(project=OuterRef('pk')).order_by().values('project')
+    archived_last = Subquery(archived.annotate(last=Max('last_date')).values('last'))
+    # Greatest() is NULL when either side is on SQLite
+    return Greatest(Coalesce(last, archived_last), Coalesce(archived_last, last))
+
+
+def apply_delta(project_id, tasks=0, completed=0, minutes=0, billable=0, entry_date=None, recompute_last=False):
+    """
+    Add the given deltas to one project's counters in a single UPDATE. ``entry_date`` raises
+    last_entry_date if it is later; ``recompute_last`` recomputes it, needed when an entry
+    was removed or moved earlier.
+    """
+    from .models import Project, TimeEntry
+
+    if _deferred_projects() is not None:
+        _deferred_projects().add(project_id)
+        return False
+    fields = {}
+    for name, delta in (('task_count', tasks), ('completed_task_count', completed),
+                        ('total_minutes', minutes), ('billable_minutes', billable)):
+        if delta:
+            fields[name] = F(name) + delta
+    if recompute_last:
+        fields['last_entry_date'] = _last_entry_date(TimeEntry)
+    elif entry_date is not None:
+        fields['last_entry_date'] = Greatest(Coalesce(F('last_entry_date'), Value(entry_date)), Value(entry_date))
+    if progress_from_tasks() and (tasks or completed):
+        fields['progress'] = _percentage(F('completed_task_count') + completed, F('task_count') + tasks)
+    if fields:
+        # Projects pending deletion are about to lose every row; their counters no longer matter
+        Project.all_objects.filter(pk=project_id, deleted_at__isnull=True).update(**fields)
+    return bool(fields)
+
+
+_deferred = threading.local()
+
+
+def _deferred_projects():
+    return getattr(_deferred, 'projects', None)
+
+
+@contextmanager
+def deferred():
+    """
+    Inside the block (in this thread), apply_delta only notes the project; on leaving it,
+    each noted project that still exists is reconciled once. Bulk deletes use this: a
+    per-row recompute of last_entry_date makes deleting N entries O(N^2).
+    Yields the set of noted project ids.
+    """
+    if _deferred_projects() is not None:
+        yield _deferred_projects()  # nested: the outermost block reconciles
+        return
+    _deferred.projects = set()
+    try:
+        yield _deferred.projects
+    finally:
+        project_ids, _deferred.projects = _deferred.projects, None
+    from .caching import bump_generation
+    from .models import Project, Task, TimeEntry
+
+    _, fixed = reconcile(Project, Task, TimeEntry, project_ids=project_ids)
+    for owner_id in Project.all_objects.filter(pk__in=fixed).values_list('owner_id', flat=True).distinct():
+        bump_generation(Project, owner_id)
+
+
+def computed_counters(Task, TimeEntry):
+    """
+    Annotations computing every counter from the source rows, usable on any Project queryset.
+    Archived entries count through their monthly totals (see archive.py).
+    """
+    tasks = Task.objects.filter(project=OuterRef('pk')).order_by().values('project')
+    entries = TimeEntry.objects.filter(project=OuterRef('pk')).order_by().values('project')
+    counters = {
+        'task_count': Coalesce(Subquery(tasks.annotate(n=Count('pk')).values('n')), 0),
+        'completed_task_count': Coalesce(
+            Subquery(tasks.filter(status=COMPLETED).annotate(n=Count('pk')).values('n')), 0
+        ),
+        'total_minutes': Coalesce(Subquery(entries.annotate(n=Sum('duration')).values('n')), 0),
+        'billable_minutes': Coalesce(
+            Subquery(entries.filter(billable=True).annotate(n=Sum('duration')).values('n')), 0
+        ),
+        'last_entry_date': _last_entry_date(TimeEntry),
+    }
+    ArchivedMonthTotal = _archived_totals(TimeEntry)
+    if ArchivedMonthTotal is not None:
+        archived = ArchivedMonthTotal.objects.filter(project=OuterRef('pk')).order_by().values('project')
+        counters['total_minutes'] += Coalesce(Subquery(archived.annotate(n=Sum('minutes')).values('n')), 0)
+        counters['billable_minutes'] += Coalesce(
+            Subquery(archived.filter(billable=True).annotate(n=Sum('minutes')).values('n')), 0
+        )
+    return counters
+
+
+def reconcile(Project, Task, TimeEntry, batch_size=500, dry_run=False, derive_progress=None, project_ids=None):
+    """
+    Recompute counters for every project (or those in ``project_ids``), batch by batch, and
+    write only the projects whose stored values drifted. Takes the model classes so
+    migrations can pass historical models.
+    Returns (number of projects checked, ids of the projects that drifted).
+    """
+    derive_progress = progress_from_tasks() if derive_progress is None else derive_progress
+    computed = {f'computed_{name}': expr for name, expr in computed_counters(Task, TimeEntry).items()}
+    projects = Project._base_manager.all()
+    if project_ids is not None:
+        projects = projects.filter(pk__in=project_ids)
+    checked, fixed = 0, []
+    last_id = 0
+    while True:
+        rows = list(
+            projects.filter(pk__gt=last_id).order_by('pk')
+            .annotate(**computed).values('pk', 'progress', *COUNTER_FIELDS, *computed)[:batch_size]
+        )
+        if not rows:
+            return checked, fixed
+        last_id = rows[-1]['pk']
+        checked += len(rows)
+        for row in rows:
+            values = {name: row[f'computed_{name}'] for name in COUNTER_FIELDS}
+            if derive_progress:
+                total, done = values['task_count'], values['completed_task_count']
+                values['progress'] = done * 100 // total if total else 0
+            if any(row[name] != value for name, value in values.items()):
+                fixed.append(row['pk'])
+                if not dry_run:
+                    Project._base_manager.filter(pk=row['pk']).update(**values)
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from projects import archive
+from projects.models import ArchivedMonth
+
+class Command(BaseCommand):
+    help = (
+        'Move time entries older than TIME_ENTRY_ARCHIVE_AFTER_MONTHS into compressed monthly partitions, '
+        'one member and month per transaction, or restore an archived month.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=archive.AFTER_MONTHS,
+                            help='Keep this many months before the current one in the database')
+        parser.add_argument('--before', help='Archive entries dated before this month instead (YYYY-MM)')
+        parser.add_argument('--owner', type=int, help='Only this member id')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months that would be archived')
+        parser.add_argument('--restore', metavar='YYYY-MM', help='Move this archived month of --owner back')
+
+    def _month(self, value, option):
+        try:
+            return datetime.strptime(value, '%Y-%m').date()
+        except ValueError:
+            raise CommandError(f'{option} must be YYYY-MM')
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            month = self._month(options['restore'], '--restore')
+            if options['owner'] is None:
+                raise CommandError('--restore needs --owner')
+            archived = ArchivedMonth.objects.filter(owner_id=options['owner'], month=month).first()
+            if archived is None:
+                raise CommandError(f'Member {options["owner"]} has no archived entries for {month:%Y-%m}.')
+            restored = archive.restore_month(archived)
+            self.stdout.write(self.style.SUCCESS(f'Restored {restored} entries of {month:%Y-%m}.'))
+            return
+
+        if options['before']:
+            before = self._month(options['before'], '--before')
+        elif options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+        else:
+            before = archive.cutoff(options['months'])
+        pending = archive.pending_months(before, options['owner'])
+        if options['dry_run']:
+            for owner_id, month, count in pending:
+                self.stdout.write(f'Member {owner_id}, {month:%Y-%m}: {count} entries')
+            self.stdout.write(self.style.SUCCESS(
+                f'Would archive {sum(count for _, _, count in pending)} entries dated before {before:%Y-%m}.'
+            ))
+            return
+
+        moved = 0
+        for owner_id, month, _ in pending:
+            count = archive.archive_month(owner_id, month)
+            moved += count
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Member {owner_id}, {month:%Y-%m}: {count} entries')
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved} entries dated before {before:%Y-%m} in {len(pending)} member months '
+            f'to {archive.ARCHIVE_DIR}.'
+        ))
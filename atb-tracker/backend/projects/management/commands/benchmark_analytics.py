@@ -0,0 +1,147 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractWeekDay
+
+from projects import analytics
+from projects.models import Client, Project, Tag, TimeEntry
+from users.models import Member
+
+ALIAS = 'analytics_benchmark'
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the NumPy analytics against equivalent ORM queries on a scratch SQLite '
+        'database filled with one member\'s time entries.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000, help='Time entries to generate')
+        parser.add_argument('--projects', type=int, default=50, help='Projects the entries are spread over')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per query (median is reported)')
+        parser.add_argument('--db', help='Scratch database path (default: a file in a temp directory, deleted afterwards)')
+
+    def handle(self, *args, **options):
+        if not analytics.available():
+            raise CommandError('NumPy is not installed.')
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('This benchmark needs the sqlite3 backend.')
+        # A private directory rather than a bare temp name, which another process could claim
+        # first; it also takes SQLite's journal files with it
+        scratch = None if options['db'] else tempfile.TemporaryDirectory()
+        path = options['db'] or os.path.join(scratch.name, 'benchmark.sqlite3')
+        connections.settings[ALIAS] = {**connections.settings['default'], 'NAME': path}
+        try:
+            owner_id = self._fill(path, options['rows'], options['projects'])
+            self._run(owner_id, options['repeat'])
+        finally:
+            connections[ALIAS].close()
+            del connections.settings[ALIAS]
+            if scratch:
+                scratch.cleanup()
+
+    def _fill(self, path, rows, projects):
+        self.stdout.write(f'Generating {rows:,} entries over {projects} projects...')
+        started = time.perf_counter()
+        with connections[ALIAS].schema_editor() as editor:
+            for model in (Member, Tag, Client, Project, TimeEntry):
+                editor.create_model(model)
+        db = sqlite3.connect(path)
+        db.execute("INSERT INTO users_member (name, email, provider, email_verified, created_at, updated_at) "
+                   "VALUES ('Benchmark', 'benchmark@example.invalid', 'email', 0, '2020-01-01', '2020-01-01')")
+        owner_id = db.execute('SELECT id FROM users_member').fetchone()[0]
+        db.executemany(
+            "INSERT INTO projects_project (name, status, progress, owner_id, task_count, completed_task_count, "
+            "total_minutes, billable_minutes) VALUES (?, 'Active', 0, ?, 0, 0, 0, 0)",
+            [(f'Project {i}', owner_id) for i in range(projects)],
+        )
+        project_ids = [r[0] for r in db.execute('SELECT id FROM projects_project')]
+        first_day = date.today() - timedelta(days=5 * 365)
+        days = [(first_day + timedelta(days=i)).isoformat() for i in range(5 * 365)]
+        rng = random.Random(0)
+        chunk = 100_000
+        for start in range(0, rows, chunk):
+            batch = []
+            for _ in range(min(chunk, rows - start)):
+                batch.append((
+                    rng.choice(project_ids), 'work', '09:00:00', '10:00:00', rng.randint(5, 240),
+                    rng.choice(days), rng.random() < 0.7, 'pomodoro' if rng.random() < 0.2 else 'regular',
+                    '2020-01-01 00:00:00', '2020-01-01 00:00:00', owner_id,
+                ))
+            db.executemany(
+                'INSERT INTO projects_timeentry (project_id, description, start_time, end_time, duration, date, '
+                'billable, type, created_at, updated_at, owner_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                batch,
+            )
+            db.commit()
+        db.execute('ANALYZE')
+        db.close()
+        self.stdout.write(f'Generated in {time.perf_counter() - started:.1f}s')
+        return owner_id
+
+    def _time(self, func, repeat):
+        timings, result = [], None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings), result
+
+    def _run(self, owner_id, repeat):
+        started = time.perf_counter()
+        dataset = analytics.get_dataset(owner_id, using=ALIAS)
+        self.stdout.write(f'NumPy load: {len(dataset):,} rows in {time.perf_counter() - started:.2f}s')
+
+        entries = TimeEntry.objects.using(ALIAS).filter(owner_id=owner_id)
+        end = date.today()
+        start = end - timedelta(days=89)
+
+        def orm_percentiles():
+            durations = entries.order_by('duration').values_list('duration', flat=True)
+            count = durations.count()
+            return {p: durations[int(p / 100 * (count - 1))] for p in (50, 75, 90, 95, 99)}
+
+        def orm_rolling():
+            rows = entries.filter(date__gte=start - timedelta(days=6), date__lte=end).values('date').annotate(
+                minutes=Sum('duration')).order_by('date')
+            totals = {row['date']: row['minutes'] for row in rows}
+            series = [totals.get(start + timedelta(days=i - 6), 0) for i in range((end - start).days + 7)]
+            return [sum(series[i:i + 7]) / 7 for i in range(len(series) - 6)]
+
+        def orm_weekday():
+            return list(entries.annotate(weekday=ExtractWeekDay('date')).values('weekday').annotate(
+                count=Count('id'), minutes=Sum('duration')).order_by('weekday'))
+
+        benchmarks = [
+            ('percentiles', lambda: analytics.duration_percentiles(dataset, dataset.mask()), orm_percentiles),
+            ('rolling 7-day (90 days)',
+             lambda: analytics.rolling_average(dataset, dataset.mask(), start, end), orm_rolling),
+            ('weekday distribution', lambda: analytics.weekday_distribution(dataset, dataset.mask()), orm_weekday),
+        ]
+        for label, vectorized, orm in benchmarks:
+            numpy_time, _ = self._time(vectorized, repeat)
+            orm_time, _ = self._time(orm, repeat)
+            self.stdout.write(
+                f'{label:>24}: numpy {numpy_time * 1000:9.1f} ms, ORM {orm_time * 1000:9.1f} ms '
+                f'({orm_time / numpy_time:,.0f}x)'
+            )
+
+        TimeEntry.objects.using(ALIAS).bulk_create([
+            TimeEntry(owner_id=owner_id, project_id=dataset.project[0], description='new', start_time='09:00',
+                      end_time='10:00', duration=30, date=end)
+            for _ in range(1000)
+        ])
+        started = time.perf_counter()
+        dataset = analytics.get_dataset(owner_id, using=ALIAS)
+        self.stdout.write(
+            f'Incremental append of 1,000 entries: {(time.perf_counter() - started) * 1000:.1f} ms '
+            f'({len(dataset):,} rows)'
+        )
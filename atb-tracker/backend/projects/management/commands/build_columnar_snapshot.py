@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from projects import snapshot
+
+class Command(BaseCommand):
+    help = (
+        'Write time entries and pomodoro sessions as memory-mappable column files and publish them '
+        'as the current columnar snapshot.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=1, help='Older snapshot generations to keep')
+
+    def handle(self, *args, **options):
+        if snapshot.np is None:
+            raise CommandError('NumPy is not installed.')
+        manifest = snapshot.build(keep=options['keep'])
+        tables = ', '.join(f"{info['rows']} {table}" for table, info in manifest['tables'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {manifest['generation']} published to {snapshot.SNAPSHOT_DIR} ({tables})."
+        ))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from projects.search import rebuild_search_index
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over time entries, tasks and projects.'
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} rows.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from projects.caching import bump_generation
+from projects.counters import progress_from_tasks, reconcile
+from projects.models import Project, Task, TimeEntry
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the denormalized project counters (tasks, minutes, last entry date and, with '
+        'PROJECT_PROGRESS_FROM_TASKS, progress) and fix projects whose stored values drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Projects checked per query')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted projects')
+
+    def handle(self, *args, **options):
+        checked, fixed = reconcile(
+            Project, Task, TimeEntry, batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+        if fixed and not options['dry_run']:
+            for owner_id in Project.all_objects.filter(pk__in=fixed).values_list('owner_id', flat=True).distinct():
+                bump_generation(Project, owner_id)
+        verb = 'would fix' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} projects, {verb} {len(fixed)}.'))
+        if fixed and options['verbosity'] > 1:
+            self.stdout.write(f'Drifted: {", ".join(map(str, fixed))}')
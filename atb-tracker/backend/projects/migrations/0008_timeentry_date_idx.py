@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_tag_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(fields=['date', 'billable', 'duration'], name='timeentry_date_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from projects.search import SEARCH_TABLE, SOURCES, create_search_index, drop_search_index
+
+
+def forwards(apps, schema_editor):
+    create_search_index(schema_editor)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    # Index rows that existed before the triggers
+    with schema_editor.connection.cursor() as cursor:
+        for code, table, column in SOURCES.values():
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}(rowid, body) SELECT id * 4 + {code}, {column} FROM {table}"
+            )
+
+
+def backwards(apps, schema_editor):
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_timeentry_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
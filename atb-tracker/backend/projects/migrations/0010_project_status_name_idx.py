@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:36
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status'], name='project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='project_name_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 1000
+
+
+def _update_in_batches(model, **values):
+    """Set ``values`` on rows without an owner, one short transaction per id range."""
+    high = model.objects.aggregate(high=Max('pk'))['high'] or 0
+    for start in range(0, high + 1, BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.filter(pk__gte=start, pk__lt=start + BATCH_SIZE, owner__isnull=True).update(**values)
+
+
+def forwards(apps, schema_editor):
+    Member = apps.get_model('users', 'Member')
+    # Data created before ownership existed belongs to the first account (single-user installs)
+    first = Member.objects.filter(deleted_at__isnull=True).order_by('pk').values_list('pk', flat=True).first()
+    if first is None:
+        return
+    for name in ('Client', 'Tag', 'Project'):
+        _update_in_batches(apps.get_model('projects', name), owner_id=first)
+    Project = apps.get_model('projects', 'Project')
+    project_owner = Subquery(Project.objects.filter(pk=OuterRef('project_id')).values('owner_id')[:1])
+    for name in ('Task', 'TimeEntry'):
+        _update_in_batches(apps.get_model('projects', name), owner_id=project_owner)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('projects', '0012_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
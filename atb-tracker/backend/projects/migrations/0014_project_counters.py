@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:59
+
+from django.db import migrations, models
+
+from projects.counters import reconcile
+from projects.search import restore_search_index
+
+
+def fill_counters(apps, schema_editor):
+    # Hand-set progress values are left alone here
+    reconcile(
+        apps.get_model('projects', 'Project'), apps.get_model('projects', 'Task'),
+        apps.get_model('projects', 'TimeEntry'), derive_progress=False,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_backfill_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='billable_minutes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='completed_task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='last_entry_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='total_minutes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        # Adding and altering columns rebuilt the tables without their search triggers
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+from projects.search import restore_search_index
+
+
+def stamp_completed(apps, schema_editor):
+    # Tasks completed before this migration: their last update is the best available time.
+    # Projects have no timestamps, so they count as completed now.
+    Task = apps.get_model('projects', 'Task')
+    Project = apps.get_model('projects', 'Project')
+    Task.objects.filter(status='Completed', completed_at__isnull=True).update(completed_at=F('updated_at'))
+    Project.objects.filter(status__iexact='Completed', completed_at__isnull=True).update(completed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0014_project_counters'),
+        ('users', '0004_member_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='owner',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='projects', to='users.member'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='owner',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='users.member'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['owner', 'completed_at'], name='project_owner_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'completed_at'], name='task_owner_completed_idx'),
+        ),
+        migrations.RunPython(stamp_completed, migrations.RunPython.noop),
+        # Adding and altering columns rebuilt the tables without their search triggers
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
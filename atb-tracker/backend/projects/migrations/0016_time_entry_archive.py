@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_completed_at'),
+        ('users', '0004_member_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('file', models.CharField(max_length=255)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('size', models.IntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_months', to='users.member')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedMonthTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('billable', models.BooleanField(default=False)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('minutes', models.IntegerField(default=0)),
+                ('last_date', models.DateField()),
+                ('archive', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='totals', to='projects.archivedmonth')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_totals', to='projects.project')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='archivedmonth',
+            constraint=models.UniqueConstraint(fields=('owner', 'month'), name='archivedmonth_owner_month_uniq'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from projects.search import restore_search_index
+
+
+class Migration(migrations.Migration):
+    # Databases migrated past 0014/0015 before they restored the search triggers lost the
+    # project and task triggers; recreate them and index what was missed
+
+    dependencies = [
+        ('projects', '0016_time_entry_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
@@ -1,31 +1,85 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
+from jobs.deletion import PendingDeleteManager
 
 # Create your models here.
 
+def completion_time(status, completed_at):
+    """completed_at after a save: stamped when status turns Completed, cleared when it leaves it."""
+    if (status or '').lower() != 'completed':
+        return None
+    return completed_at or timezone.now()
+
 class Tag(models.Model):
-    name = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
     color = models.CharField(max_length=20, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
+    owner = models.ForeignKey('users.Member', on_delete=models.CASCADE, blank=True, null=True, related_name='tags')
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'name'], name='tag_owner_name_uniq'),
+        ]
+
 class Client(models.Model):
-    name = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255)
+    owner = models.ForeignKey('users.Member', on_delete=models.CASCADE, blank=True, null=True, related_name='clients')
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'name'], name='client_owner_name_uniq'),
+        ]
+
 class Project(models.Model):
     name = models.CharField(max_length=255)
     client = models.ForeignKey(Client, on_delete=models.SET_NULL, blank=True, null=True, related_name='projects')
     status = models.CharField(max_length=50, default="Planning")
     progress = models.IntegerField(default=0)
     tags = models.ManyToManyField(Tag, blank=True, related_name='projects')
+    deleted_at = models.DateTimeField(blank=True, null=True)  # set while a background purge is pending
+    # Indexed by project_owner_completed_idx below
+    owner = models.ForeignKey(
+        'users.Member', on_delete=models.CASCADE, blank=True, null=True, related_name='projects', db_index=False
+    )
+    completed_at = models.DateTimeField(blank=True, null=True)  # set when status becomes Completed
+    # Denormalized counters, kept current by projects/counters.py; fix drift with reconcile_project_counters
+    task_count = models.IntegerField(default=0)
+    completed_task_count = models.IntegerField(default=0)
+    total_minutes = models.IntegerField(default=0)
+    billable_minutes = models.IntegerField(default=0)
+    last_entry_date = models.DateField(blank=True, null=True)
+
+    objects = PendingDeleteManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.completed_at = completion_time(self.status, self.completed_at)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='project_status_idx'),
+            # Owner-scoped lists and completion counts over a date range
+            models.Index(fields=['owner', 'completed_at'], name='project_owner_completed_idx'),
+            # Case-insensitive name prefix search ranges over lower(name)
+            models.Index(Lower('name'), name='project_name_lower_idx'),
+        ]
+
+class ProjectRowQuerySet(models.QuerySet):
+    def live(self):
+        """Rows whose project is not pending deletion; the purge job removes the others soon."""
+        return self.filter(project__deleted_at__isnull=True)
+
 class Task(models.Model):
     STATUS_CHOICES = [
         ("Pending", "Pending"),
@@ -37,12 +91,28 @@ class Task(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="tasks")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Pending")
     assigned_to = models.CharField(max_length=255, blank=True, null=True)  # Could be ForeignKey to User if you have users
+    # Indexed by task_owner_completed_idx below
+    owner = models.ForeignKey(
+        'users.Member', on_delete=models.CASCADE, blank=True, null=True, related_name='tasks', db_index=False
+    )
+    completed_at = models.DateTimeField(blank=True, null=True)  # set when status becomes Completed
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectRowQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        self.completed_at = completion_time(self.status, self.completed_at)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'completed_at'], name='task_owner_completed_idx'),
+        ]
+
 class TimeEntry(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="time_entries")
     description = models.TextField()
@@ -52,8 +122,48 @@ class TimeEntry(models.Model):
     date = models.DateField()
     billable = models.BooleanField(default=False)
     type = models.CharField(max_length=10, choices=[('regular', 'Regular'), ('pomodoro', 'Pomodoro')], default='regular')
+    # Indexed by timeentry_owner_date_idx below
+    owner = models.ForeignKey(
+        'users.Member', on_delete=models.CASCADE, blank=True, null=True, related_name='time_entries', db_index=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectRowQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.project.name} - {self.date} ({self.duration} min, {self.type})"
+
+    class Meta:
+        indexes = [
+            # Covers the calendar month summary (date range + billable/duration sums)
+            models.Index(fields=['date', 'billable', 'duration'], name='timeentry_date_idx'),
+            # Every entry list is scoped to its owner, usually over a date range
+            models.Index(fields=['owner', 'date'], name='timeentry_owner_date_idx'),
+        ]
+
+class ArchivedMonth(models.Model):
+    """One member's time entries of one month, moved out of TimeEntry into a compressed partition (see archive.py)."""
+    owner = models.ForeignKey('users.Member', on_delete=models.CASCADE, related_name='archived_months')
+    month = models.DateField()  # first day of the month
+    file = models.CharField(max_length=255)  # relative to TIME_ENTRY_ARCHIVE_DIR
+    entry_count = models.IntegerField(default=0)
+    size = models.IntegerField(default=0)  # compressed bytes
+    archived_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.owner_id} {self.month:%Y-%m} ({self.entry_count} entries)"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'month'], name='archivedmonth_owner_month_uniq'),
+        ]
+
+class ArchivedMonthTotal(models.Model):
+    """Totals of an archived month per project and billable flag, so rollups never open a partition."""
+    archive = models.ForeignKey(ArchivedMonth, on_delete=models.CASCADE, related_name='totals')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='archived_totals')
+    billable = models.BooleanField(default=False)
+    entry_count = models.IntegerField(default=0)
+    minutes = models.IntegerField(default=0)
+    last_date = models.DateField()
@@ -0,0 +1,11 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class OptionalPageNumberPagination(PageNumberPagination):
+    """
+    Paginates only when the client asks for it with ``?page_size=``, so existing
+    callers that expect a plain list keep working.
+    """
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 200
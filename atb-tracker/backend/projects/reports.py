@@ -0,0 +1,168 @@
+"""
+Billing report: billable minutes per client, project and month, priced with the owner's
+``Member.rate`` (revenue) and ``Member.cost``.
+
+Minutes are summed in SQL, grouped by project and month, so the database returns one row
+per project-month however many entries there are. SQLite has no exact decimal arithmetic,
+so rates are applied to those few integer sums with Decimal in Python, and every line is
+rounded to cents; totals are sums of the rounded lines.
+
+Months before the current one are closed: their per-project minutes are cached under
+BILLING_REPORT_CACHE_TIMEOUT and only recomputed when an entry of that month changes
+(see signals.py). Rates, names and client assignments are applied on every request, so
+they are always current, and projects pending deletion drop out at once.
+"""
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import CharField, Sum
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+
+from .models import ArchivedMonthTotal, Project, TimeEntry
+
+CACHE_TIMEOUT = getattr(settings, 'BILLING_REPORT_CACHE_TIMEOUT', 30 * 24 * 3600)
+CENT = Decimal('0.01')
+
+
+def month_cache_key(owner_id, month):
+    return f'projects:billing:{owner_id}:{month:%Y-%m}'
+
+
+def _next_month(month):
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def _months(first, last):
+    month = first
+    while month <= last:
+        yield month
+        month = _next_month(month)
+
+
+def _minutes_by_month(owner_id, first, last):
+    """{month: {project_id: billable minutes}} for the months ``first``..``last``, from SQL."""
+    rows = (
+        TimeEntry.objects.live()
+        .filter(owner_id=owner_id, billable=True, date__gte=first, date__lt=_next_month(last))
+        # 'YYYY-MM' prefix of the ISO date: native string functions instead of a per-row
+        # Python date_trunc call on SQLite
+        .annotate(month=Substr(Cast('date', CharField()), 1, 7))
+        .values('month', 'project_id')
+        .annotate(minutes=Sum('duration'))
+        .order_by()
+    )
+    # Archived months come from their totals (see archive.py)
+    archived = (
+        ArchivedMonthTotal.objects
+        .filter(archive__owner_id=owner_id, billable=True, archive__month__gte=first, archive__month__lte=last,
+                project__deleted_at__isnull=True)
+        .values('archive__month', 'project_id')
+        .annotate(minutes=Sum('minutes'))
+        .order_by()
+    )
+    result = {month: {} for month in _months(first, last)}
+    # One read transaction, so an archival run cannot move entries between the two queries
+    with transaction.atomic():
+        for row in rows:
+            month = date(int(row['month'][:4]), int(row['month'][5:7]), 1)
+            result[month][row['project_id']] = row['minutes']
+        for row in archived:
+            by_project = result[row['archive__month']]
+            by_project[row['project_id']] = by_project.get(row['project_id'], 0) + row['minutes']
+    return result
+
+
+def billable_minutes(owner_id, first, last):
+    """Like _minutes_by_month, but closed months come from the cache when possible."""
+    current = timezone.localdate().replace(day=1)
+    months = list(_months(first, last))
+    closed = [m for m in months if m < current]
+    keys = {m: month_cache_key(owner_id, m) for m in closed}
+    cached = cache.get_many(keys.values())
+    result = {m: cached[keys[m]] for m in closed if keys[m] in cached}
+    missing = [m for m in months if m not in result]
+    if missing:
+        computed = _minutes_by_month(owner_id, missing[0], missing[-1])
+        result.update({m: computed[m] for m in missing})
+        cache.set_many({keys[m]: computed[m] for m in missing if m in keys}, CACHE_TIMEOUT)
+    return result
+
+
+def _price(minutes, per_hour):
+    if per_hour is None:
+        return None
+    return (Decimal(minutes) * per_hour / 60).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _text(amount):
+    # JSON numbers would go through float; strings keep the amounts exact
+    return None if amount is None else str(amount)
+
+
+def _add(total, amount):
+    return None if total is None or amount is None else total + amount
+
+
+def billing_report(owner, first, last):
+    """
+    Report for the months ``first``..``last`` (first days of months). Amounts are exact
+    decimal strings, or None when the member has no rate or cost set.
+    """
+    minutes = billable_minutes(owner.pk, first, last)
+    project_ids = {pid for by_project in minutes.values() for pid in by_project}
+    # Cached months may predate a project's deletion: only projects still live are reported
+    projects = Project.objects.select_related('client').in_bulk(project_ids)
+
+    def empty_total():
+        zero = Decimal('0.00')
+        return {
+            'billable_minutes': 0,
+            'revenue': zero if owner.rate is not None else None,
+            'cost': zero if owner.cost is not None else None,
+        }
+
+    rows, by_client, by_month, totals = [], {}, {}, empty_total()
+    for month in sorted(minutes):
+        for project_id, mins in sorted(minutes[month].items()):
+            project = projects.get(project_id)
+            if project is None:
+                continue
+            client = project.client
+            revenue, cost = _price(mins, owner.rate), _price(mins, owner.cost)
+            rows.append({
+                'month': f'{month:%Y-%m}',
+                'client': {'id': client.id, 'name': client.name} if client else None,
+                'project': {'id': project_id, 'name': project.name},
+                'billable_minutes': mins,
+                'revenue': revenue,
+                'cost': cost,
+            })
+            client_key = client.id if client else None
+            if client_key not in by_client:
+                by_client[client_key] = {'client': rows[-1]['client'], **empty_total()}
+            month_key = f'{month:%Y-%m}'
+            if month_key not in by_month:
+                by_month[month_key] = {'month': month_key, **empty_total()}
+            for bucket in (by_client[client_key], by_month[month_key], totals):
+                bucket['billable_minutes'] += mins
+                bucket['revenue'] = _add(bucket['revenue'], revenue)
+                bucket['cost'] = _add(bucket['cost'], cost)
+
+    for item in [*rows, *by_client.values(), *by_month.values(), totals]:
+        item['margin'] = item['revenue'] - item['cost'] if None not in (item['revenue'], item['cost']) else None
+        for field in ('revenue', 'cost', 'margin'):
+            item[field] = _text(item[field])
+    return {
+        'start': f'{first:%Y-%m}',
+        'end': f'{last:%Y-%m}',
+        'rate': _text(owner.rate),
+        'cost_rate': _text(owner.cost),
+        'rows': rows,
+        'by_client': list(by_client.values()),
+        'by_month': list(by_month.values()),
+        'totals': totals,
+    }
@@ -0,0 +1,148 @@
+"""
+SQLite FTS5 search index over time-entry descriptions, task titles and project names.
+
+All three sources share one FTS5 table. Each row's rowid encodes the source object as
+``object_id * 4 + kind_code``, so triggers can update or delete a single row by rowid
+instead of scanning the index.
+
+SQLite rebuilds a table for most schema changes, dropping its triggers: a migration that
+alters one of the source tables must end with ``RunPython(restore_search_index)``.
+"""
+from django.db import connection, transaction
+
+SEARCH_TABLE = 'projects_search'
+
+# kind -> (rowid code, source table, indexed column)
+SOURCES = {
+    'entry': (1, 'projects_timeentry', 'description'),
+    'task': (2, 'projects_task', 'title'),
+    'project': (3, 'projects_project', 'name'),
+}
+KIND_BY_CODE = {code: kind for kind, (code, _, _) in SOURCES.items()}
+
+
+def _trigger_sql(kind):
+    code, table, column = SOURCES[kind]
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, body) VALUES (new.id * 4 + {code}, new.{column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {column} ON {table} BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + {code};
+            INSERT INTO {SEARCH_TABLE}(rowid, body) VALUES (new.id * 4 + {code}, new.{column});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + {code};
+        END
+        """,
+    ]
+
+
+def create_search_index(schema_editor=None):
+    """Create the FTS5 table and the sync triggers (SQLite only)."""
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        for kind in SOURCES:
+            for sql in _trigger_sql(kind):
+                cursor.execute(sql)
+
+
+def drop_search_index(schema_editor=None):
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for _, table, _ in SOURCES.values():
+            for suffix in ('ai', 'au', 'ad'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def _reindex(cursor):
+    cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    for code, table, column in SOURCES.values():
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, body) SELECT id * 4 + {code}, {column} FROM {table}"
+        )
+    cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+def rebuild_search_index():
+    """Repopulate the index from the source tables. Returns the number of indexed rows."""
+    create_search_index()
+    with transaction.atomic(), connection.cursor() as cursor:
+        _reindex(cursor)
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def restore_search_index(apps, schema_editor):
+    """
+    RunPython step for migrations that alter a source table. SQLite applies most schema
+    changes by copying the table, which drops its triggers, so recreate them and reindex
+    the rows changed while they were missing.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    create_search_index(schema_editor)
+    with schema_editor.connection.cursor() as cursor:
+        _reindex(cursor)
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 query: every word is quoted (so FTS operators in
+    user input are literal) and the last word matches as a prefix.
+    """
+    words = [w.replace('"', '""') for w in text.split()]
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search(text, kinds=None, owner_id=None, limit=20, offset=0):
+    """
+    Ranked search. Returns a list of (kind, object_id, rank, snippet) tuples, best first.
+    With ``owner_id``, only that member's rows match; their rowids come from the
+    (owner, ...) indexes of the source tables. Fetch ``limit + 1`` to find out whether
+    there is a next page.
+    """
+    kinds = kinds or list(SOURCES)
+    match = build_match_query(text)
+    if match is None:
+        return []
+    sql = (
+        f"SELECT rowid, bm25({SEARCH_TABLE}) AS rank, "
+        f"snippet({SEARCH_TABLE}, 0, '', '', '...', 16) "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+    )
+    params = [match]
+    if owner_id is not None:
+        owned = " UNION ALL ".join(
+            f"SELECT id * 4 + {SOURCES[kind][0]} FROM {SOURCES[kind][1]} WHERE owner_id = %s" for kind in kinds
+        )
+        sql += f" AND rowid IN ({owned})"
+        params += [owner_id] * len(kinds)
+    elif len(kinds) < len(SOURCES):
+        codes = [SOURCES[kind][0] for kind in kinds]
+        sql += f" AND rowid %% 4 IN ({', '.join(['%s'] * len(codes))})"
+        params += codes
+    sql += " ORDER BY rank LIMIT %s OFFSET %s"
+    params += [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [(KIND_BY_CODE[rowid % 4], rowid // 4, rank, snippet) for rowid, rank, snippet in rows]
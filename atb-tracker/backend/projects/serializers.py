@@ -1,33 +1,71 @@
 from rest_framework import serializers
+from user_settings.views import get_user_from_token
+from users.ownership import OwnedPrimaryKeyRelatedField
 from .models import Project, Client, Task, TimeEntry, Tag
 
-class ClientSerializer(serializers.ModelSerializer):
+class OwnerUniqueNameMixin:
+    """Names are unique per owner (see the *_owner_name_uniq constraints); owner is not a serializer field."""
+
+    def validate_name(self, value):
+        request = self.context.get('request')
+        if request is None:
+            return value
+        others = self.Meta.model.objects.filter(owner=get_user_from_token(request), name=value)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(f'{self.Meta.model.__name__} with this name already exists.')
+        return value
+
+class ClientSerializer(OwnerUniqueNameMixin, serializers.ModelSerializer):
     class Meta:
         model = Client
         fields = ['id', 'name']
 
 class TaskSerializer(serializers.ModelSerializer):
+    project = OwnedPrimaryKeyRelatedField(queryset=Project.objects.all())
+
     class Meta:
         model = Task
         fields = ['id', 'title', 'status', 'project', 'assigned_to', 'created_at', 'updated_at']
 
 class TimeEntrySerializer(serializers.ModelSerializer):
+    project = OwnedPrimaryKeyRelatedField(queryset=Project.objects.all())
+
     class Meta:
         model = TimeEntry
         fields = [
             'id', 'project', 'description', 'start_time', 'end_time', 'duration', 'date', 'billable', 'type', 'created_at', 'updated_at'
         ]
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(OwnerUniqueNameMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'name', 'color', 'description']
 
+class TagUsageSerializer(TagSerializer):
+    """Tag with usage numbers annotated by TagViewSet.get_queryset."""
+    project_count = serializers.SerializerMethodField()
+    total_minutes = serializers.SerializerMethodField()
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['project_count', 'total_minutes']
+
+    def get_project_count(self, obj):
+        return getattr(obj, 'project_count', 0)
+
+    def get_total_minutes(self, obj):
+        return getattr(obj, 'total_minutes', 0)
+
 class ProjectSerializer(serializers.ModelSerializer):
     client = ClientSerializer(read_only=True)
-    client_id = serializers.PrimaryKeyRelatedField(queryset=Client.objects.all(), source='client', write_only=True, required=False)
+    client_id = OwnedPrimaryKeyRelatedField(queryset=Client.objects.all(), source='client', write_only=True, required=False)
     tags = TagSerializer(many=True, read_only=True)
 
     class Meta:
         model = Project
-        fields = ['id', 'name', 'client', 'client_id', 'status', 'progress', 'tags']
+        fields = [
+            'id', 'name', 'client', 'client_id', 'status', 'progress', 'tags',
+            'task_count', 'completed_task_count', 'total_minutes', 'billable_minutes', 'last_entry_date',
+        ]
+        read_only_fields = ['task_count', 'completed_task_count', 'total_minutes', 'billable_minutes', 'last_entry_date']
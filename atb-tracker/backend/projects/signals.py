@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from pomodoro.models import PomodoroSession
+
+from . import analytics, archive, counters, snapshot
+from .caching import bump_generation
+from .models import ArchivedMonth, Client, Project, Tag, Task, TimeEntry
+from .reports import month_cache_key
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def project_tags_changed(sender, instance, **kwargs):
+    # instance is the Project, or the Tag when changed from the tag side; both share the owner
+    bump_generation(Project, instance.owner_id)
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=TimeEntry)
+@receiver(post_delete, sender=TimeEntry)
+def cached_model_changed(sender, instance, **kwargs):
+    bump_generation(sender, instance.owner_id)
+
+
+@receiver(post_save, sender=TimeEntry)
+@receiver(post_delete, sender=TimeEntry)
+@receiver(post_save, sender=PomodoroSession)
+@receiver(post_delete, sender=PomodoroSession)
+def log_snapshot_change(sender, instance, **kwargs):
+    # Connected before entry_saved, so the delta log is written before analytics reload
+    table = snapshot.table_for(sender)
+    record = snapshot.delta_record(table, instance, deleted='created' not in kwargs)
+    transaction.on_commit(lambda: snapshot.append_delta(table, record))
+
+
+# The saved row before an update, so post_save handlers can work with the old values
+SAVED_FIELDS = {
+    TimeEntry: ('project_id', 'duration', 'billable', 'date'),
+    Task: ('project_id', 'status'),
+}
+
+
+@receiver(pre_save, sender=TimeEntry)
+@receiver(pre_save, sender=Task)
+def remember_saved_row(sender, instance, **kwargs):
+    instance._saved = None
+    if instance.pk:
+        instance._saved = sender.objects.filter(pk=instance.pk).values(*SAVED_FIELDS[sender]).first()
+
+
+@receiver(post_save, sender=TimeEntry)
+@receiver(post_delete, sender=TimeEntry)
+def invalidate_billing_month(sender, instance, **kwargs):
+    # The billing report caches closed months; drop the months this entry was and is in
+    saved = getattr(instance, '_saved', None)
+    keys = {month_cache_key(instance.owner_id, d) for d in (instance.date, saved and saved['date']) if d}
+    transaction.on_commit(lambda: cache.delete_many(list(keys)))
+
+
+def _entry_delta(entry, sign):
+    minutes = entry['duration'] * sign
+    return {'minutes': minutes, 'billable': minutes if entry['billable'] else 0}
+
+
+def _task_delta(task, sign):
+    return {'tasks': sign, 'completed': sign if task['status'] == counters.COMPLETED else 0}
+
+
+def _update_counters(instance, fields, delta, created):
+    """Move ``instance``'s contribution from its saved row (if any) to its current values."""
+    current = {name: getattr(instance, name) for name in fields}
+    saved = None if created else getattr(instance, '_saved', None)
+    changes = {}
+    if saved:
+        for key, value in delta(saved, -1).items():
+            changes.setdefault(saved['project_id'], {}).setdefault(key, 0)
+            changes[saved['project_id']][key] += value
+    if current['project_id'] is not None:
+        for key, value in delta(current, 1).items():
+            changes.setdefault(current['project_id'], {}).setdefault(key, 0)
+            changes[current['project_id']][key] += value
+    return current, saved, changes
+
+
+@receiver(post_save, sender=TimeEntry)
+def entry_saved(sender, instance, created, **kwargs):
+    if not created:
+        # Loaded analytics datasets only pick up new rows; anything else needs a reload
+        transaction.on_commit(lambda: analytics.bump_version(instance.owner_id))
+    current, saved, changes = _update_counters(instance, SAVED_FIELDS[TimeEntry], _entry_delta, created)
+    for project_id, delta in changes.items():
+        if project_id == current['project_id']:
+            # Moving an entry earlier may lower its project's last_entry_date
+            moved_earlier = saved and saved['project_id'] == project_id and current['date'] < saved['date']
+            delta.update(recompute_last=bool(moved_earlier), entry_date=current['date'])
+        else:
+            delta['recompute_last'] = True
+        if counters.apply_delta(project_id, **delta):
+            bump_generation(Project, instance.owner_id)
+
+
+@receiver(post_delete, sender=TimeEntry)
+def entry_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: analytics.bump_version(instance.owner_id))
+    delta = _entry_delta({'duration': instance.duration, 'billable': instance.billable}, -1)
+    counters.apply_delta(instance.project_id, recompute_last=True, **delta)
+    bump_generation(Project, instance.owner_id)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    _, _, changes = _update_counters(instance, SAVED_FIELDS[Task], _task_delta, created)
+    applied = [counters.apply_delta(project_id, **delta) for project_id, delta in changes.items()]
+    if any(applied):
+        bump_generation(Project, instance.owner_id)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    counters.apply_delta(instance.project_id, **_task_delta({'status': instance.status}, -1))
+    bump_generation(Project, instance.owner_id)
+
+
+@receiver(post_delete, sender=ArchivedMonth)
+def archived_month_deleted(sender, instance, **kwargs):
+    # Restored, or deleted with its member
+    transaction.on_commit(lambda: archive.remove_partition(instance.file))
@@ -0,0 +1,318 @@
+"""
+Columnar snapshot of time entries and pomodoro sessions, memory-mapped by report code.
+
+``build_columnar_snapshot`` writes every row as fixed-width column files (int64 ids,
+int32 owner ids, days since 1970-01-01 and project ids, int16 minutes) and bit-packed
+flag files, ordered by owner and id, plus a manifest.json with each owner's row range.
+Every build is a new generation directory under COLUMNAR_SNAPSHOT_DIR; the CURRENT file
+names the published one.
+
+Archived time entries (see archive.py) are written along with the hot ones, so a snapshot
+holds every entry wherever it is stored.
+
+Readers mmap the files read-only, so all worker processes share the page cache's single
+copy, and one owner's rows are a zero-copy slice. Rows saved or deleted after a build
+are appended to the generation's delta logs as fixed-size records (see signals.py);
+readers apply them on top of the columns, the last record of an id winning.
+
+NumPy is needed to build and read snapshots, not to append to the delta log.
+"""
+import heapq
+import json
+import mmap
+import os
+import shutil
+import struct
+import threading
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import archive
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see open_snapshot()
+    np = None
+
+SNAPSHOT_DIR = Path(getattr(settings, 'COLUMNAR_SNAPSHOT_DIR', Path(settings.BASE_DIR) / 'snapshots'))
+CHUNK_SIZE = 65_536  # rows per write; a multiple of 8 so flag bytes never straddle chunks
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+INT16_MAX = 2 ** 15 - 1
+UPSERT, DELETE = 0, 1
+
+# table -> (column name -> little-endian struct code, flag names)
+TABLES = {
+    'entries': ({'id': 'q', 'owner': 'i', 'day': 'i', 'project': 'i', 'duration': 'h'}, ('billable', 'pomodoro')),
+    'pomodoros': (
+        {'id': 'q', 'owner': 'i', 'day': 'i', 'duration': 'h', 'break_duration': 'h', 'cycles': 'h'},
+        ('completed',),
+    ),
+}
+
+
+def _minutes(value):
+    # int16 columns: anything longer than ~22 days is stored as the maximum
+    return max(0, min(int(value or 0), INT16_MAX))
+
+
+def _entry_row(entry):
+    values = (entry.id, entry.owner_id or 0, entry.date.toordinal() - EPOCH_ORDINAL, entry.project_id or 0,
+              _minutes(entry.duration))
+    return values, (entry.billable, entry.type == 'pomodoro')
+
+
+def _pomodoro_row(session):
+    day = timezone.localdate(session.start_time).toordinal() - EPOCH_ORDINAL
+    values = (session.id, session.owner_id or 0, day, _minutes(session.duration),
+              _minutes(session.break_duration), _minutes(session.cycles))
+    return values, (session.state == 'completed',)
+
+
+def _sources():
+    from pomodoro.models import PomodoroSession
+    from .models import TimeEntry
+
+    # table -> (model, fields read, row function)
+    return {
+        'entries': (TimeEntry, ('id', 'owner_id', 'date', 'project_id', 'duration', 'billable', 'type'), _entry_row),
+        'pomodoros': (
+            PomodoroSession,
+            ('id', 'owner_id', 'start_time', 'duration', 'break_duration', 'cycles', 'state'),
+            _pomodoro_row,
+        ),
+    }
+
+
+def table_for(model):
+    return next((table for table, (source, _, _) in _sources().items() if source is model), None)
+
+
+# --- Delta log ---
+
+def _record_struct(table):
+    columns, _ = TABLES[table]
+    # operation, columns, flag bits
+    return struct.Struct('<B' + ''.join(columns.values()) + 'B')
+
+
+def _record_dtype(table):
+    columns, _ = TABLES[table]
+    return np.dtype([('op', 'u1')] + [(name, '<' + code) for name, code in columns.items()] + [('flags', 'u1')])
+
+
+def delta_record(table, instance, deleted=False):
+    """The delta log record for a saved (or deleted) row, as bytes."""
+    values, flags = _sources()[table][2](instance)
+    bits = sum(1 << i for i, flag in enumerate(flags) if flag)
+    return _record_struct(table).pack(DELETE if deleted else UPSERT, *values, bits)
+
+
+def _read_pointer(name):
+    try:
+        return (SNAPSHOT_DIR / name).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_pointer(name, generation):
+    path = SNAPSHOT_DIR / name
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(generation)
+    os.replace(tmp, path)
+
+
+def append_delta(table, record):
+    """Append to the delta log of the published generation, and of the one being built."""
+    # BUILDING before CURRENT: a build publishes CURRENT before it removes BUILDING, so one
+    # of the two always names the generation that will not have seen this row
+    generations = {_read_pointer('BUILDING'), _read_pointer('CURRENT')} - {None}
+    for generation in generations:
+        try:
+            # One write() of a whole record; O_APPEND keeps concurrent writers' records intact
+            with open(SNAPSHOT_DIR / generation / f'{table}.delta', 'ab') as log:
+                log.write(record)
+        except FileNotFoundError:
+            pass  # generation removed by a newer build
+
+
+# --- Building ---
+
+def _pack_flags(flags):
+    return np.packbits(np.array(flags, dtype=bool), bitorder='little').tobytes()
+
+
+def _owner(row):
+    return row.owner_id or 0
+
+
+def _write_table(target, table, fields, row, queryset, extra=()):
+    """``extra``: more rows (objects with the same attributes), ordered by owner."""
+    columns, flag_names = TABLES[table]
+    files = {name: open(target / f'{table}.{name}', 'wb') for name in (*columns, *flag_names)}
+    owners, count, max_id = {}, 0, 0
+    try:
+        rows = queryset.order_by('owner_id', 'id').values_list(*fields, named=True).iterator(chunk_size=CHUNK_SIZE)
+        rows = heapq.merge(rows, extra, key=_owner)
+        while True:
+            chunk = [row(r) for _, r in zip(range(CHUNK_SIZE), rows)]
+            if not chunk:
+                break
+            values, flags = zip(*chunk)
+            for index, (name, code) in enumerate(columns.items()):
+                np.array([v[index] for v in values], dtype='<' + code).tofile(files[name])
+            for index, name in enumerate(flag_names):
+                files[name].write(_pack_flags([f[index] for f in flags]))
+            for v in values:
+                # Rows arrive ordered by owner, so each owner's rows are one [start, count] range
+                owners.setdefault(str(v[1]), [count, 0])[1] += 1
+                count += 1
+            max_id = max(max_id, max(v[0] for v in values))
+    finally:
+        for f in files.values():
+            f.close()
+    return {
+        'rows': count,
+        'max_id': max_id,
+        'columns': {name: '<' + code for name, code in columns.items()},
+        'flags': list(flag_names),
+        'owners': owners,
+    }
+
+
+def build(keep=1):
+    """Write and publish a new generation; keeps ``keep`` older ones for readers still using them."""
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    generation = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    target = SNAPSHOT_DIR / generation
+    target.mkdir()
+    for table in TABLES:
+        (target / f'{table}.delta').touch()
+    # Rows committed from now on are logged to this generation too: each table is read by one
+    # SELECT that starts after this point, so a row is always in the columns or the log
+    _write_pointer('BUILDING', generation)
+    try:
+        manifest = {
+            'generation': generation,
+            'created_at': timezone.now().isoformat(),
+            'tables': {
+                table: _write_table(
+                    target, table, fields, row, model.objects.all(), archive.iter_entries() if table == 'entries' else ()
+                )
+                for table, (model, fields, row) in _sources().items()
+            },
+        }
+        (target / 'manifest.json').write_text(json.dumps(manifest))
+        _write_pointer('CURRENT', generation)
+    except BaseException:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+    finally:
+        (SNAPSHOT_DIR / 'BUILDING').unlink(missing_ok=True)
+    older = sorted(p for p in SNAPSHOT_DIR.iterdir() if p.is_dir() and p.name < generation)
+    for path in older[:max(len(older) - keep, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+    return manifest
+
+
+# --- Reading ---
+
+class Snapshot:
+    """A published generation. Columns are read-only NumPy views of the mmapped files."""
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.path = SNAPSHOT_DIR / generation
+        self.manifest = json.loads((self.path / 'manifest.json').read_text())
+        self._maps = {}
+        self._deltas = {table: (np.empty(0, dtype=_record_dtype(table)), 0) for table in TABLES}
+        self.lock = threading.Lock()
+
+    def _map(self, name):
+        if name not in self._maps:
+            with open(self.path / name, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                # mmap cannot map an empty file
+                self._maps[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        return self._maps[name]
+
+    def max_id(self, table):
+        return self.manifest['tables'][table]['max_id']
+
+    def _range(self, table, owner_id):
+        info = self.manifest['tables'][table]
+        if owner_id is None:
+            return 0, info['rows']
+        return info['owners'].get(str(owner_id), (0, 0))
+
+    def column(self, table, name, owner_id=None):
+        """Zero-copy array of one column, for all rows or one owner's."""
+        start, count = self._range(table, owner_id)
+        dtype = np.dtype(self.manifest['tables'][table]['columns'][name])
+        return np.frombuffer(self._map(f'{table}.{name}'), dtype=dtype, count=count, offset=start * dtype.itemsize)
+
+    def flag(self, table, name, owner_id=None):
+        """Boolean array of one flag (unpacked, so this one is a copy)."""
+        start, count = self._range(table, owner_id)
+        packed = np.frombuffer(self._map(f'{table}.{name}'), dtype=np.uint8)[start // 8:(start + count + 7) // 8]
+        return np.unpackbits(packed, bitorder='little')[start % 8:start % 8 + count].view(bool)
+
+    def delta(self, table, owner_id=None):
+        """Latest delta log record per id (structured array), reading only what was appended since last time."""
+        with self.lock:
+            records, offset = self._deltas[table]
+            dtype = records.dtype
+            with open(self.path / f'{table}.delta', 'rb') as log:
+                log.seek(offset)
+                data = log.read()
+            whole = len(data) - len(data) % dtype.itemsize  # a record may be mid-append
+            if whole:
+                records = np.concatenate([records, np.frombuffer(data[:whole], dtype=dtype)])
+                self._deltas[table] = (records, offset + whole)
+        if owner_id is not None:
+            records = records[records['owner'] == owner_id]
+        # Last record of each id
+        _, last = np.unique(records['id'][::-1], return_index=True)
+        return records[::-1][last]
+
+    def rows(self, table, owner_id=None):
+        """
+        {column or flag: array} with the delta log applied. Without logged changes for these
+        rows the columns are the zero-copy views.
+        """
+        columns, flag_names = TABLES[table]
+        result = {name: self.column(table, name, owner_id) for name in columns}
+        result.update({name: self.flag(table, name, owner_id) for name in flag_names})
+        changes = self.delta(table, owner_id)
+        if not len(changes):
+            return result
+        keep = ~np.isin(result['id'], changes['id'])
+        upserts = changes[changes['op'] == UPSERT]
+        for name in columns:
+            result[name] = np.concatenate([result[name][keep], upserts[name]])
+        for index, name in enumerate(flag_names):
+            result[name] = np.concatenate([result[name][keep], (upserts['flags'] >> index & 1).astype(bool)])
+        return result
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def open_snapshot():
+    """The published snapshot (shared by this process), or None without NumPy or a build."""
+    global _current
+    if np is None:
+        return None
+    generation = _read_pointer('CURRENT')
+    if generation is None:
+        return None
+    with _current_lock:
+        if _current is None or _current.generation != generation:
+            try:
+                _current = Snapshot(generation)
+            except FileNotFoundError:
+                return None
+        return _current
@@ -0,0 +1,14 @@
+from jobs.deletion import delete_in_batches
+from jobs.registry import task
+from . import counters
+from .models import Project, Task, TimeEntry
+
+@task('projects.purge_project')
+def purge_project(project_id):
+    """Delete a pending-delete project's entries and tasks in batches, then the project."""
+    with counters.deferred():
+        entries = delete_in_batches(TimeEntry.objects.filter(project_id=project_id))
+        tasks = delete_in_batches(Task.objects.filter(project_id=project_id))
+        delete_in_batches(Project.tags.through.objects.filter(project_id=project_id))
+        Project.all_objects.filter(pk=project_id).delete()
+    return {'time_entries': entries, 'tasks': tasks}
@@ -1,3 +1,408 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import StringIO
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from atb_tracker.testing import QueryPlanAssertions, capture_queries, seed_dataset
+from auth_app.models import AuthToken
+from users.models import Member
+
+from . import analytics, archive, checks, counters, search
+from .models import ArchivedMonth, Client, Project, Tag, Task, TimeEntry
+from .tasks import purge_project
+
+
+class HotQueryPlanTests(QueryPlanAssertions, TestCase):
+    """The project and time-entry endpoints hit on every page load keep using their indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = seed_dataset()[1]
+
+    def setUp(self):
+        cache.clear()  # cached list responses would skip the queries
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer token-{self.member.id}')
+
+    def get(self, path):
+        with capture_queries() as captured:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return captured
+
+    def test_time_entry_list(self):
+        captured = self.get('/api/projects/time-entries/')
+        self.assertQueryPlan(captured, 'projects_timeentry', 'timeentry_owner_date_idx')
+
+    def test_calendar_month_summary(self):
+        captured = self.get('/api/projects/calendar/2024/3/')
+        self.assertQueryPlan(captured, 'projects_timeentry', 'timeentry_owner_date_idx')
+
+    def test_calendar_day_entries(self):
+        captured = self.get('/api/projects/calendar/day/2024-03-05/')
+        self.assertQueryPlan(captured, 'projects_timeentry', 'timeentry_owner_date_idx')
+
+    def test_entry_time_series(self):
+        captured = self.get('/api/projects/reports/timeseries/?bucket=week&start=2024-01-01&end=2024-06-30')
+        self.assertQueryPlan(captured, 'projects_timeentry', 'timeentry_owner_date_idx')
+
+    def test_billing_report(self):
+        captured = self.get('/api/projects/reports/billing/?start=2024-01&end=2024-12')
+        self.assertQueryPlan(captured, 'projects_timeentry', 'timeentry_owner_date_idx')
+
+    def test_project_list_with_prefetches(self):
+        captured = self.get('/api/projects/')
+        self.assertQueryPlan(captured, 'projects_project', 'project_owner_completed_idx')
+        self.assertQueryPlan(captured, 'projects_project_tags')
+        self.assertQueryPlan(captured, 'projects_tag')
+
+
+class MemberAPITestCase(TestCase):
+    """A member with an active token, and an API client using it."""
+
+    def setUp(self):
+        cache.clear()
+        self.member = Member.objects.create(name='Ada', email='ada@example.com')
+        AuthToken.objects.create(user=self.member, token='ada-token', expires_at=timezone.now() + timedelta(days=1))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ada-token')
+
+
+class SearchIndexTests(MemberAPITestCase):
+    def search(self, text):
+        response = self.client.get('/api/projects/search/', {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return [(hit['type'], hit['id']) for hit in response.json()['results']]
+
+    def test_migrations_keep_the_search_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_search_%'")
+            triggers = {row[0] for row in cursor.fetchall()}
+        expected = {f'{table}_search_{suffix}' for _, table, _ in search.SOURCES.values() for suffix in ('ai', 'au', 'ad')}
+        self.assertEqual(triggers, expected)
+
+    def test_projects_and_tasks_created_after_migrating_are_found(self):
+        project = self.client.post('/api/projects/', {'name': 'Zephyr launch'}, format='json').json()
+        task = self.client.post('/api/projects/tasks/', {'title': 'Quokka review', 'project': project['id']}, format='json').json()
+        self.assertEqual(self.search('zephyr'), [('project', project['id'])])
+        self.assertEqual(self.search('quokka'), [('task', task['id'])])
+
+        self.client.patch(f"/api/projects/{project['id']}/", {'name': 'Aurora launch'}, format='json')
+        self.assertEqual(self.search('aurora'), [('project', project['id'])])
+        self.assertEqual(self.search('zephyr'), [])
+
+
+class ProjectCounterTests(MemberAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(name='Counted', owner=self.member)
+        self.other = Project.objects.create(name='Other', owner=self.member)
+
+    def add_entry(self, project, day, minutes, billable=False):
+        response = self.client.post('/api/projects/time-entries/', {
+            'project': project.id, 'description': 'work', 'start_time': '09:00', 'end_time': '10:00',
+            'duration': minutes, 'date': day, 'billable': billable,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def assertCounters(self, project, total, billable, last):
+        project.refresh_from_db()
+        self.assertEqual(
+            (project.total_minutes, project.billable_minutes, project.last_entry_date and str(project.last_entry_date)),
+            (total, billable, last),
+        )
+
+    def assertNoDrift(self):
+        self.assertEqual(counters.reconcile(Project, Task, TimeEntry, dry_run=True)[1], [])
+
+    def test_entry_changes_update_the_counters(self):
+        first = self.add_entry(self.project, '2024-03-01', 30, billable=True)
+        second = self.add_entry(self.project, '2024-03-05', 45)
+        self.assertCounters(self.project, 75, 30, '2024-03-05')
+
+        self.client.patch(f'/api/projects/time-entries/{second}/', {'date': '2024-02-01', 'duration': 15}, format='json')
+        self.assertCounters(self.project, 45, 30, '2024-03-01')
+        self.client.patch(f'/api/projects/time-entries/{first}/', {'project': self.other.id}, format='json')
+        self.assertCounters(self.project, 15, 0, '2024-02-01')
+        self.assertCounters(self.other, 30, 30, '2024-03-01')
+
+        self.client.delete(f'/api/projects/time-entries/{second}/')
+        self.assertCounters(self.project, 0, 0, None)
+        self.assertNoDrift()
+
+    def test_deferred_deletes_reconcile_each_project_once(self):
+        for day in range(1, 21):
+            self.add_entry(self.project, f'2024-03-{day:02}', 10, billable=day % 2 == 0)
+        self.add_entry(self.other, '2024-04-01', 5)
+        with counters.deferred() as touched:
+            TimeEntry.objects.filter(project=self.project, date__gt='2024-03-10').delete()
+            # Nothing is updated until the block ends
+            self.assertCounters(self.project, 200, 100, '2024-03-20')
+        self.assertEqual(touched, {self.project.id})
+        self.assertCounters(self.project, 100, 50, '2024-03-10')
+        self.assertCounters(self.other, 5, 0, '2024-04-01')
+        self.assertNoDrift()
+
+    def test_purging_a_project_leaves_other_counters_alone(self):
+        for day in range(1, 11):
+            self.add_entry(self.project, f'2024-03-{day:02}', 10)
+        self.add_entry(self.other, '2024-04-01', 5)
+        Project.objects.filter(pk=self.project.pk).update(deleted_at=timezone.now())
+        self.assertEqual(purge_project(self.project.id), {'time_entries': 10, 'tasks': 0})
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertCounters(self.other, 5, 0, '2024-04-01')
+        self.assertNoDrift()
+
+
+class PendingDeleteTests(MemberAPITestCase):
+    """Once a project's deletion is scheduled, its rows disappear everywhere before the purge runs."""
+
+    def setUp(self):
+        super().setUp()
+        self.tag = Tag.objects.create(name='urgent', owner=self.member)
+        self.kept = Project.objects.create(name='Kept', owner=self.member)
+        self.doomed = Project.objects.create(name='Doomed', owner=self.member)
+        for project in (self.kept, self.doomed):
+            project.tags.add(self.tag)
+            Task.objects.create(title=f'{project.name} zebra task', project=project, owner=self.member)
+            TimeEntry.objects.create(
+                project=project, description=f'{project.name} zebra work', start_time=time(9), end_time=time(10),
+                duration=30, date=date(2024, 3, 1), billable=True, owner=self.member,
+            )
+        response = self.client.delete(f'/api/projects/{self.doomed.pk}/')
+        self.assertEqual(response.status_code, 202)
+
+    def get(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data['results'] if isinstance(data, dict) and 'results' in data else data
+
+    def test_entries_and_tasks_are_hidden(self):
+        entries = self.get('/api/projects/time-entries/')
+        self.assertEqual({e['project'] for e in entries}, {self.kept.pk})
+        self.assertEqual({t['project'] for t in self.get('/api/projects/tasks/')}, {self.kept.pk})
+        self.assertEqual([e['project'] for e in self.get('/api/projects/calendar/day/2024-03-01/')], [self.kept.pk])
+        self.assertEqual(self.get('/api/projects/calendar/2024/3/')['totals']['total_minutes'], 30)
+        doomed_entry = TimeEntry.objects.get(project=self.doomed)
+        self.assertEqual(self.client.get(f'/api/projects/time-entries/{doomed_entry.pk}/').status_code, 404)
+
+    def test_reports_skip_the_project(self):
+        billing = self.get('/api/projects/reports/billing/', start='2024-03', end='2024-03')
+        self.assertEqual([row['project']['id'] for row in billing['rows']], [self.kept.pk])
+        self.assertEqual(billing['totals']['billable_minutes'], 30)
+        for bucket in ('day', 'month'):
+            series = self.get('/api/projects/reports/timeseries/', bucket=bucket, split='project',
+                              start='2024-03-01', end='2024-03-31')['series']
+            self.assertEqual([(s['key'], s['label']) for s in series], [(self.kept.pk, 'Kept')])
+
+    def test_analytics_drop_the_project_from_loaded_datasets(self):
+        analytics._datasets.clear()
+        self.addCleanup(analytics._datasets.clear)
+        later = Project.objects.create(name='Later', owner=self.member)
+        TimeEntry.objects.create(
+            project=later, description='more', start_time=time(9), end_time=time(10),
+            duration=90, date=date(2024, 3, 2), owner=self.member,
+        )
+        self.assertEqual(self.get('/api/projects/reports/analytics/')['count'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/api/projects/{later.pk}/').status_code, 202)
+        result = self.get('/api/projects/reports/analytics/')
+        self.assertEqual((result['count'], result['mean']), (1, 30.0))
+
+    def test_tag_totals_and_search_skip_the_project(self):
+        [tag] = self.get('/api/projects/tags/')
+        self.assertEqual((tag['project_count'], tag['total_minutes']), (1, 30))
+        hits = self.get('/api/projects/search/', q='zebra')
+        self.assertEqual({hit['project']['id'] for hit in hits}, {self.kept.pk})
+
+
+class ArchiveRoundTripTests(MemberAPITestCase):
+    """Archiving moves entries out of TimeEntry without changing anything the API returns."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        patcher = mock.patch.object(archive, 'ARCHIVE_DIR', Path(directory))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        archive._partitions.clear()
+        self.tag = Tag.objects.create(name='client work', owner=self.member)
+        self.project = Project.objects.create(name='Archived', owner=self.member)
+        self.project.tags.add(self.tag)
+        for day, minutes, billable in [(date(2023, 1, 5), 30, True), (date(2023, 1, 20), 45, False),
+                                       (date(2023, 2, 3), 60, True), (date(2024, 6, 1), 15, False)]:
+            self.add_entry(day, minutes, billable)
+
+    def add_entry(self, day, minutes, billable=False):
+        return TimeEntry.objects.create(
+            project=self.project, description='work', start_time=time(9), end_time=time(10),
+            duration=minutes, date=day, billable=billable, owner=self.member,
+        )
+
+    def state(self):
+        cache.clear()
+        get = lambda path: self.client.get(f'/api/projects/{path}').json()
+        [project] = get('')
+        return {
+            'project': (project['total_minutes'], project['billable_minutes'], project['last_entry_date']),
+            'entries': get('time-entries/?start=2023-01-01&end=2023-12-31'),
+            'calendar': get('calendar/2023/1/')['totals'],
+            'day': get('calendar/day/2023-02-03/'),
+            'tags': [(tag['project_count'], tag['total_minutes']) for tag in get('tags/')],
+        }
+
+    def archive(self, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_time_entries', *args, stdout=StringIO())
+
+    def test_archive_and_restore_round_trip(self):
+        before = self.state()
+        originals = {e.id: (e.created_at, e.updated_at) for e in TimeEntry.objects.filter(date__year=2023)}
+        self.archive('--before', '2023-03')
+
+        self.assertEqual(list(TimeEntry.objects.values_list('date', flat=True)), [date(2024, 6, 1)])
+        self.assertEqual(
+            list(ArchivedMonth.objects.order_by('month').values_list('month', 'entry_count')),
+            [(date(2023, 1, 1), 2), (date(2023, 2, 1), 1)],
+        )
+        self.assertEqual(self.state(), before)
+        self.assertEqual(counters.reconcile(Project, Task, TimeEntry, dry_run=True)[1], [])
+
+        for month in ('2023-01', '2023-02'):
+            self.archive('--restore', month, '--owner', str(self.member.id))
+        self.assertFalse(ArchivedMonth.objects.exists())
+        self.assertEqual(list(archive.ARCHIVE_DIR.rglob('*.ndjson*')), [])
+        self.assertEqual(
+            {e.id: (e.created_at, e.updated_at) for e in TimeEntry.objects.filter(date__year=2023)}, originals
+        )
+        self.assertEqual(self.state(), before)
+
+    def test_late_entries_are_merged_into_the_partition(self):
+        self.archive('--before', '2023-03')
+        replaced = ArchivedMonth.objects.get(month=date(2023, 1, 1)).file
+        late = self.add_entry(date(2023, 1, 7), 10)
+        self.assertEqual(len(self.client.get('/api/projects/time-entries/?start=2023-01-01&end=2023-01-31').json()), 3)
+
+        self.archive('--before', '2023-03')
+        january = ArchivedMonth.objects.get(month=date(2023, 1, 1))
+        self.assertEqual(january.entry_count, 3)
+        self.assertFalse((archive.ARCHIVE_DIR / replaced).exists())
+        self.assertFalse(TimeEntry.objects.filter(pk=late.pk).exists())
+        entries = self.client.get('/api/projects/time-entries/?start=2023-01-01&end=2023-01-31').json()
+        self.assertEqual([e['date'] for e in entries], ['2023-01-05', '2023-01-07', '2023-01-20'])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_minutes, 160)
+
+
+class CompletionTimestampTests(MemberAPITestCase):
+    def test_completed_at_follows_the_status(self):
+        project = Project.objects.create(name='Launch', owner=self.member)
+        self.assertIsNone(project.completed_at)
+        self.client.patch(f'/api/projects/{project.pk}/', {'status': 'Completed'}, format='json')
+        project.refresh_from_db()
+        stamped = project.completed_at
+        self.assertIsNotNone(stamped)
+
+        # Other edits keep the original completion time
+        self.client.patch(f'/api/projects/{project.pk}/', {'name': 'Launched'}, format='json')
+        project.refresh_from_db()
+        self.assertEqual(project.completed_at, stamped)
+
+        self.client.patch(f'/api/projects/{project.pk}/', {'status': 'In Progress'}, format='json')
+        project.refresh_from_db()
+        self.assertIsNone(project.completed_at)
+
+    def test_counts_and_series_use_the_completion_time(self):
+        project = Project.objects.create(name='Launch', owner=self.member)
+        done = timezone.make_aware(datetime(2024, 5, 10, 15))
+        for title, completed_at in (('a', done), ('b', done + timedelta(days=1)), ('c', None)):
+            Task.objects.create(title=title, project=project, owner=self.member,
+                                status='Completed' if completed_at else 'Pending', completed_at=completed_at)
+        Project.objects.filter(pk=project.pk).update(status='Completed', completed_at=done)
+
+        count = self.client.get('/api/projects/completed-count/', {'start': '2024-05-10', 'end': '2024-05-10'}).json()
+        self.assertEqual(count, {'completed_projects': 1})
+        count = self.client.get('/api/projects/completed-count/', {'start': '2024-05-11'}).json()
+        self.assertEqual(count, {'completed_projects': 0})
+        series = self.client.get(
+            '/api/projects/completed-series/', {'type': 'tasks', 'start': '2024-05-09', 'end': '2024-05-11'}
+        ).json()
+        self.assertEqual([day['count'] for day in series['days']], [0, 1, 1])
+
+
+class OwnerScopedNameTests(MemberAPITestCase):
+    """Tag and client names are unique per member, not across members."""
+
+    def test_names_are_unique_per_owner(self):
+        other = Member.objects.create(name='Bob', email='bob@example.com')
+        Tag.objects.create(name='urgent', owner=other)
+        Client.objects.create(name='Acme', owner=other)
+
+        self.assertEqual(self.client.post('/api/projects/tags/', {'name': 'urgent'}, format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/projects/clients/', {'name': 'Acme'}, format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/projects/tags/', {'name': 'urgent'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/projects/clients/', {'name': 'Acme'}, format='json').status_code, 400)
+
+    def test_renaming_onto_an_existing_name_is_rejected(self):
+        Tag.objects.create(name='urgent', owner=self.member)
+        tag = Tag.objects.create(name='later', owner=self.member)
+        response = self.client.patch(f'/api/projects/tags/{tag.pk}/', {'name': 'urgent'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f'/api/projects/tags/{tag.pk}/', {'name': 'later', 'color': 'red'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class ProjectNameFilterTests(MemberAPITestCase):
+    def names(self, prefix):
+        response = self.client.get('/api/projects/', {'name': prefix})
+        self.assertEqual(response.status_code, 200)
+        return sorted(project['name'] for project in response.json())
+
+    def test_prefix_folds_ascii_case_like_sqlite(self):
+        for name in ('Über Alpha', 'über beta', 'Alpha'):
+            Project.objects.create(name=name, owner=self.member)
+        self.assertEqual(self.names('ALP'), ['Alpha'])
+        self.assertEqual(self.names('Über A'), ['Über Alpha'])
+        self.assertEqual(self.names('über'), ['über beta'])
+
+
+class ProjectFilterIdTests(MemberAPITestCase):
+    def test_non_ascii_digits_are_names_not_ids(self):
+        project = Project.objects.create(name='Squared', owner=self.member)
+        project.tags.add(Tag.objects.create(name='²', owner=self.member))
+        for params in ({'client': '²'}, {'tag': '²'}, {'tag': '١'}):
+            self.assertEqual(self.client.get('/api/projects/', params).status_code, 200)
+        self.assertEqual([p['id'] for p in self.client.get('/api/projects/', {'tag': '²'}).json()], [project.pk])
+
+
+class CalendarMonthSummaryTests(MemberAPITestCase):
+    def test_out_of_range_dates_are_rejected(self):
+        for path in ('0/1', '10000/1', '2024/0', '2024/13'):
+            self.assertEqual(self.client.get(f'/api/projects/calendar/{path}/').status_code, 400)
+        self.assertEqual(self.client.get('/api/projects/calendar/9999/12/').status_code, 200)
+
+
+class ResponseCacheStatsTests(MemberAPITestCase):
+    def test_requires_a_token(self):
+        self.assertEqual(self.client.get('/api/projects/cache-stats/').status_code, 200)
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/projects/cache-stats/').status_code, 403)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_per_process_cache_is_flagged(self):
+        self.assertEqual(checks.shared_cache_check(None), [])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([w.id for w in checks.shared_cache_check(None)], ['projects.W001'])
@@ -0,0 +1,135 @@
+"""
+Bucketed time series over time entries and pomodoro sessions, for the reports charts.
+
+Dates are truncated to day, week (starting Monday) or month by the database and grouped
+there, so any chart is one aggregate query returning one row per bucket (and split key).
+Archived entries (see archive.py) are added from their monthly totals or partitions.
+Entries of projects pending deletion are left out.
+Buckets without data are zero-filled here.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+TRUNC = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+MAX_BUCKETS = 2000
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket == 'month':
+        return date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+def buckets(first, last, bucket):
+    """Every bucket start from the bucket containing ``first`` to the one containing ``last``."""
+    current, result = bucket_start(first, bucket), []
+    while current <= last:
+        result.append(current)
+        if len(result) > MAX_BUCKETS:
+            raise ValueError(f'More than {MAX_BUCKETS} buckets')
+        current = next_bucket(current, bucket)
+    return result
+
+
+def _sources():
+    from pomodoro.models import PomodoroSession
+    from .models import TimeEntry
+
+    # source -> (rows, date field, whether it is a DateTimeField, allowed splits)
+    return {
+        'entries': (TimeEntry.objects.live(), 'date', False, {'project': 'project_id', 'billable': 'billable'}),
+        'pomodoros': (PomodoroSession.objects.all(), 'start_time', True, {}),
+    }
+
+
+def source_splits(source):
+    return _sources()[source][3]
+
+
+def _archived_rows(owner, bucket, first, last, split_field=None):
+    """
+    Archived entries dated first..last, grouped like the SQL rows of time_series(): month
+    buckets from the monthly totals, day and week buckets from the partitions (see archive.py).
+    """
+    from . import archive
+    from .models import ArchivedMonthTotal
+
+    if bucket == 'month':
+        group = ['archive__month'] + ([split_field] if split_field else [])
+        totals = (
+            ArchivedMonthTotal.objects.filter(
+                archive__owner=owner, archive__month__gte=first, archive__month__lte=last,
+                project__deleted_at__isnull=True,
+            )
+            .values(*group)
+            .annotate(minutes=Sum('minutes'), count=Sum('entry_count'))
+            .order_by()
+        )
+        return [{**row, 'period': row['archive__month']} for row in totals]
+    grouped = {}
+    for record in archive.records(owner.pk, first, last):
+        key = (bucket_start(record['date'], bucket), record[split_field] if split_field else None)
+        minutes, count = grouped.get(key, (0, 0))
+        grouped[key] = (minutes + record['duration'], count + 1)
+    return [
+        {'period': period, 'minutes': minutes, 'count': count, **({split_field: value} if split_field else {})}
+        for (period, value), (minutes, count) in grouped.items()
+    ]
+
+
+def time_series(owner, source, bucket, first, last, split=None):
+    """
+    {'buckets': [...], 'series': [{'key', 'points': [{'bucket', 'minutes', 'count'}]}]} for
+    ``owner``'s rows of ``source`` dated ``first``..``last`` (inclusive dates).
+    """
+    source_rows, field, is_datetime, splits = _sources()[source]
+    starts = buckets(first, last, bucket)
+    range_start, range_end = starts[0], next_bucket(starts[-1], bucket)
+    if is_datetime:
+        range_start, range_end = (timezone.make_aware(datetime.combine(d, time.min)) for d in (range_start, range_end))
+    group = ['period'] + ([splits[split]] if split else [])
+    rows = (
+        source_rows.filter(owner=owner, **{f'{field}__gte': range_start, f'{field}__lt': range_end})
+        .annotate(period=TRUNC[bucket](field, output_field=DateField()))
+        .values(*group)
+        .annotate(minutes=Sum('duration'), count=Count('id'))
+        .order_by()
+    )
+    # One read transaction, so an archival run cannot move entries between the two reads
+    with transaction.atomic():
+        rows = list(rows)
+        if source == 'entries':
+            rows += _archived_rows(owner, bucket, range_start, range_end - timedelta(days=1), splits.get(split))
+    by_key = {}
+    for row in rows:
+        key = row[splits[split]] if split else None
+        points = by_key.setdefault(key, {})
+        minutes, count = points.get(row['period'], (0, 0))
+        points[row['period']] = (minutes + (row['minutes'] or 0), count + row['count'])
+    if not split:
+        by_key.setdefault(None, {})
+    series = [
+        {
+            'key': key,
+            'points': [
+                {'bucket': start.isoformat(), 'minutes': values.get(start, (0, 0))[0], 'count': values.get(start, (0, 0))[1]}
+                for start in starts
+            ],
+        }
+        for key, values in sorted(by_key.items(), key=lambda item: (item[0] is None, item[0]))
+    ]
+    return {'buckets': [start.isoformat() for start in starts], 'series': series}
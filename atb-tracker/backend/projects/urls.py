@@ -1,10 +1,15 @@
-from django.urls import path, include
+from django.urls import path, include, register_converter
 from rest_framework.routers import DefaultRouter
 from .views import (
     ProjectListCreateView, ProjectRetrieveUpdateDestroyView, ClientListCreateView, ClientRetrieveUpdateDestroyView,
     TaskListCreateView, TaskRetrieveUpdateDestroyView, CompletedTaskCountView, CompletedProjectCountView,
-    TimeEntryListCreateView, TimeEntryRetrieveUpdateDestroyView, TagViewSet
+    TimeEntryListCreateView, TimeEntryRetrieveUpdateDestroyView, TagViewSet,
+    CalendarMonthSummaryView, CalendarDayEntriesView, SearchView, ResponseCacheStatsView,
+    BillingReportView, CompletionSeriesView, TimeSeriesView, AnalyticsView
 )
+from .converters import IsoDateConverter
+
+register_converter(IsoDateConverter, 'isodate')
 
 router = DefaultRouter()
 router.register(r'tags', TagViewSet, basename='tag')
@@ -19,9 +24,21 @@ urlpatterns = [
     path('tasks/<int:pk>/', TaskRetrieveUpdateDestroyView.as_view(), name='task-detail'),
     path('tasks/completed-count/', CompletedTaskCountView.as_view(), name='completed-task-count'),
     path('completed-count/', CompletedProjectCountView.as_view(), name='completed-project-count'),
+    path('completed-series/', CompletionSeriesView.as_view(), name='completion-series'),
     # TimeEntry endpoints
     path('time-entries/', TimeEntryListCreateView.as_view(), name='timeentry-list-create'),
     path('time-entries/<int:pk>/', TimeEntryRetrieveUpdateDestroyView.as_view(), name='timeentry-detail'),
+    # Calendar endpoints
+    path('calendar/<int:year>/<int:month>/', CalendarMonthSummaryView.as_view(), name='calendar-month-summary'),
+    path('calendar/day/<isodate:date>/', CalendarDayEntriesView.as_view(), name='calendar-day-entries'),
+    # Reports
+    path('reports/billing/', BillingReportView.as_view(), name='billing-report'),
+    path('reports/timeseries/', TimeSeriesView.as_view(), name='time-series'),
+    path('reports/analytics/', AnalyticsView.as_view(), name='analytics'),
+    # Search endpoint
+    path('search/', SearchView.as_view(), name='search'),
+    # Response cache monitoring
+    path('cache-stats/', ResponseCacheStatsView.as_view(), name='response-cache-stats'),
     # Tag endpoints
     path('', include(router.urls)),
 ]
@@ -1,20 +1,88 @@
+import string
+
 from django.shortcuts import render
 from rest_framework import generics, permissions, viewsets
-from .models import Project, Client, Task, TimeEntry, Tag
+from .models import Project, Client, Task, TimeEntry, Tag, ArchivedMonthTotal
 from .serializers import ProjectSerializer, ClientSerializer, TaskSerializer, TimeEntrySerializer, TagSerializer
 
-class ProjectListCreateView(generics.ListCreateAPIView):
-    queryset = Project.objects.all()
+from django.db.models import Count
+from django.db.models.functions import Lower
+from .pagination import OptionalPageNumberPagination
+from .caching import CachedListMixin, bump_generation
+from users.ownership import OwnedQuerysetMixin
+from atb_tracker.memory import MemoryProfiledMixin
+
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def is_id(value):
+    # str.isdigit() also accepts '²', which int() rejects
+    return value.isascii() and value.isdecimal()
+
+class ProjectListCreateView(OwnedQuerysetMixin, CachedListMixin, MemoryProfiledMixin, generics.ListCreateAPIView):
+    """
+    List responses are cached until a project, client or tag changes (see caching.py).
+
+    Query params (all optional):
+      client   - client id or exact client name
+      status   - one or more statuses (repeat the param)
+      tag      - one or more tag ids or names (repeat the param)
+      tag_match - 'any' (default) or 'all'
+      name     - name prefix, case-insensitive for ASCII letters only (as SQLite's lower())
+      page, page_size - pagination, only applied when page_size is given
+    """
     serializer_class = ProjectSerializer
+    pagination_class = OptionalPageNumberPagination
+    cache_name = 'projects'
+    cache_models = (Project, Client, Tag)
+
+    def get_queryset(self):
+        queryset = self.scoped(Project.objects.select_related('client').prefetch_related('tags'))
+        params = self.request.query_params
+
+        client = params.get('client')
+        if client:
+            if is_id(client):
+                queryset = queryset.filter(client_id=int(client))
+            else:
+                queryset = queryset.filter(client__name=client)
+
+        statuses = [s for s in params.getlist('status') if s]
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+
+        tags = [t for t in params.getlist('tag') if t]
+        if tags:
+            tag_ids = {int(t) for t in tags if is_id(t)}
+            tag_names = {t for t in tags if not is_id(t)}
+            named = dict(self.scoped(Tag.objects).filter(name__in=tag_names).values_list('name', 'id')) if tag_names else {}
+            tag_ids.update(named.values())
+            through = Project.tags.through.objects.filter(tag_id__in=tag_ids)
+            if params.get('tag_match') == 'all':
+                if len(named) < len(tag_names):
+                    return queryset.none()
+                through = through.values('project_id').annotate(matched=Count('tag_id')).filter(matched=len(tag_ids))
+            queryset = queryset.filter(id__in=through.values('project_id'))
 
-class ClientListCreateView(generics.ListCreateAPIView):
+        # Fold like SQLite's lower(), which only maps A-Z: str.lower() would also fold 'Ü'
+        # to 'ü', which the stored 'Über' never matches
+        name = params.get('name', '').strip().translate(ASCII_LOWER)
+        if name:
+            # Range over lower(name) instead of LIKE so SQLite can use project_name_lower_idx
+            queryset = queryset.annotate(name_lower=Lower('name')).filter(
+                name_lower__gte=name, name_lower__lt=name + '\U0010ffff'
+            )
+
+        return queryset.order_by('id')
+
+class ClientListCreateView(OwnedQuerysetMixin, CachedListMixin, generics.ListCreateAPIView):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
+    cache_name = 'clients'
+    cache_models = (Client,)
 
-class ClientRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class ClientRetrieveUpdateDestroyView(OwnedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
-    permission_classes = [permissions.AllowAny]
 
 # Add this view for retrieve, update, and delete (needed for DELETE from frontend)
 from rest_framework import permissions
@@ -26,56 +94,177 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.utils import timezone
 
-class TaskListCreateView(generics.ListCreateAPIView):
-    queryset = Task.objects.all()
+class TaskListCreateView(OwnedQuerysetMixin, generics.ListCreateAPIView):
+    queryset = Task.objects.live()
     serializer_class = TaskSerializer
-    permission_classes = [AllowAny]
 
-class TaskRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Task.objects.all()
+class TaskRetrieveUpdateDestroyView(OwnedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Task.objects.live()
     serializer_class = TaskSerializer
-    permission_classes = [AllowAny]
 
-class CompletedTaskCountView(APIView):
+from datetime import datetime, time, timedelta
+from django.db.models.functions import TruncDate
+from django.utils.dateparse import parse_date, parse_datetime
+
+def completion_range(request):
+    """
+    (start, end) datetimes from the start/end query params, either may be None. Dates are
+    whole local days, so end=2025-06-30 includes that day; datetimes are used as given.
+    Raises ValueError on a malformed value.
+    """
+    bounds = []
+    for name, day_offset in (('start', 0), ('end', 1)):
+        value = request.GET.get(name)
+        if not value:
+            bounds.append(None)
+            continue
+        try:
+            day = parse_date(value)
+            parsed = parse_datetime(value) if day is None else datetime.combine(day + timedelta(days=day_offset), time.min)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValueError(name)
+        bounds.append(timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed)
+    return tuple(bounds)
+
+def completed_in_range(queryset, start, end):
+    """Completed rows in [start, end), read from the (owner, completed_at) index."""
+    queryset = queryset.filter(completed_at__isnull=False)
+    if start:
+        queryset = queryset.filter(completed_at__gte=start)
+    if end:
+        queryset = queryset.filter(completed_at__lt=end)
+    return queryset
+
+class CompletedTaskCountView(OwnedQuerysetMixin, APIView):
     """
     Deprecated: Now returns the number of completed projects, not tasks, for consistency with the frontend.
+    Query params: start, end (dates or datetimes) limit the count to projects completed in that range.
     """
-    permission_classes = [AllowAny]
     def get(self, request):
-        start = request.GET.get('start')
-        end = request.GET.get('end')
-        qs = Project.objects.filter(status__iexact="Completed")
-        if start:
-            qs = qs.filter()  # Optionally filter by date if you have a date field
-        if end:
-            qs = qs.filter()  # Optionally filter by date if you have a date field
+        try:
+            start, end = completion_range(request)
+        except ValueError as e:
+            return Response({"error": f"Invalid {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        qs = completed_in_range(self.scoped(Project.objects), start, end)
         return Response({"completed_tasks": qs.count()})
 
-class CompletedProjectCountView(APIView):
-    permission_classes = [AllowAny]
+class CompletedProjectCountView(OwnedQuerysetMixin, APIView):
+    """Projects completed between start and end (dates or datetimes, both optional)."""
     def get(self, request):
-        start = request.GET.get('start')
-        end = request.GET.get('end')
-        qs = Project.objects.filter(status__iexact="Completed")
-        if start:
-            qs = qs.filter()  # Optionally filter by date if you have a date field
-        if end:
-            qs = qs.filter()  # Optionally filter by date if you have a date field
+        try:
+            start, end = completion_range(request)
+        except ValueError as e:
+            return Response({"error": f"Invalid {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        qs = completed_in_range(self.scoped(Project.objects), start, end)
         return Response({"completed_projects": qs.count()})
 
+class CompletionSeriesView(OwnedQuerysetMixin, APIView):
+    """
+    Completions per day, zero-filled. Query params: type ('projects', default, or 'tasks'),
+    start and end dates (default: the last 30 days including today).
+    """
+    max_days = 366
+
+    def get(self, request):
+        rows = {'projects': Project.objects, 'tasks': Task.objects.live()}.get(request.GET.get('type', 'projects'))
+        if rows is None:
+            return Response({"error": "type must be projects or tasks"}, status=status.HTTP_400_BAD_REQUEST)
+        today = timezone.localdate()
+        try:
+            first = parse_date(request.GET['start']) if request.GET.get('start') else today - timedelta(days=29)
+            last = parse_date(request.GET['end']) if request.GET.get('end') else today
+        except ValueError:
+            first = last = None
+        if first is None or last is None:
+            return Response({"error": "start and end must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        days = (last - first).days + 1
+        if not 1 <= days <= self.max_days:
+            return Response(
+                {"error": f"The range must cover 1 to {self.max_days} days"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        start = timezone.make_aware(datetime.combine(first, time.min))
+        end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min))
+        rows = (
+            completed_in_range(self.scoped(rows), start, end)
+            .annotate(day=TruncDate('completed_at'))
+            .values('day')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        by_day = {row['day']: row['count'] for row in rows}
+        series = [
+            {"date": (first + timedelta(days=i)).isoformat(), "count": by_day.get(first + timedelta(days=i), 0)}
+            for i in range(days)
+        ]
+        return Response({"type": request.GET.get('type', 'projects'), "days": series, "total": sum(by_day.values())})
+
 # --- TimeEntry Views ---
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from . import archive
+
+class ArchivedEntriesMixin:
+    """
+    For entry lists: when archived_range() returns (first, last), the archived entries of
+    those dates (see archive.py) are merged into the list, ordered by date and start time.
+    """
+
+    def archived_range(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        dates = self.archived_range()
+        owner_id = self.get_owner().pk
+        if dates is None or not archive.archived_months(owner_id, *dates).exists():
+            return super().list(request, *args, **kwargs)
+        # One read transaction, so an archival run cannot move entries between the two reads
+        with transaction.atomic():
+            entries = list(self.filter_queryset(self.get_queryset()))
+            archived = archive.entries(owner_id, *dates)
+        entry_type = request.query_params.get('type')
+        hot_ids = {entry.id for entry in entries}
+        entries += [e for e in archived if e.id not in hot_ids and (not entry_type or e.type == entry_type)]
+        entries.sort(key=lambda e: (e.date, e.start_time, e.id))
+        page = self.paginate_queryset(entries)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(entries, many=True).data)
 
-class TimeEntryListCreateView(generics.ListCreateAPIView):
+class TimeEntryListCreateView(OwnedQuerysetMixin, ArchivedEntriesMixin, MemoryProfiledMixin, generics.ListCreateAPIView):
+    """
+    Query params (all optional): type, and start and end dates (YYYY-MM-DD, inclusive).
+    Entries of archived months are only listed when start or end asks for their dates.
+    """
     serializer_class = TimeEntrySerializer
-    permission_classes = [AllowAny]
+
+    def date_range(self):
+        try:
+            dates = [parse_date(self.request.query_params.get(name) or '') for name in ('start', 'end')]
+        except ValueError:
+            dates = [None, None]
+        for name, value in zip(('start', 'end'), dates):
+            if self.request.query_params.get(name) and value is None:
+                raise ValidationError({name: 'Must be a date, YYYY-MM-DD'})
+        return dates
+
+    def archived_range(self):
+        start, end = self.date_range()
+        return (start, end) if start or end else None
 
     def get_queryset(self):
-        queryset = TimeEntry.objects.all()
+        queryset = self.scoped(TimeEntry.objects.live())
         entry_type = self.request.query_params.get('type')
         if entry_type:
             queryset = queryset.filter(type=entry_type)
+        start, end = self.date_range()
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
         return queryset
 
     def create(self, request, *args, **kwargs):
@@ -88,15 +277,282 @@ class TimeEntryListCreateView(generics.ListCreateAPIView):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-class TimeEntryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = TimeEntry.objects.all()
+class TimeEntryRetrieveUpdateDestroyView(OwnedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = TimeEntry.objects.live()
+    serializer_class = TimeEntrySerializer
+
+# --- Calendar Views ---
+import calendar
+from datetime import date as date_cls
+from django.db.models import Count, Q, Sum
+
+class CalendarMonthSummaryView(OwnedQuerysetMixin, APIView):
+    """
+    Per-day totals for one calendar month, so the calendar never has to download entries.
+    Days without entries are zero-filled.
+    """
+
+    def get(self, request, year, month):
+        if not 1 <= year <= date_cls.max.year or not 1 <= month <= 12:
+            return Response({"error": "Invalid year or month"}, status=status.HTTP_400_BAD_REQUEST)
+        days_in_month = calendar.monthrange(year, month)[1]
+        first_day = date_cls(year, month, 1)
+        last_day = date_cls(year, month, days_in_month)
+
+        rows = (
+            self.scoped(TimeEntry.objects.live()).filter(date__range=(first_day, last_day))
+            .values('date')
+            .annotate(
+                total_minutes=Sum('duration'),
+                billable_minutes=Sum('duration', filter=Q(billable=True)),
+                entry_count=Count('id'),
+            )
+            .order_by('date')
+        )
+        # One read transaction, so an archival run cannot move entries between the two reads
+        with transaction.atomic():
+            by_date = {row['date']: row for row in rows}
+            archived = archive.records(self.get_owner().pk, first_day, last_day)
+        for record in archived:
+            row = by_date.setdefault(record['date'], {"total_minutes": 0, "billable_minutes": 0, "entry_count": 0})
+            row['total_minutes'] = (row['total_minutes'] or 0) + record['duration']
+            row['billable_minutes'] = (row['billable_minutes'] or 0) + (record['duration'] if record['billable'] else 0)
+            row['entry_count'] += 1
+
+        days = []
+        totals = {"total_minutes": 0, "billable_minutes": 0, "non_billable_minutes": 0, "entry_count": 0}
+        for day in range(1, days_in_month + 1):
+            current = date_cls(year, month, day)
+            row = by_date.get(current)
+            total = (row['total_minutes'] or 0) if row else 0
+            billable = (row['billable_minutes'] or 0) if row else 0
+            count = row['entry_count'] if row else 0
+            days.append({
+                "date": current.isoformat(),
+                "total_minutes": total,
+                "billable_minutes": billable,
+                "non_billable_minutes": total - billable,
+                "entry_count": count,
+            })
+            totals["total_minutes"] += total
+            totals["billable_minutes"] += billable
+            totals["non_billable_minutes"] += total - billable
+            totals["entry_count"] += count
+
+        return Response({"year": year, "month": month, "days": days, "totals": totals})
+
+class CalendarDayEntriesView(OwnedQuerysetMixin, ArchivedEntriesMixin, generics.ListAPIView):
+    """
+    Entries for a single day, loaded lazily when a calendar cell is opened.
+    """
     serializer_class = TimeEntrySerializer
-    permission_classes = [AllowAny]
 
-class ProjectRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+    def archived_range(self):
+        return self.kwargs['date'], self.kwargs['date']
+
+    def get_queryset(self):
+        queryset = self.scoped(TimeEntry.objects.live()).filter(date=self.kwargs['date']).select_related('project')
+        entry_type = self.request.query_params.get('type')
+        if entry_type:
+            queryset = queryset.filter(type=entry_type)
+        return queryset.order_by('start_time')
+
+# --- Billing Report ---
+from datetime import datetime
+from .reports import billing_report
+
+class BillingReportView(OwnedQuerysetMixin, APIView):
+    """
+    Billable minutes, revenue, cost and margin per client, project and month, priced with
+    the caller's rate and cost. Query params: start, end (YYYY-MM, inclusive); defaults to
+    January of the current year through the current month.
+    """
+    max_months = 36
+
+    def get(self, request):
+        today = timezone.localdate()
+        try:
+            first = datetime.strptime(request.GET.get('start', f'{today.year}-01'), '%Y-%m').date()
+            last = datetime.strptime(request.GET.get('end', f'{today:%Y-%m}'), '%Y-%m').date()
+        except ValueError:
+            return Response({"error": "start and end must be YYYY-MM"}, status=status.HTTP_400_BAD_REQUEST)
+        months = (last.year - first.year) * 12 + last.month - first.month + 1
+        if not 1 <= months <= self.max_months:
+            return Response(
+                {"error": f"The range must cover 1 to {self.max_months} months"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(billing_report(self.get_owner(), first, last))
+
+# --- Time Series ---
+from . import timeseries
+
+class TimeSeriesView(OwnedQuerysetMixin, APIView):
+    """
+    Minutes and counts per day, week or month, zero-filled, computed in one aggregate query.
+    Query params: source ('entries', default, or 'pomodoros'), bucket ('day', 'week', 'month'),
+    start and end dates (default: the last 30 days, 12 weeks or 12 months), and optionally
+    split ('project' or 'billable', entries only).
+    """
+    default_spans = {'day': timedelta(days=29), 'week': timedelta(weeks=11), 'month': timedelta(days=334)}
+
+    def get(self, request):
+        source = request.GET.get('source', 'entries')
+        bucket = request.GET.get('bucket', 'day')
+        split = request.GET.get('split') or None
+        if source not in ('entries', 'pomodoros') or bucket not in timeseries.TRUNC:
+            return Response({"error": "Invalid source or bucket"}, status=status.HTTP_400_BAD_REQUEST)
+        if split and split not in timeseries.source_splits(source):
+            return Response({"error": f"Cannot split {source} by {split}"}, status=status.HTTP_400_BAD_REQUEST)
+        today = timezone.localdate()
+        try:
+            last = parse_date(request.GET['end']) if request.GET.get('end') else today
+            first = parse_date(request.GET['start']) if request.GET.get('start') else None
+        except ValueError:
+            last = None
+        if last is None or (request.GET.get('start') and first is None):
+            return Response({"error": "start and end must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        first = first or last - self.default_spans[bucket]
+        if first > last:
+            return Response({"error": "start must not be after end"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            data = timeseries.time_series(self.get_owner(), source, bucket, first, last, split)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if split == 'project':
+            names = dict(self.scoped(Project.objects).filter(
+                pk__in=[s['key'] for s in data['series']]
+            ).values_list('id', 'name'))
+            for series in data['series']:
+                series['label'] = names.get(series['key'])
+        return Response({"source": source, "bucket": bucket, "split": split,
+                         "start": first.isoformat(), "end": last.isoformat(), **data})
+
+# --- Analytics ---
+from . import analytics
+
+class AnalyticsView(OwnedQuerysetMixin, APIView):
+    """
+    Vectorized entry analytics (needs NumPy). Query params: metric ('percentiles', 'rolling'
+    or 'weekday'), start and end dates (rolling defaults to the last 30 days), and optional
+    filters project, billable (true/false) and type (regular/pomodoro).
+    """
+    metrics = ('percentiles', 'rolling', 'weekday')
+
+    def get(self, request):
+        if not analytics.available():
+            return Response({"error": "Analytics need NumPy installed"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        metric = request.GET.get('metric', 'percentiles')
+        if metric not in self.metrics:
+            return Response({"error": f"metric must be one of {', '.join(self.metrics)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = parse_date(request.GET['start']) if request.GET.get('start') else None
+            end = parse_date(request.GET['end']) if request.GET.get('end') else None
+            project = int(request.GET['project']) if request.GET.get('project') else None
+        except ValueError:
+            return Response({"error": "Invalid start, end or project"}, status=status.HTTP_400_BAD_REQUEST)
+        billable = {'true': True, 'false': False}.get(request.GET.get('billable', '').lower())
+        entry_type = request.GET.get('type') or None
+        if entry_type is not None and entry_type not in analytics.TYPES:
+            return Response({"error": "type must be regular or pomodoro"}, status=status.HTTP_400_BAD_REQUEST)
+        if metric == 'rolling':
+            end = end or timezone.localdate()
+            start = start or end - timedelta(days=29)
+            if not 0 <= (end - start).days < 1000:
+                return Response({"error": "The range must cover 1 to 1000 days"}, status=status.HTTP_400_BAD_REQUEST)
+
+        dataset = analytics.get_dataset(self.get_owner().pk)
+        with dataset.lock:
+            if metric == 'rolling':
+                # The window reaches back before start, so only filter by the other fields
+                selected = dataset.mask(project=project, billable=billable, entry_type=entry_type)
+                result = {"days": analytics.rolling_average(dataset, selected, start, end)}
+            else:
+                selected = dataset.mask(start, end, project, billable, entry_type)
+                if metric == 'percentiles':
+                    result = analytics.duration_percentiles(dataset, selected)
+                else:
+                    result = {"weekdays": analytics.weekday_distribution(dataset, selected)}
+        return Response({"metric": metric, "start": start and start.isoformat(), "end": end and end.isoformat(), **result})
+
+# --- Search View ---
+from . import search as search_index
+
+class SearchView(OwnedQuerysetMixin, APIView):
+    """
+    Ranked full-text search over the caller's time-entry descriptions, task titles and
+    project names. Query params: q, type (comma separated: entry, task, project), page, page_size.
+    """
+    max_page_size = 100
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        kinds = [k for k in request.GET.get('type', '').split(',') if k]
+        if any(kind not in search_index.SOURCES for kind in kinds):
+            return Response({"error": "Invalid type"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', 20)), 1), self.max_page_size)
+        except ValueError:
+            return Response({"error": "Invalid page or page_size"}, status=status.HTTP_400_BAD_REQUEST)
+        if not query:
+            return Response({"results": [], "page": page, "has_next": False})
+
+        hits = search_index.search(
+            query, kinds=kinds, owner_id=self.get_owner().pk, limit=page_size + 1, offset=(page - 1) * page_size
+        )
+        has_next = len(hits) > page_size
+        hits = hits[:page_size]
+
+        ids = {kind: [object_id for k, object_id, _, _ in hits if k == kind] for kind in search_index.SOURCES}
+        entries = self.scoped(TimeEntry.objects.live().select_related('project')).in_bulk(ids['entry'])
+        tasks = self.scoped(Task.objects.live().select_related('project')).in_bulk(ids['task'])
+        projects = self.scoped(Project.objects).in_bulk(ids['project'])
+
+        results = []
+        for kind, object_id, rank, snippet in hits:
+            if kind == 'entry' and object_id in entries:
+                entry = entries[object_id]
+                results.append({
+                    "type": kind, "id": entry.id, "title": entry.description, "snippet": snippet,
+                    "project": {"id": entry.project_id, "name": entry.project.name},
+                    "date": entry.date.isoformat(), "duration": entry.duration, "billable": entry.billable,
+                    "rank": rank,
+                })
+            elif kind == 'task' and object_id in tasks:
+                task = tasks[object_id]
+                results.append({
+                    "type": kind, "id": task.id, "title": task.title, "snippet": snippet,
+                    "project": {"id": task.project_id, "name": task.project.name},
+                    "status": task.status, "rank": rank,
+                })
+            elif kind == 'project' and object_id in projects:
+                project = projects[object_id]
+                results.append({
+                    "type": kind, "id": project.id, "title": project.name, "snippet": snippet,
+                    "status": project.status, "rank": rank,
+                })
+        return Response({"results": results, "page": page, "has_next": has_next})
+
+from django.db import transaction
+from jobs.registry import enqueue
+
+class ProjectRetrieveUpdateDestroyView(OwnedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
-    permission_classes = [permissions.AllowAny]  # Adjust as needed
+
+    def destroy(self, request, *args, **kwargs):
+        """
+        Hide the project immediately and purge its entries and tasks in the background,
+        so a large project never holds the database write lock for long.
+        """
+        project = self.get_object()
+        with transaction.atomic():
+            Project.objects.filter(pk=project.pk).update(deleted_at=timezone.now())
+            bump_generation(Project, project.owner_id)
+            owner_id = project.owner_id
+            transaction.on_commit(lambda: analytics.bump_version(owner_id))
+            job = enqueue('projects.purge_project', {'project_id': project.pk}, priority=-1, owner=project.owner)
+        return Response({"message": "Project deletion scheduled", "job_id": job.id}, status=status.HTTP_202_ACCEPTED)
 
 # Make sure your urls.py is configured to route DELETE requests to the correct view.
 # Example for urls.py in your projects app:
@@ -157,6 +613,49 @@ class ProjectRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
 # 8. If you use DRF's DefaultRouter or ViewSets, the URL pattern may be different.
 
-class TagViewSet(viewsets.ModelViewSet):
-    queryset = Tag.objects.all()
-    serializer_class = TagSerializer
+from django.db.models import IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .serializers import TagUsageSerializer
+
+class TagViewSet(OwnedQuerysetMixin, CachedListMixin, viewsets.ModelViewSet):
+    """
+    Tags annotated with project_count and total_minutes (time tracked on tagged projects,
+    archived entries included), computed in one query. The list response is cached until tags, projects, project tags
+    or time entries change.
+    """
+    serializer_class = TagUsageSerializer
+    cache_name = 'tags'
+    cache_models = (Tag, Project, TimeEntry)
+
+    def get_queryset(self):
+        # Projects pending deletion, and their entries, no longer count
+        through = Project.tags.through.objects.filter(tag_id=OuterRef('pk'), project__deleted_at__isnull=True)
+        project_count = (
+            through.order_by().values('tag_id').annotate(n=Count('project_id')).values('n')
+        )
+        total_minutes = (
+            TimeEntry.objects.live().filter(project__tags=OuterRef('pk'))
+            .order_by().values('project__tags').annotate(total=Sum('duration')).values('total')
+        )
+        archived_minutes = (
+            ArchivedMonthTotal.objects.filter(project__tags=OuterRef('pk'), project__deleted_at__isnull=True)
+            .order_by().values('project__tags').annotate(total=Sum('minutes')).values('total')
+        )
+        return self.scoped(Tag.objects).annotate(
+            project_count=Coalesce(Subquery(project_count, output_field=IntegerField()), 0),
+            total_minutes=(
+                Coalesce(Subquery(total_minutes, output_field=IntegerField()), 0)
+                + Coalesce(Subquery(archived_minutes, output_field=IntegerField()), 0)
+            ),
+        ).order_by('id')
+
+
+from user_settings.views import TokenAuthenticationPermission
+from .caching import cache_stats
+
+class ResponseCacheStatsView(APIView):
+    """Per-view hit rate and byte counts of the list response cache, for this process."""
+    permission_classes = [TokenAuthenticationPermission]
+
+    def get(self, request):
+        return Response(cache_stats())
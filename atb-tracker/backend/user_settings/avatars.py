@@ -0,0 +1,112 @@
+"""
+Avatar thumbnail pipeline.
+
+Uploaded avatars are resized to a few fixed square sizes in WebP and JPEG by the
+user_settings.process_avatar job (see tasks.py), off the request thread; the job row is
+written with the upload, so a restart never loses the work. Variants are stored under
+content-hashed names so they can be cached forever, and their paths are recorded in
+UserProfile.avatar_variants as {"<size>": {"webp": path, "jpeg": path}}. The files of a
+replaced or removed avatar are deleted by the same job once no profile refers to them.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q, TextField
+from django.db.models.functions import Cast
+
+AVATAR_SIZES = getattr(settings, 'AVATAR_VARIANT_SIZES', (32, 64, 128, 256))
+VARIANT_DIR = 'avatars/variants'
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+PROCESS_TASK = 'user_settings.process_avatar'
+
+
+def is_external(name):
+    """Profiles created from a Google login store the provider picture URL as the avatar."""
+    return bool(name) and name.startswith(('http://', 'https://'))
+
+
+def variant_paths(variants):
+    return [path for formats in (variants or {}).values() for path in formats.values()]
+
+
+def schedule_avatar_processing(profile_id, superseded=()):
+    """
+    Queue thumbnail generation for the profile's current avatar, and removal of the
+    ``superseded`` files (its previous avatar and variants). Atomic with the caller's writes.
+    """
+    from jobs.registry import enqueue
+
+    return enqueue(PROCESS_TASK, {'profile_id': profile_id, 'superseded': list(superseded)})
+
+
+def remove_unused(paths):
+    """Delete the files among ``paths`` that no profile uses; content-hashed variants can be shared."""
+    from .models import UserProfile
+
+    for path in set(paths):
+        if not path or is_external(path):
+            continue
+        in_use = UserProfile.objects.annotate(variants=Cast('avatar_variants', TextField())).filter(
+            Q(avatar=path) | Q(variants__contains=f'"{path}"')
+        )
+        if not in_use.exists():
+            default_storage.delete(path)
+
+
+def _formats():
+    from PIL import features
+    formats = [('jpeg', 'JPEG', {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True})]
+    if features.check('webp'):
+        formats.insert(0, ('webp', 'WEBP', {'quality': WEBP_QUALITY, 'method': 4}))
+    return formats
+
+
+def _store(data, ext):
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    path = f'{VARIANT_DIR}/{digest}.{ext}'
+    if not default_storage.exists(path):
+        path = default_storage.save(path, ContentFile(data))
+    return path
+
+
+def render_variants(source):
+    """Resize an image file object to every size/format. Returns the variants mapping."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+        formats = _formats()
+        variants = {}
+        # Largest first so each step downsamples the previous result
+        for size in sorted(AVATAR_SIZES, reverse=True):
+            image = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            variants[str(size)] = {}
+            for ext, pil_format, options in formats:
+                buffer = BytesIO()
+                image.save(buffer, pil_format, **options)
+                variants[str(size)][ext] = _store(buffer.getvalue(), ext)
+        return variants
+
+
+def process_avatar(profile_id, superseded=()):
+    """Render the profile's avatar variants, then remove the superseded files. Returns the variants."""
+    from .models import UserProfile
+
+    remove_unused(superseded)
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if profile is None or not profile.avatar or is_external(profile.avatar.name):
+        return {}
+    original_name = profile.avatar.name
+    with profile.avatar.open('rb') as source:
+        variants = render_variants(source)
+    # Only record the variants if the avatar was not replaced while we were working;
+    # otherwise the replacement's job renders its own and these are left unused
+    if not UserProfile.objects.filter(pk=profile_id, avatar=original_name).update(avatar_variants=variants):
+        remove_unused(variant_paths(variants))
+        return {}
+    return variants
@@ -14,6 +14,7 @@ class UserProfile(models.Model):
     website = models.URLField(max_length=255, blank=True)
     timezone = models.CharField(max_length=100, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    avatar_variants = models.JSONField(default=dict, blank=True)  # {"<size>": {"webp": path, "jpeg": path}}
 
     def __str__(self):
         return f"{self.user.name} Profile"
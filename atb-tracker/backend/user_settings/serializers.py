@@ -1,22 +1,54 @@
 from rest_framework import serializers
 from .models import UserProfile
+from .avatars import is_external
 
 class UserProfileSerializer(serializers.ModelSerializer):
-    avatar = serializers.SerializerMethodField()
+    avatar = serializers.ImageField(required=False, allow_null=True)
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = UserProfile
         fields = [
             'id', 'user', 'first_name', 'last_name', 'email', 'phone', 'job_title',
-            'company', 'bio', 'location', 'website', 'timezone', 'avatar'
+            'company', 'bio', 'location', 'website', 'timezone', 'avatar', 'avatar_variants'
         ]
         read_only_fields = ['user', 'id']
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['avatar'] = self.get_avatar(instance)
+        return data
+
+    def _absolute(self, url):
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
     def get_avatar(self, obj):
+        """
+        URL of the avatar. With ?avatar_size=N this is the smallest pre-sized variant that
+        is at least N pixels (WebP unless ?avatar_format=jpeg), otherwise the original.
+        """
+        if not obj.avatar:
+            return None
+        if is_external(obj.avatar.name):
+            return obj.avatar.name
         request = self.context.get('request')
-        if obj.avatar:
-            if request is not None:
-                return request.build_absolute_uri(obj.avatar.url)
-            else:
-                return obj.avatar.url
-        return None
+        params = request.query_params if request is not None else {}
+        size = params.get('avatar_size')
+        if size and size.isascii() and size.isdecimal() and obj.avatar_variants:
+            sizes = sorted(int(s) for s in obj.avatar_variants)
+            chosen = next((s for s in sizes if s >= int(size)), sizes[-1])
+            formats = obj.avatar_variants[str(chosen)]
+            path = formats.get(params.get('avatar_format', 'webp')) or formats.get('jpeg')
+            if path:
+                return self._absolute(obj.avatar.storage.url(path))
+        return self._absolute(obj.avatar.url)
+
+    def get_avatar_variants(self, obj):
+        storage = obj.avatar.storage
+        return {
+            size: {fmt: self._absolute(storage.url(path)) for fmt, path in formats.items()}
+            for size, formats in (obj.avatar_variants or {}).items()
+        }
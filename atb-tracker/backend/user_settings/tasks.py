@@ -0,0 +1,8 @@
+from jobs.registry import task
+from .avatars import PROCESS_TASK, process_avatar
+
+@task(PROCESS_TASK)
+def process_avatar_job(profile_id, superseded=()):
+    """Render a profile's avatar variants and delete the files of the avatar it replaced."""
+    variants = process_avatar(profile_id, superseded)
+    return {'sizes': sorted(int(size) for size in variants)}
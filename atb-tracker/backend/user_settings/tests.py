@@ -1,3 +1,72 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from auth_app.models import AuthToken
+from jobs.models import Job
+from jobs.worker import run_next
+from users.models import Member
+
+from .avatars import PROCESS_TASK, variant_paths
+from .models import UserProfile
+
+
+def png(color):
+    buffer = BytesIO()
+    Image.new('RGB', (300, 300), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('avatar.png', buffer.getvalue(), content_type='image/png')
+
+
+class AvatarJobTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        member = Member.objects.create(name='Ada Lovelace', email='ada@example.com')
+        AuthToken.objects.create(user=member, token='ada-token', expires_at=timezone.now() + timedelta(days=1))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ada-token')
+
+    def upload(self, avatar):
+        response = self.client.patch('/api/user-settings/profile/', {'avatar': avatar}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return UserProfile.objects.get()
+
+    def test_variants_are_rendered_by_a_queued_job(self):
+        profile = self.upload(png('red'))
+        self.assertEqual(profile.avatar_variants, {})
+        self.assertEqual(Job.objects.get().name, PROCESS_TASK)
+
+        self.assertTrue(run_next('test'))
+        profile.refresh_from_db()
+        self.assertEqual(Job.objects.get().state, Job.SUCCEEDED)
+        self.assertEqual(sorted(profile.avatar_variants, key=int), ['32', '64', '128', '256'])
+        self.assertTrue(all(default_storage.exists(path) for path in variant_paths(profile.avatar_variants)))
+
+    def test_replaced_and_removed_avatars_leave_no_files(self):
+        first = self.upload(png('red'))
+        run_next('test')
+        first.refresh_from_db()
+        old_files = [first.avatar.name, *variant_paths(first.avatar_variants)]
+
+        second = self.upload(png('blue'))
+        run_next('test')
+        second.refresh_from_db()
+        self.assertFalse(any(default_storage.exists(path) for path in old_files))
+        new_files = [second.avatar.name, *variant_paths(second.avatar_variants)]
+        self.assertTrue(new_files[1:] and all(default_storage.exists(path) for path in new_files))
+
+        self.upload('')
+        run_next('test')
+        self.assertFalse(any(default_storage.exists(path) for path in new_files))
+        self.assertEqual(UserProfile.objects.get().avatar_variants, {})
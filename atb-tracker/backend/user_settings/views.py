@@ -6,9 +6,13 @@ from django.contrib.auth import get_user_model
 from users.models import Member
 from .models import UserProfile
 from .serializers import UserProfileSerializer
+from .avatars import is_external, schedule_avatar_processing, variant_paths
 from auth_app.models import AuthToken
 from django.utils import timezone
 from rest_framework.exceptions import NotAuthenticated
+from django.db import transaction
+from jobs.registry import enqueue
+from atb_tracker.metrics import TOKEN_AUTH
 
 class TokenAuthenticationPermission(BasePermission):
     """
@@ -23,24 +27,30 @@ class TokenAuthenticationPermission(BasePermission):
 
 def get_user_from_token(request):
     """Extract user from authentication token"""
+    # Looked up once per request; /api/batch/ also hands its result to every sub-request
+    underlying = getattr(request, '_request', request)
+    if not hasattr(underlying, '_token_user'):
+        underlying._token_user = _lookup_token_user(request)
+    return underlying._token_user
+
+def _lookup_token_user(request):
     auth_header = request.headers.get('Authorization')
     print(f"DEBUG: Auth header: {auth_header}")
     if not auth_header or not auth_header.startswith('Bearer '):
         print("DEBUG: No valid Authorization header")
+        TOKEN_AUTH.inc(outcome='missing')
         return None
     
     token = auth_header.split(' ')[1]
     print(f"DEBUG: Token extracted: {token[:10]}...")
     try:
-        auth_token = AuthToken.objects.get(
-            token=token,
-            is_active=True,
-            expires_at__gt=timezone.now()
-        )
+        auth_token = AuthToken.objects.active().select_related('user').get(token=token)
         print(f"DEBUG: AuthToken found for user: {auth_token.user.id}")
+        TOKEN_AUTH.inc(outcome='valid')
         return auth_token.user
     except AuthToken.DoesNotExist:
         print("DEBUG: AuthToken not found or invalid")
+        TOKEN_AUTH.inc(outcome='invalid')
         return None
 
 class UserProfileDetailView(generics.RetrieveUpdateAPIView):
@@ -60,25 +70,44 @@ class UserProfileDetailView(generics.RetrieveUpdateAPIView):
         else:
             raise NotAuthenticated("Authentication credentials were not provided or are invalid.")
 
+    def perform_update(self, serializer):
+        if 'avatar' not in serializer.validated_data:
+            serializer.save()
+            return
+        previous = serializer.instance
+        superseded = variant_paths(previous.avatar_variants)
+        if previous.avatar and not is_external(previous.avatar.name):
+            superseded.append(previous.avatar.name)
+        with transaction.atomic():
+            # New upload or removal: drop the old thumbnails and files, render new ones in the background
+            profile = serializer.save(avatar_variants={})
+            schedule_avatar_processing(profile.pk, superseded)
+
 @api_view(['DELETE'])
 @permission_classes([TokenAuthenticationPermission])
 def delete_account(request):
-    """Delete user account and all associated data"""
+    """
+    Delete user account and all associated data.
+
+    The account is hidden and logged out right away; its data is purged in the
+    background by the users.purge_member job.
+    """
     user = get_user_from_token(request)
     if not user:
         return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
     
     try:
-        # Delete user profile
-        try:
-            profile = UserProfile.objects.get(user=user)
-            profile.delete()
-        except UserProfile.DoesNotExist:
-            pass
-        
-        # Delete user
-        user.delete()
+        with transaction.atomic():
+            # Free the unique email/firebase_uid so the address can sign up again immediately
+            Member.objects.filter(pk=user.pk).update(
+                deleted_at=timezone.now(),
+                email=f'deleted-{user.pk}-{user.email}'[:254],
+                firebase_uid=None,
+            )
+            AuthToken.objects.filter(user=user).update(is_active=False)
+            UserProfile.objects.filter(user=user).delete()
+            job = enqueue('users.purge_member', {'member_id': user.pk}, priority=-1)
         
-        return Response({'message': 'Account deleted successfully'}, status=status.HTTP_200_OK)
+        return Response({'message': 'Account deletion scheduled', 'job_id': job.id}, status=status.HTTP_202_ACCEPTED)
     except Exception as e:
         return Response({'error': f'Failed to delete account: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.passwords import hash_password, verify_password
+
+class Command(BaseCommand):
+    help = (
+        'Measure password-check throughput (the CPU cost of a login) through the hashing pool '
+        'at the configured work factor, in total and per core.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+        parser.add_argument('--concurrency', type=int, nargs='+', help='Concurrent clients per run (default: 1 and 4x cores)')
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count() or 1
+        workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or cores
+        iterations = getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None)
+        encoded = hash_password('benchmark-password')
+        self.stdout.write(f'PBKDF2 iterations: {iterations}, pool workers: {workers}, cores: {cores}')
+        for concurrency in options['concurrency'] or [1, cores * 4]:
+            logins, elapsed = self._run(encoded, concurrency, options['seconds'])
+            rate = logins / elapsed
+            self.stdout.write(
+                f'concurrency {concurrency:>3}: {rate:8.1f} logins/s, {rate / min(workers, cores):7.1f} per core, '
+                f'{1000 * elapsed * concurrency / max(logins, 1):7.1f} ms avg latency'
+            )
+
+    def _run(self, encoded, concurrency, seconds):
+        done = [0] * concurrency
+        deadline = time.perf_counter() + seconds
+
+        def client(index):
+            while time.perf_counter() < deadline:
+                valid, _ = verify_password('benchmark-password', encoded)
+                assert valid
+                done[index] += 1
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(done), time.perf_counter() - started
@@ -1,5 +1,6 @@
 from django.db import models
-from django.contrib.auth.hashers import make_password, check_password
+from .passwords import hash_password, verify_password
+from jobs.deletion import PendingDeleteManager
 
 class Member(models.Model):
     name = models.CharField(max_length=255)
@@ -16,12 +17,22 @@ class Member(models.Model):
     groups = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)  # set while a background purge is pending
 
+    objects = PendingDeleteManager()
+    all_objects = models.Manager()
+
+    # Hashing runs on the bounded pool in users.passwords; may raise HashingBusy
     def set_password(self, raw_password):
-        self.password = make_password(raw_password)
+        self.password = hash_password(raw_password)
 
     def check_password(self, raw_password):
-        return check_password(raw_password, self.password)
+        valid, upgraded = verify_password(raw_password, self.password)
+        if upgraded:
+            # Hasher settings changed since this hash was made: store the rehash
+            self.password = upgraded
+            Member.all_objects.filter(pk=self.pk).update(password=upgraded)
+        return valid
 
     def __str__(self):
         return self.name
@@ -0,0 +1,35 @@
+"""
+Per-member data ownership for API views and serializers.
+
+Views mixing in OwnedQuerysetMixin require a bearer token, only see rows whose ``owner``
+is the caller, and stamp the caller as owner on create. Related-object fields use
+OwnedPrimaryKeyRelatedField so a request cannot point at another member's rows.
+"""
+from rest_framework import serializers
+
+from user_settings.views import TokenAuthenticationPermission, get_user_from_token
+
+
+class OwnedQuerysetMixin:
+    permission_classes = [TokenAuthenticationPermission]
+
+    def get_owner(self):
+        return get_user_from_token(self.request)
+
+    def scoped(self, queryset):
+        return queryset.filter(owner=self.get_owner())
+
+    def get_queryset(self):
+        return self.scoped(super().get_queryset())
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.get_owner())
+
+
+class OwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset.none()
+        return queryset.filter(owner=get_user_from_token(request))
@@ -0,0 +1,64 @@
+"""
+Password hashing on a dedicated, bounded thread pool.
+
+PBKDF2 releases the GIL while hashing, so running it on a pool of PASSWORD_HASHING_WORKERS
+threads (one per core by default) bounds how many hashes run at once, and so how much CPU
+a login burst can take from the other requests. The calling thread still waits for its
+hash: the pool bounds concurrency, it does not free serving threads. At most
+PASSWORD_HASHING_MAX_PENDING hashes may be waiting; beyond that callers get HashingBusy
+and should answer 503 straight away instead of queueing.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashingBusy(Exception):
+    """Raised when too many hashes are already queued."""
+
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+            max_pending = getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', workers * 16)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(workers + max_pending)
+    return _executor, _slots
+
+
+def _submit(func, *args):
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy('Too many password hashing requests in progress')
+    future = executor.submit(func, *args)
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def _verify(raw_password, encoded):
+    upgraded = []
+    valid = check_password(raw_password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, (upgraded[0] if upgraded else None)
+
+
+def hash_password(raw_password):
+    return _submit(make_password, raw_password).result()
+
+
+def verify_password(raw_password, encoded):
+    """
+    Returns (valid, new_encoded). new_encoded is set when the password was correct but the
+    stored hash uses outdated hasher parameters; the caller should save it.
+    """
+    return _submit(_verify, raw_password, encoded).result()
+
@@ -0,0 +1,30 @@
+from django.apps import apps
+from jobs.deletion import delete_in_batches
+from jobs.registry import task
+from auth_app.models import AuthToken
+from projects import counters
+from user_settings.models import UserProfile
+from .models import Member
+
+# Owned models in dependency order: children before the rows they point at
+OWNED_MODELS = [
+    'projects.ArchivedMonth', 'projects.TimeEntry', 'projects.Task', 'pomodoro.PomodoroSession',
+    'projects.Project', 'projects.Tag', 'projects.Client',
+]
+
+@task('users.purge_member')
+def purge_member(member_id):
+    """Delete a pending-delete member's data, tokens and profile in batches, then the member."""
+    deleted = {}
+    # The member's projects go too: no per-row counter updates on the way
+    with counters.deferred():
+        for label in OWNED_MODELS:
+            model = apps.get_model(label)
+            if label == 'projects.Project':
+                delete_in_batches(model.tags.through.objects.filter(project__owner_id=member_id))
+            manager = getattr(model, 'all_objects', model.objects)
+            deleted[model._meta.model_name] = delete_in_batches(manager.filter(owner_id=member_id))
+    deleted['auth_tokens'] = delete_in_batches(AuthToken.objects.filter(user_id=member_id))
+    UserProfile.objects.filter(user_id=member_id).delete()
+    Member.all_objects.filter(pk=member_id).delete()
+    return deleted
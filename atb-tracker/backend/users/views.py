@@ -5,8 +5,9 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import Member
 from .serializers import MemberSerializer
+from atb_tracker.memory import MemoryProfiledMixin
 
-class MemberListCreateView(generics.ListCreateAPIView):
+class MemberListCreateView(MemoryProfiledMixin, generics.ListCreateAPIView):
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
 